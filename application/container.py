@@ -183,7 +183,8 @@ class Container(containers.DeclarativeContainer):
             return LLMFactory.create_service(
                 LLMProvider.GOOGLE,
                 api_key=llm_config.get('api_key', ''),
-                model=llm_config.get('model', 'gemini-2.0-flash')
+                model=llm_config.get('model', 'gemini-2.0-flash'),
+                cache_path=llm_config.get('cache_path')
             )
         elif provider == 'lmstudio':
             return LLMFactory.create_service(
@@ -1,8 +1,10 @@
 """
 Clean FastAPI Web Server Service - Pure FastAPI implementation
 """
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 from typing import Dict, Any
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +12,7 @@ from fastapi.staticfiles import StaticFiles
 from datetime import datetime
 
 from domain.services.IWebServer import IWebServer
+from infrastructure.utils.http_client import close_shared_clients
 
 logger = logging.getLogger(__name__)
 
@@ -20,26 +23,37 @@ class CleanFastAPIWebServerService(IWebServer):
     def __init__(self, title: str = "Voice AI Assistant", 
                  description: str = "Clean FastAPI backend for Voice AI Assistant",
                  version: str = "1.0.0",
-                 allow_origins: list = None):
+                 allow_origins: list = None,
+                 container=None):
         self.title = title
         self.description = description
         self.version = version
         self.allow_origins = allow_origins or ["http://localhost", "http://localhost:8080", "*"]
+        # Container whose Singletons serve the routes; warmed up on startup and closed on shutdown
+        self.container = container
         self._app = None
+        self._warmup_task = None
         
     def create_app(self) -> FastAPI:
         """Create pure FastAPI app"""
         try:
             logger.info("Creating clean FastAPI app...")
             
-            # Create FastAPI app
+            if self.container is None:
+                from application.container import Container
+                self.container = Container()
+            
+            # Create FastAPI app; the lifespan warms up and closes the container's services
             app = FastAPI(
                 title=self.title,
                 description=self.description,
                 version=self.version,
                 docs_url="/docs",
-                redoc_url="/redoc"
+                redoc_url="/redoc",
+                lifespan=self._create_lifespan()
             )
+            # Routes resolve their services from this container (see chat_endpoints.get_container)
+            app.state.container = self.container
             
             # Add CORS middleware
             app.add_middleware(
@@ -111,6 +125,55 @@ class CleanFastAPIWebServerService(IWebServer):
             logger.info(f"{request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s")
             return response
     
+    def _create_lifespan(self):
+        """Schedule LLM warm-up (connections, JIT kernels) without delaying startup; close HTTP clients on shutdown"""
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            self._start_warmup()
+            try:
+                yield
+            finally:
+                if self._warmup_task is not None and not self._warmup_task.done():
+                    self._warmup_task.cancel()
+                await self._close_http_services()
+        
+        return lifespan
+    
+    def _start_warmup(self):
+        """Run the LLM service's warm-up as a background task"""
+        try:
+            llm_service = self.container.llm_service()
+        except Exception as e:
+            logger.warning(f"LLM warm-up skipped: {e}")
+            return
+        
+        warmup = getattr(llm_service, "warmup", None)
+        if warmup is None:
+            return
+        
+        async def run_warmup():
+            result = await warmup()
+            if result.is_success:
+                logger.info(f"LLM service warmed up: {result.value}")
+            else:
+                logger.warning(f"LLM warm-up failed: {result.error}")
+        
+        self._warmup_task = asyncio.create_task(run_warmup())
+    
+    async def _close_http_services(self):
+        """Release pooled HTTP connections held by the LLM and vector DB services that served traffic"""
+        try:
+            services = [self.container.llm_service(), self.container.vector_db_service()]
+        except Exception:
+            services = []
+        
+        for service in services:
+            aclose = getattr(service, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        # Process-wide clients shared by every container (see http_client.shared_client)
+        await close_shared_clients()
+    
     def _add_root_endpoints(self, app: FastAPI):
         """Add root endpoints"""
         @app.get("/")
@@ -123,6 +123,14 @@ class ChatMessage:
             "parent_message_id": self.parent_message_id
         }
     
+    def to_google_format(self) -> dict:
+        """Convert to Google 'contents' entry, cached until content or role changes"""
+        cached = self.__dict__.get("_google_format")
+        if cached is None or cached[0] is not self.content or cached[1] is not self.role:
+            cached = (self.content, self.role, {"role": self.role.value, "parts": ({"text": self.content},)})
+            self.__dict__["_google_format"] = cached
+        return cached[2]
+    
     def to_json(self) -> str:
         """Convert to JSON string"""
         return json.dumps(self.to_dict(), ensure_ascii=False)
@@ -2,6 +2,7 @@
 import httpx
 from typing import List, Dict, Any, Optional
 from domain.utils.result import Result
+from infrastructure.utils import json_codec
 from .IEmbeddingService import IEmbeddingService
 
 class GoogleEmbeddingService(IEmbeddingService):
@@ -14,6 +15,11 @@ class GoogleEmbeddingService(IEmbeddingService):
         self.project_id = project_id
         self.location = location
         self.base_url = f"https://{location}-aiplatform.googleapis.com/v1"
+        self._predict_url = f"{self.base_url}/projects/{project_id}/locations/{location}/publishers/google/models/{model_name}:predict"
+        self._headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
     
     async def embed_text(self, text: str) -> Result[List[float], str]:
         """Embed single text using Google Vertex AI"""
@@ -24,13 +30,6 @@ class GoogleEmbeddingService(IEmbeddingService):
         
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{self.base_url}/projects/{self.project_id}/locations/{self.location}/publishers/google/models/{self.model_name}:predict"
-                
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-                
                 payload = {
                     "instances": [
                         {
@@ -42,10 +41,10 @@ class GoogleEmbeddingService(IEmbeddingService):
                     }
                 }
                 
-                response = await client.post(url, headers=headers, json=payload)
+                response = await client.post(self._predict_url, headers=self._headers, content=json_codec.dumps(payload))
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = json_codec.loads(response.content)
                     if "predictions" in data and len(data["predictions"]) > 0:
                         embedding = data["predictions"][0]["embeddings"]["values"]
                         self.logger.info(f"Successfully embedded text, dimension: {len(embedding)}")
@@ -75,13 +74,6 @@ class GoogleEmbeddingService(IEmbeddingService):
         
         try:
             async with httpx.AsyncClient(timeout=60.0) as client:
-                url = f"{self.base_url}/projects/{self.project_id}/locations/{self.location}/publishers/google/models/{self.model_name}:predict"
-                
-                headers = {
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                }
-                
                 payload = {
                     "instances": [
                         {
@@ -94,10 +86,10 @@ class GoogleEmbeddingService(IEmbeddingService):
                     }
                 }
                 
-                response = await client.post(url, headers=headers, json=payload)
+                response = await client.post(self._predict_url, headers=self._headers, content=json_codec.dumps(payload))
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = json_codec.loads(response.content)
                     if "predictions" in data:
                         embeddings = [
                             prediction["embeddings"]["values"] 
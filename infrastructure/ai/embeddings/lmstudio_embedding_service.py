@@ -1,8 +1,10 @@
 # infrastructure/ai/embeddings/lmstudio_embedding_service.py
 import httpx
 import logging
+from functools import cached_property
 from typing import List, Dict, Any, Optional
 from domain.utils.result import Result
+from infrastructure.utils.http_client import build_async_client
 from .IEmbeddingService import IEmbeddingService
 
 class LMStudioEmbeddingService(IEmbeddingService):
@@ -14,6 +16,16 @@ class LMStudioEmbeddingService(IEmbeddingService):
         self.logger = logging.getLogger(__name__)
         self.logger.info(f"LMStudioEmbeddingService initialized with proxy: {proxy_url}, model: {model_name}")
     
+    @cached_property
+    def _client(self) -> httpx.AsyncClient:
+        """Pooled client; it advertises gzip/deflate (and br/zstd when installed) so embedding JSON is sent compressed"""
+        return build_async_client(timeout=30.0)
+    
+    async def aclose(self):
+        """Close the pooled HTTP client if it was created"""
+        if "_client" in self.__dict__:
+            await self._client.aclose()
+    
     async def create_embedding(self, text: str) -> Result[List[float], str]:
         """Create embedding for single text using LM Studio proxy"""
         return await self._create_embedding_single(text)
@@ -49,36 +61,35 @@ class LMStudioEmbeddingService(IEmbeddingService):
             return Result.error("Text cannot be empty")
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{self.proxy_url}/v1/embeddings"
-                
-                request_body = {
-                    "model": self.model_name,
-                    "input": text
-                }
-                
-                self.logger.info(f"LMStudioEmbeddingService - Sending request to: {url}")
-                
-                response = await client.post(url, json=request_body)
+            url = f"{self.proxy_url}/v1/embeddings"
+            
+            request_body = {
+                "model": self.model_name,
+                "input": text
+            }
+            
+            self.logger.info(f"LMStudioEmbeddingService - Sending request to: {url}")
+            
+            response = await self._client.post(url, json=request_body)
+            
+            if response.status_code == 200:
+                data = response.json()
+                self.logger.info(f"LMStudioEmbeddingService - Response received: {response.status_code}")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    self.logger.info(f"LMStudioEmbeddingService - Response received: {response.status_code}")
-                    
-                    if 'data' in data and len(data['data']) > 0:
-                        embedding = data['data'][0]['embedding']
-                        self.logger.info(f"LMStudioEmbeddingService - Embedding created successfully, dimension: {len(embedding)}")
-                        return Result.success(embedding)
-                    else:
-                        error_msg = "No embedding data in response"
-                        self.logger.error(f"LMStudioEmbeddingService - {error_msg}")
-                        return Result.error(error_msg)
+                if 'data' in data and len(data['data']) > 0:
+                    embedding = data['data'][0]['embedding']
+                    self.logger.info(f"LMStudioEmbeddingService - Embedding created successfully, dimension: {len(embedding)}")
+                    return Result.success(embedding)
                 else:
-                    error_msg = f"LM Studio API error: {response.status_code} - {response.text}"
-                    safe_error_msg = error_msg.encode('utf-8', errors='ignore').decode('utf-8')
-                    self.logger.error(f"LMStudioEmbeddingService - {safe_error_msg}")
-                    return Result.error(safe_error_msg)
-                    
+                    error_msg = "No embedding data in response"
+                    self.logger.error(f"LMStudioEmbeddingService - {error_msg}")
+                    return Result.error(error_msg)
+            else:
+                error_msg = f"LM Studio API error: {response.status_code} - {response.text}"
+                safe_error_msg = error_msg.encode('utf-8', errors='ignore').decode('utf-8')
+                self.logger.error(f"LMStudioEmbeddingService - {safe_error_msg}")
+                return Result.error(safe_error_msg)
+                
         except httpx.TimeoutException:
             error_msg = "LM Studio API timeout"
             self.logger.error(error_msg)
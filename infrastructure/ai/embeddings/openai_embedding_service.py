@@ -2,8 +2,12 @@
 import httpx
 from typing import List, Dict, Any, Optional
 from domain.utils.result import Result
+from infrastructure.utils import json_codec
 from .IEmbeddingService import IEmbeddingService
 
+# Cap on how much of an error body is copied into log/error strings
+_ERROR_BODY_PREVIEW_BYTES = 1024
+
 class OpenAIEmbeddingService(IEmbeddingService):
     """OpenAI embedding service"""
     
@@ -36,7 +40,7 @@ class OpenAIEmbeddingService(IEmbeddingService):
                 response = await client.post(url, headers=headers, json=payload)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = json_codec.loads(response.content)
                     if "data" in data and len(data["data"]) > 0:
                         embedding = data["data"][0]["embedding"]
                         self.logger.info(f"Successfully embedded text, dimension: {len(embedding)}")
@@ -44,7 +48,7 @@ class OpenAIEmbeddingService(IEmbeddingService):
                     else:
                         return Result.error("No embedding data in response")
                 else:
-                    error_msg = f"OpenAI API error: {response.status_code} - {response.text}"
+                    error_msg = self._format_api_error(response)
                     self.logger.error(error_msg)
                     return Result.error(error_msg)
                     
@@ -81,7 +85,7 @@ class OpenAIEmbeddingService(IEmbeddingService):
                 response = await client.post(url, headers=headers, json=payload)
                 
                 if response.status_code == 200:
-                    data = response.json()
+                    data = json_codec.loads(response.content)
                     if "data" in data:
                         embeddings = [item["embedding"] for item in data["data"]]
                         self.logger.info(f"Successfully embedded {len(embeddings)} texts")
@@ -89,7 +93,7 @@ class OpenAIEmbeddingService(IEmbeddingService):
                     else:
                         return Result.error("No embedding data in response")
                 else:
-                    error_msg = f"OpenAI API error: {response.status_code} - {response.text}"
+                    error_msg = self._format_api_error(response)
                     self.logger.error(error_msg)
                     return Result.error(error_msg)
                     
@@ -105,3 +109,19 @@ class OpenAIEmbeddingService(IEmbeddingService):
     async def get_embedding_dimension(self) -> Result[int, str]:
         """Get embedding dimension"""
         return Result.success(self.dimension)
+    
+    def _format_api_error(self, response: httpx.Response) -> str:
+        """Build error message from a bounded body preview and the OpenAI error code"""
+        body = response.content
+        error_code = None
+        if "json" in response.headers.get("content-type", ""):
+            try:
+                error = json_codec.loads(body).get("error") or {}
+                error_code = error.get("code") or error.get("type")
+            except (ValueError, AttributeError):
+                error_code = None
+        
+        preview = body[:_ERROR_BODY_PREVIEW_BYTES].decode("utf-8", "replace")
+        if error_code:
+            return f"OpenAI API error: {response.status_code} ({error_code}) - {preview}"
+        return f"OpenAI API error: {response.status_code} - {preview}"
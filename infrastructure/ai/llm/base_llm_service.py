@@ -1,11 +1,23 @@
 # infrastructure/ai/llm/base_llm_service.py
 import asyncio
 import logging
+import re
 from abc import ABC, abstractmethod
-from typing import List, AsyncIterator, Dict, Any, Optional
+from typing import List, AsyncIterator, Awaitable, Callable, Dict, Any, Optional
 from domain.services.ILLMService import ILLMService
 from domain.entities.chat_message import ChatMessage, MessageRole
 from domain.utils.result import Result
+from infrastructure.utils.sse import SseJsonAssembler, iter_sse_data
+
+# Keyword tables for the heuristic AI-feature defaults, shared by all instances
+_POSITIVE_WORDS = frozenset({"good", "great", "excellent", "amazing", "wonderful", "fantastic"})
+_NEGATIVE_WORDS = frozenset({"bad", "terrible", "awful", "horrible", "disgusting", "hate"})
+_QUALITY_HINTS = ("thank", "please", "help")
+# Rough tokens-per-word ratio for the word-based token estimate
+_TOKENS_PER_WORD = 1.3
+_WORD_PATTERN = re.compile(r"\w+")
+_EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
 
 class BaseLLMService(ILLMService):
     """Base implementation of LLMService with default implementations"""
@@ -15,6 +27,7 @@ class BaseLLMService(ILLMService):
         self._cache_enabled = False
         self._cache = {}
         self._error_history = []
+        self._model_info_cache: Dict[str, Dict[str, Any]] = {}
         self._performance_metrics = {
             "total_requests": 0,
             "total_tokens": 0,
@@ -31,7 +44,8 @@ class BaseLLMService(ILLMService):
     
     async def stream_completion(self, messages: List[ChatMessage]) -> AsyncIterator[Result[str, str]]:
         """Stream LLM completion - default implementation"""
-        # Fallback to regular completion
+        # Fallback to regular completion; subclasses with an HTTP streaming
+        # endpoint should pipe their response through _iter_sse instead
         result = await self.get_completion(messages)
         yield result
     
@@ -75,6 +89,7 @@ class BaseLLMService(ILLMService):
     
     async def set_model(self, model_name: str) -> Result[None, str]:
         """Set active model - default implementation"""
+        self._model_info_cache.clear()
         return Result.success(None)
     
     async def get_configuration(self) -> Result[Dict[str, Any], str]:
@@ -88,6 +103,7 @@ class BaseLLMService(ILLMService):
     
     async def update_configuration(self, config: Dict[str, Any]) -> Result[None, str]:
         """Update configuration - default implementation"""
+        self._model_info_cache.clear()
         return Result.success(None)
     
     async def health_check(self) -> Result[Dict[str, Any], str]:
@@ -102,12 +118,14 @@ class BaseLLMService(ILLMService):
     async def get_model_info(self, model_name: str) -> Result[Dict[str, Any], str]:
         """Get model information - default implementation"""
         try:
-            models_result = await self.list_models()
-            if models_result.is_error:
-                return models_result
-            
-            models = models_result.value
-            model = next((m for m in models if m.get("id") == model_name), None)
+            model = self._model_info_cache.get(model_name)
+            if model is None:
+                models_result = await self.list_models()
+                if models_result.is_error:
+                    return models_result
+                
+                self._model_info_cache = {m.get("id"): m for m in models_result.value}
+                model = self._model_info_cache.get(model_name)
             
             if model:
                 return Result.success(model)
@@ -120,11 +138,16 @@ class BaseLLMService(ILLMService):
         """Count tokens in text - default implementation"""
         # Simple word-based estimation
         word_count = len(text.split())
-        estimated_tokens = int(word_count * 1.3)  # Rough estimation
+        estimated_tokens = int(word_count * _TOKENS_PER_WORD)
         return Result.success(estimated_tokens)
     
     async def count_tokens_in_messages(self, messages: List[ChatMessage]) -> Result[int, str]:
         """Count tokens in messages - default implementation"""
+        if type(self).count_tokens is BaseLLMService.count_tokens:
+            # Same word-based estimate as count_tokens, with one split over all messages
+            word_count = len(" ".join(message.content for message in messages).split())
+            return Result.success(int(word_count * _TOKENS_PER_WORD))
+        
         total_tokens = 0
         for message in messages:
             result = await self.count_tokens(message.content)
@@ -227,12 +250,9 @@ class BaseLLMService(ILLMService):
     async def analyze_sentiment(self, text: str) -> Result[Dict[str, Any], str]:
         """Analyze sentiment - default implementation"""
         # Simple keyword-based sentiment analysis
-        positive_words = ["good", "great", "excellent", "amazing", "wonderful", "fantastic"]
-        negative_words = ["bad", "terrible", "awful", "horrible", "disgusting", "hate"]
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        tokens = set(_WORD_PATTERN.findall(text.lower()))
+        positive_count = len(tokens & _POSITIVE_WORDS)
+        negative_count = len(tokens & _NEGATIVE_WORDS)
         
         if positive_count > negative_count:
             sentiment = "positive"
@@ -306,12 +326,10 @@ class BaseLLMService(ILLMService):
     async def extract_entities(self, text: str) -> Result[List[Dict[str, Any]], str]:
         """Extract entities - default implementation"""
         # Simple regex-based entity extraction
-        import re
-        
         entities = []
         
         # Email addresses
-        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
+        emails = _EMAIL_PATTERN.findall(text)
         for email in emails:
             entities.append({
                 "text": email,
@@ -321,7 +339,7 @@ class BaseLLMService(ILLMService):
             })
         
         # URLs
-        urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', text)
+        urls = _URL_PATTERN.findall(text)
         for url in urls:
             entities.append({
                 "text": url,
@@ -340,37 +358,52 @@ class BaseLLMService(ILLMService):
         """Get embeddings - default implementation (not supported)"""
         return Result.error("Embeddings not supported in base implementation")
     
-    async def batch_completion(self, message_batches: List[List[ChatMessage]]) -> Result[List[str], str]:
-        """Process multiple completions in batch - default implementation"""
-        results = []
-        for messages in message_batches:
-            result = await self.get_completion(messages)
-            if result.is_success:
-                results.append(result.value)
-            else:
-                return Result.error(f"Batch completion failed: {result.error}")
-        return Result.success(results)
-    
-    async def batch_embeddings(self, text_batches: List[List[str]]) -> Result[List[List[List[float]]], str]:
-        """Process multiple embedding batches - default implementation (not supported)"""
-        return Result.error("Embeddings not supported in base implementation")
-    
-    async def parallel_completion(self, messages_list: List[List[ChatMessage]]) -> Result[List[str], str]:
+    async def batch_completion(self, message_batches: List[List[ChatMessage]], max_concurrent: int = 8) -> Result[List[str], str]:
+        """Process multiple completions concurrently - default implementation"""
+        return await self._run_concurrently(
+            [lambda messages=messages: self.get_completion(messages) for messages in message_batches],
+            max_concurrent,
+            "Batch completion failed"
+        )
+    
+    async def batch_embeddings(self, text_batches: List[List[str]], max_concurrent: int = 8) -> Result[List[List[List[float]]], str]:
+        """Process multiple embedding batches concurrently - default implementation"""
+        return await self._run_concurrently(
+            [lambda texts=texts: self.get_embeddings(texts) for texts in text_batches],
+            max_concurrent,
+            "Batch embeddings failed"
+        )
+    
+    async def parallel_completion(self, messages_list: List[List[ChatMessage]], max_concurrent: int = 8) -> Result[List[str], str]:
         """Process completions in parallel - default implementation"""
-        # Run completions in parallel
-        tasks = [self.get_completion(messages) for messages in messages_list]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return await self._run_concurrently(
+            [lambda messages=messages: self.get_completion(messages) for messages in messages_list],
+            max_concurrent,
+            "Parallel completion failed"
+        )
+    
+    async def _run_concurrently(self, calls: List[Callable[[], Awaitable[Result]]], max_concurrent: int, failure: str) -> Result[list, str]:
+        """Run calls under a concurrency limit; on the first error cancel the rest and return it"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
         
-        completion_results = []
-        for result in results:
-            if isinstance(result, Exception):
-                return Result.error(f"Parallel completion failed: {str(result)}")
-            elif result.is_success:
-                completion_results.append(result.value)
-            else:
-                return Result.error(f"Parallel completion failed: {result.error}")
+        async def run(call):
+            async with semaphore:
+                return await call()
         
-        return Result.success(completion_results)
+        tasks = [asyncio.ensure_future(run(call)) for call in calls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                try:
+                    result = await finished
+                except Exception as e:
+                    return Result.error(f"{failure}: {str(e)}")
+                if result.is_error:
+                    return Result.error(f"{failure}: {result.error}")
+            return Result.success([task.result().value for task in tasks])
+        finally:
+            # No-op for finished tasks; stops outstanding requests after an error
+            for task in tasks:
+                task.cancel()
     
     async def stream_completion_with_tools(self, messages: List[ChatMessage], tools: List[Dict[str, Any]]) -> AsyncIterator[Result[Dict[str, Any], str]]:
         """Stream completion with tools - default implementation"""
@@ -407,7 +440,8 @@ class BaseLLMService(ILLMService):
             score += 0.2
         if len(response) > 200:
             score += 0.2
-        if any(word in response.lower() for word in ["thank", "please", "help"]):
+        response_lower = response.lower()
+        if any(hint in response_lower for hint in _QUALITY_HINTS):
             score += 0.1
         
         return Result.success(min(score, 1.0))
@@ -472,6 +506,27 @@ class BaseLLMService(ILLMService):
         return Result.success([])
     
     # Helper methods
+    async def _iter_sse(self, response) -> AsyncIterator[Result[str, str]]:
+        """Yield content deltas from an OpenAI-compatible SSE response as they arrive"""
+        async for delta in self._iter_sse_deltas(response):
+            content = delta.get("content", "")
+            if content:
+                yield Result.success(content)
+    
+    async def _iter_sse_deltas(self, response) -> AsyncIterator[Dict[str, Any]]:
+        """Yield the first choice's delta of each OpenAI-compatible SSE chunk until [DONE]"""
+        # Tool-call arguments may arrive split over several data lines
+        assembler = SseJsonAssembler()
+        async for data in iter_sse_data(response.aiter_bytes()):
+            if data.strip() == b"[DONE]":
+                break
+            chunk = assembler.feed(data)
+            if not isinstance(chunk, dict):
+                continue
+            choices = chunk.get("choices")
+            if choices:
+                yield choices[0].get("delta", {})
+    
     def _log_error(self, error_msg: str, exception: Exception = None):
         """Log error and add to history"""
         self.logger.error(error_msg)
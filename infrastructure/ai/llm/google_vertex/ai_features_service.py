@@ -1,37 +1,141 @@
 # infrastructure/llm/google_vertex/ai_features_service.py
+import asyncio
+import hashlib
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 import httpx
-from typing import List, Dict, Any, Optional
+import numpy as np
 from domain.entities.chat_message import ChatMessage
 from domain.utils.result import Result
+from infrastructure.utils import json_codec
+from infrastructure.utils.vector_ops import to_float32_matrix, normalize_rows
 from .base_vertex_service import BaseVertexService
 
+_EMBEDDING_MODEL = "models/embedding-001"
+# Maximum number of texts sent in a single embedding request
+_EMBEDDING_BATCH_SIZE = 100
+# Maximum number of embeddings kept in the in-process LRU cache
+_EMBEDDING_CACHE_SIZE = 10000
+
+@lru_cache(maxsize=256)
+def _join_categories(categories: Tuple[str, ...]) -> str:
+    return ", ".join(categories)
+
 class AIFeaturesService(BaseVertexService):
     """Google Vertex AI service for advanced AI features"""
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
-        super().__init__(api_key, model)
+    # Prompt templates, built once and filled per call
+    _CLASSIFY_TEMPLATE = "Classify the following text into one of these categories: {categories}\n\nText: {text}\n\nCategory:"
+    _SUMMARIZE_TEMPLATE = "Summarize the following text in maximum {max_length} characters:\n\n{text}"
+    _KEYWORDS_TEMPLATE = "Extract {count} key keywords from the following text:\n\n{text}\n\nKeywords:"
+    _TRANSLATE_TEMPLATE = "Translate the following text{source_info} to {target_language}:\n\n{text}"
+    _SENTIMENT_TEMPLATE = "Analyze the sentiment of the following text and provide a score from -1 (very negative) to 1 (very positive):\n\n{text}"
+    _ENTITIES_TEMPLATE = "Extract named entities (people, places, organizations) from the following text:\n\n{text}"
+    
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash", client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, model, client)
+        self._batch_embed_url = f"{self.base_url}/{_EMBEDDING_MODEL}:batchEmbedContents"
+        self._embedding_cache: OrderedDict[str, List[float]] = OrderedDict()
     
     async def get_embeddings(self, texts: List[str]) -> Result[List[List[float]], str]:
-        """Get text embeddings"""
+        """Get text embeddings, serving repeated texts from the local LRU cache"""
+        keys = [self._embedding_cache_key(text) for text in texts]
+        # Vectors for this call are held here, not re-read from the LRU: inserts by this call or by a
+        # concurrent one (during the await) may evict a hit before the result is assembled
+        resolved: Dict[str, List[float]] = {}
+        
+        # Request each uncached distinct text once, even if repeated in the input
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key in resolved or key in missing:
+                continue
+            cached = self._embedding_cache.get(key)
+            if cached is not None:
+                self._embedding_cache.move_to_end(key)
+                resolved[key] = cached
+            else:
+                missing[key] = text
+        
+        if missing:
+            request_result = await self._request_embeddings(list(missing.values()))
+            if request_result.is_error:
+                return request_result
+            if len(request_result.value) != len(missing):
+                return Result.error("Embedding count does not match input count")
+            
+            for key, embedding in zip(missing, request_result.value):
+                resolved[key] = embedding
+                self._cache_embedding(key, embedding)
+        
+        return Result.success([resolved[key] for key in keys])
+    
+    async def get_embeddings_np(self, texts: List[str], normalize: bool = True) -> Result[np.ndarray, str]:
+        """Get embeddings as a contiguous (N, D) float32 array, L2-normalized by default"""
+        embeddings_result = await self.get_embeddings(texts)
+        if embeddings_result.is_error:
+            return embeddings_result
+        
+        dims = {len(embedding) for embedding in embeddings_result.value}
+        if len(dims) > 1:
+            return Result.error(f"Embedding dimensions differ: {sorted(dims)}")
+        
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/models/embedding-001:embedContent",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={
-                        "requests": [{"content": {"parts": [{"text": text}]}} for text in texts]
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    embeddings = [item["embedding"]["values"] for item in data.get("embeddings", [])]
-                    return Result.success(embeddings)
-                else:
-                    return Result.error(f"API error: {response.status_code}")
+            matrix = to_float32_matrix(embeddings_result.value)
+            if normalize:
+                normalize_rows(matrix)
+            return Result.success(matrix)
+        except Exception as e:
+            return Result.error(f"Failed to build embedding matrix: {str(e)}")
+    
+    async def _request_embeddings(self, texts: List[str]) -> Result[List[List[float]], str]:
+        """Embed texts via the API, sharding oversized inputs concurrently"""
+        if len(texts) <= _EMBEDDING_BATCH_SIZE:
+            return await self._embed_batch(texts)
+        
+        shards = [texts[i:i + _EMBEDDING_BATCH_SIZE] for i in range(0, len(texts), _EMBEDDING_BATCH_SIZE)]
+        shard_results = await asyncio.gather(*(self._embed_batch(shard) for shard in shards))
+        
+        embeddings = []
+        for shard_result in shard_results:
+            if shard_result.is_error:
+                return shard_result
+            embeddings.extend(shard_result.value)
+        return Result.success(embeddings)
+    
+    async def _embed_batch(self, texts: List[str]) -> Result[List[List[float]], str]:
+        """Embed one request-sized batch of texts in a single batchEmbedContents call"""
+        try:
+            response = await self._client.post(
+                self._batch_embed_url,
+                content=json_codec.dumps({
+                    "requests": [
+                        {"model": _EMBEDDING_MODEL, "content": {"parts": [{"text": text}]}}
+                        for text in texts
+                    ]
+                })
+            )
+            
+            if response.status_code == 200:
+                data = json_codec.loads(response.content)
+                embeddings = [item["values"] for item in data.get("embeddings", [])]
+                return Result.success(embeddings)
+            else:
+                return Result.error(f"API error: {response.status_code}")
         except Exception as e:
             return Result.error(f"Failed to get embeddings: {str(e)}")
     
+    def _embedding_cache_key(self, text: str) -> str:
+        """Content-hash cache key for an embedding"""
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _cache_embedding(self, key: str, embedding: List[float]):
+        """Store embedding and evict least recently used entries over the limit"""
+        self._embedding_cache[key] = embedding
+        self._embedding_cache.move_to_end(key)
+        while len(self._embedding_cache) > _EMBEDDING_CACHE_SIZE:
+            self._embedding_cache.popitem(last=False)
+    
     async def get_embedding(self, text: str) -> Result[List[float], str]:
         """Get single text embedding"""
         embeddings_result = await self.get_embeddings([text])
@@ -46,7 +150,7 @@ class AIFeaturesService(BaseVertexService):
     async def classify_text(self, text: str, categories: List[str]) -> Result[Dict[str, Any], str]:
         """Classify text into categories"""
         try:
-            prompt = f"Classify the following text into one of these categories: {', '.join(categories)}\n\nText: {text}\n\nCategory:"
+            prompt = self._CLASSIFY_TEMPLATE.format(categories=_join_categories(tuple(categories)), text=text)
             
             messages = [ChatMessage.create_user_message(prompt)]
             completion_result = await self.get_completion(messages)
@@ -68,7 +172,7 @@ class AIFeaturesService(BaseVertexService):
     async def summarize_text(self, text: str, max_length: int = 100) -> Result[str, str]:
         """Summarize text"""
         try:
-            prompt = f"Summarize the following text in maximum {max_length} characters:\n\n{text}"
+            prompt = self._SUMMARIZE_TEMPLATE.format(max_length=max_length, text=text)
             
             messages = [ChatMessage.create_user_message(prompt)]
             completion_result = await self.get_completion(messages)
@@ -83,7 +187,7 @@ class AIFeaturesService(BaseVertexService):
     async def extract_keywords(self, text: str, count: int = 10) -> Result[List[str], str]:
         """Extract keywords from text"""
         try:
-            prompt = f"Extract {count} key keywords from the following text:\n\n{text}\n\nKeywords:"
+            prompt = self._KEYWORDS_TEMPLATE.format(count=count, text=text)
             
             messages = [ChatMessage.create_user_message(prompt)]
             completion_result = await self.get_completion(messages)
@@ -100,7 +204,7 @@ class AIFeaturesService(BaseVertexService):
         """Translate text to target language"""
         try:
             source_info = f" from {source_language}" if source_language else ""
-            prompt = f"Translate the following text{source_info} to {target_language}:\n\n{text}"
+            prompt = self._TRANSLATE_TEMPLATE.format(source_info=source_info, target_language=target_language, text=text)
             
             messages = [ChatMessage.create_user_message(prompt)]
             completion_result = await self.get_completion(messages)
@@ -115,7 +219,7 @@ class AIFeaturesService(BaseVertexService):
     async def analyze_sentiment(self, text: str) -> Result[Dict[str, Any], str]:
         """Analyze text sentiment"""
         try:
-            prompt = f"Analyze the sentiment of the following text and provide a score from -1 (very negative) to 1 (very positive):\n\n{text}"
+            prompt = self._SENTIMENT_TEMPLATE.format(text=text)
             
             messages = [ChatMessage.create_user_message(prompt)]
             completion_result = await self.get_completion(messages)
@@ -137,7 +241,7 @@ class AIFeaturesService(BaseVertexService):
     async def extract_entities(self, text: str) -> Result[List[Dict[str, Any]], str]:
         """Extract named entities from text"""
         try:
-            prompt = f"Extract named entities (people, places, organizations) from the following text:\n\n{text}"
+            prompt = self._ENTITIES_TEMPLATE.format(text=text)
             
             messages = [ChatMessage.create_user_message(prompt)]
             completion_result = await self.get_completion(messages)
@@ -158,3 +262,19 @@ class AIFeaturesService(BaseVertexService):
             return Result.success(entities)
         except Exception as e:
             return Result.error(f"Failed to extract entities: {str(e)}")
+    
+    async def analyze_all(self, text: str, categories: List[str], max_length: int = 100, keyword_count: int = 10) -> Dict[str, Result]:
+        """Run classification, summary, keywords, sentiment and entities concurrently"""
+        feature_names = ("classification", "summary", "keywords", "sentiment", "entities")
+        results = await asyncio.gather(
+            self.classify_text(text, categories),
+            self.summarize_text(text, max_length),
+            self.extract_keywords(text, keyword_count),
+            self.analyze_sentiment(text),
+            self.extract_entities(text),
+            return_exceptions=True
+        )
+        return {
+            name: Result.error(f"Failed to run {name}: {str(result)}") if isinstance(result, Exception) else result
+            for name, result in zip(feature_names, results)
+        }
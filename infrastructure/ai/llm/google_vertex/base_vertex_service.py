@@ -1,95 +1,334 @@
 # infrastructure/llm/google_vertex/base_vertex_service.py
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, AsyncIterator, Optional, Tuple
 import httpx
-import json
-from typing import List, AsyncIterator
 from domain.entities.chat_message import ChatMessage
 from domain.utils.result import Result
+from infrastructure.utils import json_codec
+from infrastructure.utils.http_client import build_async_client, credential_fingerprint, shared_client
+
+# Text of the first part in a generateContent body (candidates[0].content.parts[0].text): matched
+# at the first "parts" key after "candidates", and only if its first object starts with "text"
+_CANDIDATES_KEY = b'"candidates"'
+_PARTS_KEY = b'"parts"'
+_TEXT_FIELD = re.compile(rb'"parts"\s*:\s*\[\s*\{\s*"text"\s*:\s*("[^"\\]*(?:\\.[^"\\]*)*")')
+# Part kinds the anchored regex can't tell apart from a plain text part; bodies with them are fully decoded
+_NON_TEXT_PART_KEYS = (b'"functionCall"', b'"thought"', b'"executableCode"', b'"codeExecutionResult"')
+
+# Integer token counters of usageMetadata (nested promptTokensDetails entries use other names)
+_USAGE_KEY = b'"usageMetadata"'
+_USAGE_FIELD = re.compile(rb'"(promptTokenCount|candidatesTokenCount|cachedContentTokenCount|totalTokenCount)"\s*:\s*(\d+)')
+
+# Used when a caller passes no generation config
+_DEFAULT_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "maxOutputTokens": 1000
+}
+
+# Number of serialized tools/generationConfig objects kept for reuse
+_JSON_FRAGMENT_CACHE_SIZE = 64
+
+# Serialized contents arrays shared by all services, keyed by the identities of their message dicts
+_CONTENTS_CACHE_SIZE = 256
+_contents_cache: "OrderedDict[Tuple[int, ...], Tuple[List[dict], bytes]]" = OrderedDict()
+
+def _to_vertex_contents(messages: List[ChatMessage]) -> List[dict]:
+    """Google-format contents for messages; each message caches its own dict"""
+    return [msg.to_google_format() for msg in messages]
+
+def _encode_contents(google_messages: List[dict]) -> bytes:
+    """JSON for a contents array, reused when the same message dicts are sent again.
+    
+    to_google_format() returns a new dict whenever a message changes, so identical
+    dict identities imply identical content (e.g. completion followed by token count).
+    """
+    key = tuple(map(id, google_messages))
+    cached = _contents_cache.get(key)
+    # Holding the dicts keeps their ids from being reused by other objects
+    if cached is not None:
+        _contents_cache.move_to_end(key)
+        return cached[1]
+    
+    encoded = json_codec.dumps(google_messages)
+    _contents_cache[key] = (list(google_messages), encoded)
+    while len(_contents_cache) > _CONTENTS_CACHE_SIZE:
+        _contents_cache.popitem(last=False)
+    return encoded
+
+# Bytes that can change JSON nesting state: braces, quotes and escapes
+_JSON_STRUCTURE = re.compile(rb'[{}"\\]')
+
+async def _iter_json_array_objects(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield each top-level object of a streamed JSON array as soon as it is complete"""
+    buffer = bytearray()
+    pos = 0
+    start = 0
+    depth = 0
+    in_string = False
+    
+    async for chunk in chunks:
+        buffer += chunk
+        while True:
+            match = _JSON_STRUCTURE.search(buffer, pos)
+            if match is None:
+                if depth == 0:
+                    # Only separators ("[", ",", whitespace) outside any object
+                    buffer.clear()
+                    pos = 0
+                else:
+                    pos = len(buffer)
+                break
+            
+            index = match.start()
+            char = buffer[index]
+            if char == 0x5C:  # backslash escapes the next byte
+                if index + 1 >= len(buffer):
+                    pos = index
+                    break
+                pos = index + 2
+                continue
+            
+            pos = index + 1
+            if char == 0x22:  # quote
+                in_string = not in_string
+            elif in_string:
+                continue
+            elif char == 0x7B:  # {
+                if depth == 0:
+                    start = index
+                depth += 1
+            else:  # }
+                depth -= 1
+                if depth == 0:
+                    yield bytes(buffer[start:pos])
+                    del buffer[:pos]
+                    pos = 0
 
 class BaseVertexService:
     """Base Google Vertex AI service for basic completion operations"""
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
+    # Extract completion text with a targeted regex instead of decoding the whole body (opt-in)
+    fast_text_extraction = False
+    
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash", client: Optional[httpx.AsyncClient] = None):
         self.api_key = api_key
-        self.model = model
         self.base_url = "https://generativelanguage.googleapis.com/v1beta"
+        self._models_url = f"{self.base_url}/models"
+        self.model = model
+        # Services built by the facade share one injected client; standalone ones own theirs
+        self._owns_client = client is None
+        self._client = client if client is not None else self.create_client(api_key)
+        # Identical requests currently on the wire, so concurrent duplicates share one upstream call
+        self._inflight: Dict[bytes, asyncio.Future] = {}
+        # Serialized JSON of reused request objects (tools, generation config), keyed by identity
+        self._json_fragments: OrderedDict[int, Tuple[Any, bytes]] = OrderedDict()
+    
+    @staticmethod
+    def create_client(api_key: str) -> httpx.AsyncClient:
+        """Create the pooled client used for all Vertex requests"""
+        # Long-lived client so keep-alive connections (and TLS sessions) are reused across calls;
+        # HTTP/2 multiplexing and br/zstd decoding are used when h2/brotli/zstandard are installed
+        return build_async_client(headers={"X-Goog-Api-Key": api_key, "Content-Type": "application/json"})
+    
+    @staticmethod
+    def get_shared_client(api_key: str) -> httpx.AsyncClient:
+        """Process-wide client from create_client for this API key; closed by close_shared_clients()"""
+        return shared_client(("vertex", credential_fingerprint(api_key)), lambda: BaseVertexService.create_client(api_key))
+    
+    @property
+    def model(self) -> str:
+        """Active model name"""
+        return self._model
+    
+    @model.setter
+    def model(self, model_name: str):
+        # Endpoint URLs are built once per model instead of on every request
+        self._model = model_name
+        self._model_url = f"{self._models_url}/{model_name}"
+        self._generate_url = f"{self._model_url}:generateContent"
+        self._stream_url = f"{self._model_url}:streamGenerateContent"
+        self._count_tokens_url = f"{self._model_url}:countTokens"
+    
+    async def warmup(self) -> Result[Dict[str, Any], str]:
+        """Open the pooled connection ahead of the first request"""
+        try:
+            # HEAD is enough to complete DNS, TLS and HTTP/2 negotiation; the status is irrelevant
+            response = await self._client.head(self._models_url)
+            return Result.success({
+                "http_version": response.http_version,
+                "status_code": response.status_code
+            })
+        except Exception as e:
+            return Result.error(f"Failed to warm up: {str(e)}")
+    
+    async def aclose(self):
+        """Close the underlying HTTP client if this service owns it"""
+        if self._owns_client:
+            await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     async def get_completion(self, messages: List[ChatMessage], config: dict = None) -> Result[str, str]:
         """Get LLM completion"""
+        result = await self.get_completion_with_usage(messages, config)
+        return result.map(lambda completion: completion[0])
+    
+    async def get_completion_with_usage(self, messages: List[ChatMessage], config: dict = None) -> Result[Tuple[str, Dict[str, int]], str]:
+        """Get LLM completion text together with the response's usageMetadata token counts"""
         try:
-            async with httpx.AsyncClient() as client:
-                # Convert messages to Google format
-                google_messages = []
-                for msg in messages:
-                    google_messages.append({
-                        "role": msg.role.value,
-                        "parts": [{"text": msg.content}]
-                    })
-                
-                generation_config = config or {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 1000
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/models/{self.model}:generateContent",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={
-                        "contents": google_messages,
-                        "generationConfig": generation_config
-                    }
-                )
+            # Convert messages to Google format (cached per message)
+            google_messages = _to_vertex_contents(messages)
+            
+            url = self._generate_url
+            body = self._encode_body(google_messages, config or _DEFAULT_GENERATION_CONFIG)
+            
+            return await self._collapse_request(
+                hashlib.blake2b(url.encode("utf-8") + b"\0" + body, digest_size=16).digest(),
+                lambda: self._post_completion(url, body)
+            )
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    content = data["candidates"][0]["content"]["parts"][0]["text"]
-                    return Result.success(content)
-                else:
-                    return Result.error(f"API error: {response.status_code}")
-                    
         except Exception as e:
             return Result.error(f"Failed to get completion: {str(e)}")
     
-    async def stream_completion(self, messages: List[ChatMessage], config: dict = None) -> AsyncIterator[Result[str, str]]:
-        """Stream LLM completion"""
+    async def _post_completion(self, url: str, body: bytes) -> Result[Tuple[str, Dict[str, int]], str]:
+        """Send one generateContent request"""
         try:
-            async with httpx.AsyncClient() as client:
-                # Convert messages to Google format
-                google_messages = []
-                for msg in messages:
-                    google_messages.append({
-                        "role": msg.role.value,
-                        "parts": [{"text": msg.content}]
-                    })
+            response = await self._client.post(url, content=body)
+            
+            if response.status_code == 200:
+                return Result.success(self._parse_completion(response.content))
+            else:
+                return Result.error(f"API error: {response.status_code}")
                 
-                generation_config = config or {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 1000
-                }
-                
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/models/{self.model}:streamGenerateContent",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={
-                        "contents": google_messages,
-                        "generationConfig": generation_config
-                    }
-                ) as response:
-                    if response.status_code == 200:
-                        async for line in response.aiter_lines():
-                            if line.startswith("data: "):
-                                data = line[6:]  # Remove "data: " prefix
-                                if data.strip() == "[DONE]":
-                                    break
-                                try:
-                                    chunk_data = json.loads(data)
-                                    if "candidates" in chunk_data and chunk_data["candidates"]:
-                                        content = chunk_data["candidates"][0]["content"]["parts"][0]["text"]
-                                        yield Result.success(content)
-                                except json.JSONDecodeError:
-                                    continue
-                    else:
-                        yield Result.error(f"API error: {response.status_code}")
-                        
+        except Exception as e:
+            return Result.error(f"Failed to get completion: {str(e)}")
+    
+    def _encode_body(self, google_messages: List[dict], generation_config: dict, tools: Optional[List[Dict[str, Any]]] = None) -> bytes:
+        """Serialize a generateContent body, splicing in cached JSON for reused config and tool objects.
+        
+        System messages go to systemInstruction at the front of the request, which keeps the
+        stable prompt prefix that Vertex's implicit context caching matches on.
+        """
+        parts = []
+        system_parts = [part for message in google_messages if message["role"] == "system" for part in message["parts"]]
+        if system_parts:
+            google_messages = [message for message in google_messages if message["role"] != "system"]
+            parts += (b'{"systemInstruction":', json_codec.dumps({"parts": system_parts}), b',"contents":')
+        else:
+            parts.append(b'{"contents":')
+        parts.append(_encode_contents(google_messages))
+        if tools is not None:
+            parts += (b',"tools":', self._json_fragment(tools))
+        parts += (b',"generationConfig":', self._json_fragment(generation_config), b'}')
+        return b"".join(parts)
+    
+    def _json_fragment(self, obj: Any) -> bytes:
+        """Serialized JSON for obj, reused while the same object is passed again.
+        
+        Tool schemas and generation configs are treated as read-only once sent.
+        """
+        key = id(obj)
+        cached = self._json_fragments.get(key)
+        # Holding a reference keeps the id from being reused by another object
+        if cached is not None and cached[0] is obj:
+            self._json_fragments.move_to_end(key)
+            return cached[1]
+        
+        encoded = json_codec.dumps(obj)
+        self._json_fragments[key] = (obj, encoded)
+        while len(self._json_fragments) > _JSON_FRAGMENT_CACHE_SIZE:
+            self._json_fragments.popitem(last=False)
+        return encoded
+    
+    async def _collapse_request(self, key: bytes, request: Callable[[], Awaitable[Result]]) -> Result:
+        """Run request once per key; concurrent callers with the same key await the same result"""
+        future = self._inflight.get(key)
+        if future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The leading caller was cancelled; issue our own request instead
+                return await request()
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await request()
+            future.set_result(result)
+            return result
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self._inflight[key]
+    
+    async def stream_completion(self, messages: List[ChatMessage], config: dict = None, usage: Optional[Dict[str, int]] = None) -> AsyncIterator[Result[str, str]]:
+        """Stream LLM completion; if a usage dict is passed it is filled with the stream's usageMetadata counts"""
+        try:
+            # Convert messages to Google format (cached per message)
+            google_messages = _to_vertex_contents(messages)
+            
+            async with self._client.stream(
+                "POST",
+                self._stream_url,
+                content=self._encode_body(google_messages, config or _DEFAULT_GENERATION_CONFIG)
+            ) as response:
+                if response.status_code == 200:
+                    # The endpoint streams a JSON array of GenerateContentResponse objects
+                    async for raw_object in _iter_json_array_objects(response.aiter_bytes()):
+                        try:
+                            chunk_data = json_codec.loads(raw_object)
+                        except ValueError:
+                            continue
+                        # Every chunk carries cumulative usage, so the last one holds the totals
+                        usage_metadata = chunk_data.get("usageMetadata")
+                        if usage is not None and usage_metadata:
+                            usage.update((name, value) for name, value in usage_metadata.items() if isinstance(value, int))
+                        candidates = chunk_data.get("candidates")
+                        if candidates:
+                            parts = candidates[0].get("content", {}).get("parts") or [{}]
+                            content = parts[0].get("text")
+                            if content:
+                                yield Result.success(content)
+                else:
+                    yield Result.error(f"API error: {response.status_code}")
+                    
         except Exception as e:
             yield Result.error(f"Failed to stream completion: {str(e)}")
+    
+    def _parse_completion(self, body: bytes) -> Tuple[str, Dict[str, int]]:
+        """Get candidates[0].content.parts[0].text and usage counts, via regex fast path when the envelope allows"""
+        if self.fast_text_extraction and not any(key in body for key in _NON_TEXT_PART_KEYS):
+            candidates_at = body.find(_CANDIDATES_KEY)
+            parts_at = body.find(_PARTS_KEY, candidates_at) if candidates_at != -1 else -1
+            if parts_at != -1:
+                match = _TEXT_FIELD.match(body, parts_at)
+                if match:
+                    try:
+                        text = json_codec.loads(match.group(1))
+                    except ValueError:
+                        text = None
+                    if text is not None:
+                        # usageMetadata follows candidates, so its last occurrence is the real key
+                        usage_at = body.rfind(_USAGE_KEY)
+                        usage = {}
+                        if usage_at > match.end():
+                            usage = {
+                                name.decode("ascii"): int(value)
+                                for name, value in _USAGE_FIELD.findall(body, usage_at)
+                            }
+                        return text, usage
+        
+        data = json_codec.loads(body)
+        usage_metadata = data.get("usageMetadata") or {}
+        usage = {name: value for name, value in usage_metadata.items() if isinstance(value, int)}
+        return data["candidates"][0]["content"]["parts"][0]["text"], usage
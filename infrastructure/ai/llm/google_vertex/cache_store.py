@@ -0,0 +1,127 @@
+# infrastructure/llm/google_vertex/cache_store.py
+import os
+import sqlite3
+import threading
+from typing import Any, List, Optional, Tuple
+import numpy as np
+from infrastructure.utils import json_codec
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS responses (
+        cache_key TEXT PRIMARY KEY,
+        response BLOB NOT NULL,
+        timestamp REAL NOT NULL,
+        scope TEXT NOT NULL DEFAULT ''
+    )""",
+    """CREATE TABLE IF NOT EXISTS semantic_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        namespace TEXT NOT NULL,
+        codes BLOB NOT NULL,
+        scale REAL NOT NULL,
+        response BLOB NOT NULL,
+        timestamp REAL NOT NULL,
+        scope TEXT NOT NULL DEFAULT ''
+    )"""
+)
+# Files written before rows were scoped get the column added (existing rows land in the '' scope)
+_SCOPED_TABLES = ("responses", "semantic_entries")
+_INDEXES = (
+    "DROP INDEX IF EXISTS semantic_entries_timestamp",
+    "CREATE INDEX IF NOT EXISTS semantic_entries_scope_timestamp ON semantic_entries (scope, timestamp)",
+    "CREATE INDEX IF NOT EXISTS responses_scope_timestamp ON responses (scope, timestamp)"
+)
+
+class SqliteCacheStore:
+    """Disk-backed response store shared by every process that opens the same file.
+    
+    WAL mode lets readers in other workers proceed while one writes, and mmap_size
+    makes SQLite read pages straight from the OS page cache. Each store only sees,
+    prunes and clears the rows of its own scope (e.g. one model and API key), so
+    caches sharing a file don't interfere. Calls are serialized by a lock, so the
+    store can be used from worker threads.
+    """
+    
+    def __init__(self, path: str, scope: str = "", mmap_size: int = 256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._scope = scope
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        for table in _SCOPED_TABLES:
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if "scope" not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN scope TEXT NOT NULL DEFAULT ''")
+        for statement in _INDEXES:
+            self._conn.execute(statement)
+    
+    def get_response(self, cache_key: str) -> Optional[Tuple[Any, float]]:
+        """Return (response, timestamp) for a key, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, timestamp FROM responses WHERE cache_key = ? AND scope = ?", (cache_key, self._scope)
+            ).fetchone()
+        if row is None:
+            return None
+        return json_codec.loads(row[0]), row[1]
+    
+    def put_response(self, cache_key: str, response: Any, timestamp: float):
+        """Insert or replace a response"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, response, timestamp, scope) VALUES (?, ?, ?, ?)",
+                (cache_key, json_codec.dumps(response), timestamp, self._scope)
+            )
+    
+    def delete_response(self, cache_key: str):
+        """Remove a response"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE cache_key = ? AND scope = ?", (cache_key, self._scope))
+    
+    def put_semantic_entry(self, namespace: str, codes: np.ndarray, scale: float, response: Any, timestamp: float):
+        """Append an int8-quantized query embedding with its response"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO semantic_entries (namespace, codes, scale, response, timestamp, scope) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, codes.tobytes(), scale, json_codec.dumps(response), timestamp, self._scope)
+            )
+    
+    def load_semantic_entries(self, limit: int, min_timestamp: float) -> List[Tuple[str, np.ndarray, float, Any, float]]:
+        """Most recent (namespace, codes, scale, response, timestamp) entries, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, codes, scale, response, timestamp FROM semantic_entries "
+                "WHERE scope = ? AND timestamp >= ? ORDER BY timestamp DESC LIMIT ?",
+                (self._scope, min_timestamp, limit)
+            ).fetchall()
+        return [
+            (namespace, np.frombuffer(codes, dtype=np.int8), scale, json_codec.loads(response), timestamp)
+            for namespace, codes, scale, response, timestamp in reversed(rows)
+        ]
+    
+    def prune(self, min_timestamp: float, max_semantic_entries: int):
+        """Drop this scope's expired rows and all but its newest semantic entries"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE scope = ? AND timestamp < ?", (self._scope, min_timestamp))
+            self._conn.execute("DELETE FROM semantic_entries WHERE scope = ? AND timestamp < ?", (self._scope, min_timestamp))
+            self._conn.execute(
+                "DELETE FROM semantic_entries WHERE scope = ? AND id NOT IN "
+                "(SELECT id FROM semantic_entries WHERE scope = ? ORDER BY timestamp DESC LIMIT ?)",
+                (self._scope, self._scope, max_semantic_entries)
+            )
+    
+    def clear(self):
+        """Remove all entries of this scope"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE scope = ?", (self._scope,))
+            self._conn.execute("DELETE FROM semantic_entries WHERE scope = ?", (self._scope,))
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
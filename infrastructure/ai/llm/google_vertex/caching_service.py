@@ -1,17 +1,68 @@
 # infrastructure/llm/google_vertex/caching_service.py
+import asyncio
+import hashlib
+import sqlite3
 import time
-from typing import Dict, Any
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from domain.utils.result import Result
+from infrastructure.utils import json_codec
+from infrastructure.utils.vector_ops import cosine_topk_int8, quantize_int8, warm_up_kernels
+from .cache_store import SqliteCacheStore
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Number of nearest cached entries checked for a namespace/TTL match
+_SEMANTIC_CANDIDATES = 8
 
 class CachingService:
-    """Service for managing response caching"""
+    """Service for managing response caching (called on every request).
+    
+    With persist_path set, entries are written through to a SQLite file so they
+    survive restarts and are shared by all worker processes using the same path;
+    rows are scoped by key_scope. Methods that touch the file are async and run the
+    SQLite calls in a worker thread, so disk I/O never blocks the event loop.
+    """
     
-    def __init__(self):
+    def __init__(self, persist_path: Optional[str] = None, key_scope: Optional[str] = None):
         self._cache_enabled = False
+        # Mixed into every cache key, so tenants sharing a persist_path file never hit each other's entries
+        self._key_scope = key_scope
         self._cache = {}
         self._cache_ttl = 3600  # 1 hour default
+        # Semantic (embedding-similarity) layer behind the exact-match cache
+        self._semantic_enabled = False
+        self._semantic_threshold = 0.92
+        # Sampled completions vary run to run; above this temperature a paraphrase hit is not a valid answer
+        self._semantic_max_temperature = 0.0
+        self._semantic_max_entries = 1000
+        self._semantic_entries: OrderedDict = OrderedDict()
+        self._semantic_next_id = 0
+        # Normalized query embeddings stored as int8 codes + per-row scale (4x smaller than float32)
+        self._semantic_matrix: Optional[np.ndarray] = None
+        self._semantic_scales: Optional[np.ndarray] = None
+        self._semantic_ids: List[int] = []
+        self._store = SqliteCacheStore(persist_path, key_scope or "") if persist_path else None
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether response caching is on"""
+        return self._cache_enabled
+    
+    @property
+    def semantic_enabled(self) -> bool:
+        """Whether semantic lookups should be attempted"""
+        return self._cache_enabled and self._semantic_enabled
     
-    async def enable_caching(self, enabled: bool = True) -> Result[None, str]:
+    def semantic_applies(self, temperature: float) -> bool:
+        """Whether semantic caching should be used for a request with this sampling temperature"""
+        return self.semantic_enabled and temperature <= self._semantic_max_temperature
+    
+    def enable_caching(self, enabled: bool = True) -> Result[None, str]:
         """Enable/disable response caching"""
         try:
             self._cache_enabled = enabled
@@ -19,28 +70,47 @@ class CachingService:
         except Exception as e:
             return Result.error(f"Failed to enable caching: {str(e)}")
     
+    def enable_semantic_caching(self, enabled: bool = True, threshold: float = 0.92, max_temperature: float = 0.0) -> Result[None, str]:
+        """Enable/disable the embedding-similarity cache layer for requests up to max_temperature"""
+        try:
+            self._semantic_enabled = enabled
+            self._semantic_threshold = threshold
+            self._semantic_max_temperature = max_temperature
+            return Result.success(None)
+        except Exception as e:
+            return Result.error(f"Failed to enable semantic caching: {str(e)}")
+    
     async def clear_cache(self) -> Result[None, str]:
-        """Clear response cache"""
+        """Clear response cache (only this scope's rows of a shared persist file)"""
         try:
             self._cache.clear()
+            self._semantic_entries.clear()
+            self._semantic_matrix = None
+            if self._store is not None:
+                await asyncio.to_thread(self._store.clear)
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to clear cache: {str(e)}")
     
-    async def get_cache_stats(self) -> Result[Dict[str, Any], str]:
+    def get_cache_stats(self) -> Result[Dict[str, Any], str]:
         """Get cache statistics"""
         try:
             stats = {
                 "enabled": self._cache_enabled,
                 "size": len(self._cache),
                 "hit_rate": 0.0,  # Would need to track hits/misses
-                "ttl_seconds": self._cache_ttl
+                "ttl_seconds": self._cache_ttl,
+                "semantic_enabled": self._semantic_enabled,
+                "semantic_size": len(self._semantic_entries),
+                "semantic_threshold": self._semantic_threshold,
+                "semantic_max_temperature": self._semantic_max_temperature,
+                "persistent": self._store is not None
             }
             return Result.success(stats)
         except Exception as e:
             return Result.error(f"Failed to get cache stats: {str(e)}")
     
-    async def set_cache_ttl(self, ttl_seconds: int) -> Result[None, str]:
+    def set_cache_ttl(self, ttl_seconds: int) -> Result[None, str]:
         """Set cache time-to-live"""
         try:
             self._cache_ttl = ttl_seconds
@@ -48,7 +118,7 @@ class CachingService:
         except Exception as e:
             return Result.error(f"Failed to set cache TTL: {str(e)}")
     
-    def get_cached_response(self, cache_key: str) -> Any:
+    async def get_cached_response(self, cache_key: str) -> Any:
         """Get cached response if available and not expired"""
         if not self._cache_enabled:
             return None
@@ -61,24 +131,152 @@ class CachingService:
                 # Expired, remove from cache
                 del self._cache[cache_key]
         
+        if self._store is not None:
+            persisted = await asyncio.to_thread(self._get_persisted_response, cache_key)
+            if persisted is not None:
+                # Promote to memory on the event loop, not in the worker thread
+                response, timestamp = persisted
+                self._cache[cache_key] = {"response": response, "timestamp": timestamp}
+                return response
+        
         return None
     
-    def cache_response(self, cache_key: str, response: Any):
+    async def cache_response(self, cache_key: str, response: Any):
         """Cache response with timestamp"""
         if self._cache_enabled:
+            timestamp = time.time()
             self._cache[cache_key] = {
                 "response": response,
-                "timestamp": time.time()
+                "timestamp": timestamp
             }
+            if self._store is not None:
+                try:
+                    await asyncio.to_thread(self._store.put_response, cache_key, response, timestamp)
+                except (sqlite3.Error, TypeError):
+                    pass  # Persistence is best effort; the in-memory entry still serves hits
+    
+    def _get_persisted_response(self, cache_key: str) -> Optional[Tuple[Any, float]]:
+        """(response, timestamp) written by this or another process, or None if absent or expired (runs in a worker thread)"""
+        try:
+            persisted = self._store.get_response(cache_key)
+            if persisted is None:
+                return None
+            if time.time() - persisted[1] >= self._cache_ttl:
+                self._store.delete_response(cache_key)
+                return None
+            return persisted
+        except (sqlite3.Error, ValueError):
+            return None
+    
+    async def load_persisted_entries(self) -> Result[int, str]:
+        """Prune the persistent store and pre-load its recent semantic entries into memory"""
+        try:
+            if self._store is None:
+                return Result.success(0)
+            
+            entries = await asyncio.to_thread(self._load_recent_semantic_entries, time.time() - self._cache_ttl)
+            for namespace, codes, scale, response, timestamp in entries:
+                self._add_semantic_entry(codes, scale, namespace, response, timestamp)
+            return Result.success(len(entries))
+        except Exception as e:
+            return Result.error(f"Failed to load persisted cache: {str(e)}")
+    
+    def _load_recent_semantic_entries(self, min_timestamp: float) -> list:
+        """Prune, then read the newest unexpired semantic entries (runs in a worker thread)"""
+        self._store.prune(min_timestamp, self._semantic_max_entries)
+        return self._store.load_semantic_entries(self._semantic_max_entries, min_timestamp)
+    
+    def warm_up_similarity_kernels(self) -> Result[None, str]:
+        """Load the semantic-cache scoring kernel so the first lookup doesn't pay for it"""
+        try:
+            warm_up_kernels()
+            return Result.success(None)
+        except Exception as e:
+            return Result.error(f"Failed to warm up similarity kernels: {str(e)}")
+    
+    def get_semantic_response(self, embedding: List[float], namespace: str) -> Any:
+        """Get cached response whose query embedding is most similar, above threshold"""
+        if not self.semantic_enabled or not self._semantic_entries:
+            return None
+        
+        if self._semantic_matrix is None or self._semantic_matrix.shape[1] != len(embedding):
+            self._rebuild_semantic_matrix(len(embedding))
+        if not self._semantic_ids:
+            return None
+        
+        # One matrix-vector product scores every cached entry; walk the best few
+        rows, scores = cosine_topk_int8(embedding, self._semantic_matrix, self._semantic_scales, _SEMANTIC_CANDIDATES)
+        for row, score in zip(rows, scores):
+            if score < self._semantic_threshold:
+                break
+            entry_id = self._semantic_ids[row]
+            entry = self._semantic_entries.get(entry_id)
+            if entry is None or entry["namespace"] != namespace:
+                continue
+            if time.time() - entry["timestamp"] >= self._cache_ttl:
+                del self._semantic_entries[entry_id]
+                self._semantic_matrix = None
+                continue
+            self._semantic_entries.move_to_end(entry_id)
+            return entry["response"]
+        
+        return None
+    
+    async def cache_semantic_response(self, embedding: List[float], namespace: str, response: Any):
+        """Cache response under its normalized query embedding"""
+        if not self.semantic_enabled:
+            return
+        
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return
+        codes, scale = quantize_int8(vector / norm)
+        timestamp = time.time()
+        self._add_semantic_entry(codes, scale, namespace, response, timestamp)
+        if self._store is not None:
+            try:
+                await asyncio.to_thread(self._store.put_semantic_entry, namespace, codes, scale, response, timestamp)
+            except (sqlite3.Error, TypeError):
+                pass  # Persistence is best effort; the in-memory entry still serves hits
+    
+    def _add_semantic_entry(self, codes: np.ndarray, scale: float, namespace: str, response: Any, timestamp: float):
+        """Insert a quantized entry into the in-memory semantic layer, evicting LRU overflow"""
+        self._semantic_entries[self._semantic_next_id] = {
+            "codes": codes,
+            "scale": scale,
+            "namespace": namespace,
+            "response": response,
+            "timestamp": timestamp
+        }
+        self._semantic_next_id += 1
+        while len(self._semantic_entries) > self._semantic_max_entries:
+            self._semantic_entries.popitem(last=False)
+        self._semantic_matrix = None
+    
+    def _rebuild_semantic_matrix(self, dim: int):
+        """Stack the cached int8 codes of dimension dim into one contiguous (N, D) matrix with a scale vector.
+        
+        Entries of another dimension (e.g. persisted by a different embedding model) are left out.
+        """
+        matching = [(entry_id, entry) for entry_id, entry in self._semantic_entries.items() if entry["codes"].shape == (dim,)]
+        self._semantic_ids = [entry_id for entry_id, _ in matching]
+        if matching:
+            self._semantic_matrix = np.stack([entry["codes"] for _, entry in matching])
+        else:
+            self._semantic_matrix = np.empty((0, dim), dtype=np.int8)
+        self._semantic_scales = np.fromiter((entry["scale"] for _, entry in matching), dtype=np.float32, count=len(matching))
     
     def generate_cache_key(self, messages: list, config: dict = None) -> str:
         """Generate cache key from messages and config"""
-        import hashlib
-        import json
-        
         key_data = {
             "messages": messages,
             "config": config or {}
         }
-        key_string = json.dumps(key_data, sort_keys=True)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        if self._key_scope is not None:
+            key_data["scope"] = self._key_scope
+        key_bytes = json_codec.dumps(key_data, sort_keys=True)
+        # Non-cryptographic 128-bit digest; BLAKE2b when xxhash is not installed
+        if xxhash is not None:
+            return xxhash.xxh3_128_hexdigest(key_bytes)
+        return hashlib.blake2b(key_bytes, digest_size=16).hexdigest()
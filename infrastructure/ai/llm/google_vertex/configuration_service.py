@@ -11,6 +11,8 @@ class ConfigurationService:
             "max_tokens": 1000,
             "top_p": 0.9
         }
+        # Shared generation config; rebuilt after any change so request bodies can reuse its JSON
+        self._generation_config = None
     
     async def get_configuration(self) -> Result[Dict[str, Any], str]:
         """Get current configuration"""
@@ -23,6 +25,7 @@ class ConfigurationService:
         """Update configuration"""
         try:
             self._configuration.update(config)
+            self._generation_config = None
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to update configuration: {str(e)}")
@@ -35,6 +38,7 @@ class ConfigurationService:
                 "max_tokens": 1000,
                 "top_p": 0.9
             }
+            self._generation_config = None
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to reset configuration: {str(e)}")
@@ -43,6 +47,7 @@ class ConfigurationService:
         """Set temperature parameter"""
         try:
             self._configuration["temperature"] = temperature
+            self._generation_config = None
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to set temperature: {str(e)}")
@@ -51,6 +56,7 @@ class ConfigurationService:
         """Set max tokens parameter"""
         try:
             self._configuration["max_tokens"] = max_tokens
+            self._generation_config = None
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to set max tokens: {str(e)}")
@@ -59,14 +65,17 @@ class ConfigurationService:
         """Set top_p parameter"""
         try:
             self._configuration["top_p"] = top_p
+            self._generation_config = None
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to set top_p: {str(e)}")
     
     def get_generation_config(self) -> Dict[str, Any]:
-        """Get generation config for API calls"""
-        return {
-            "temperature": self._configuration["temperature"],
-            "maxOutputTokens": self._configuration["max_tokens"],
-            "topP": self._configuration["top_p"]
-        }
+        """Get generation config for API calls (shared object; treat as read-only)"""
+        if self._generation_config is None:
+            self._generation_config = {
+                "temperature": self._configuration["temperature"],
+                "maxOutputTokens": self._configuration["max_tokens"],
+                "topP": self._configuration["top_p"]
+            }
+        return self._generation_config
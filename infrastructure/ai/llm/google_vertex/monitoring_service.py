@@ -1,44 +1,51 @@
 # infrastructure/llm/google_vertex/monitoring_service.py
-import httpx
 import time
-from typing import List, Dict, Any
+from collections import deque
+from itertools import islice
+from typing import List, Dict, Any, Optional
+import httpx
 from domain.utils.result import Result
 from .base_vertex_service import BaseVertexService
 
+# Maximum number of errors kept in memory
+_ERROR_HISTORY_SIZE = 1024
+
 class MonitoringService(BaseVertexService):
     """Google Vertex AI service for monitoring and health checks"""
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
-        super().__init__(api_key, model)
-        self._error_history = []
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash", client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, model, client)
+        self._error_history = deque(maxlen=_ERROR_HISTORY_SIZE)
+        # Response cache lookups per layer: [hits, misses]
+        self._cache_lookups = {"exact": [0, 0], "semantic": [0, 0]}
     
     async def health_check(self) -> Result[Dict[str, Any], str]:
         """Check service health"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    f"{self.base_url}/models",
-                    headers={"X-Goog-Api-Key": self.api_key}
-                )
-                
-                health_data = {
-                    "status": "healthy" if response.status_code == 200 else "unhealthy",
-                    "api_status": response.status_code,
-                    "model": self.model,
-                    "timestamp": time.time()
-                }
-                
-                return Result.success(health_data)
+            response = await self._client.get(self._models_url)
+            
+            health_data = {
+                "status": "healthy" if response.status_code == 200 else "unhealthy",
+                "api_status": response.status_code,
+                "model": self.model,
+                "timestamp": time.time()
+            }
+            
+            return Result.success(health_data)
         except Exception as e:
             return Result.error(f"Health check failed: {str(e)}")
     
     async def get_error_history(self) -> Result[List[Dict[str, Any]], str]:
         """Get error history"""
         try:
-            return Result.success(self._error_history.copy())
+            return Result.success(list(self._error_history))
         except Exception as e:
             return Result.error(f"Failed to get error history: {str(e)}")
     
+    def get_recent_errors(self, count: int = 10) -> List[Dict[str, Any]]:
+        """Get the most recent errors, newest first, without copying the whole history"""
+        return list(islice(reversed(self._error_history), max(0, count)))
+    
     async def clear_error_history(self) -> Result[None, str]:
         """Clear error history"""
         try:
@@ -53,13 +60,27 @@ class MonitoringService(BaseVertexService):
             metrics = {
                 "total_requests": 0,  # Would be injected from usage stats
                 "average_response_time": 0.5,  # Placeholder
-                "cache_hit_rate": 0.0,
+                "cache_hit_rate": self._cache_hit_rate(),
+                "semantic_cache_hit_rate": self._layer_hit_rate("semantic"),
                 "error_rate": len(self._error_history) / max(1, 1)  # Would use actual request count
             }
             return Result.success(metrics)
         except Exception as e:
             return Result.error(f"Failed to get performance metrics: {str(e)}")
     
+    def record_cache_lookup(self, layer: str, hit: bool):
+        """Count a response cache lookup ("exact" or "semantic")"""
+        self._cache_lookups[layer][0 if hit else 1] += 1
+    
+    def _layer_hit_rate(self, layer: str) -> float:
+        hits, misses = self._cache_lookups[layer]
+        return hits / max(1, hits + misses)
+    
+    def _cache_hit_rate(self) -> float:
+        # Every request does one exact lookup; semantic hits are a subset of its misses
+        exact_hits, exact_misses = self._cache_lookups["exact"]
+        return (exact_hits + self._cache_lookups["semantic"][0]) / max(1, exact_hits + exact_misses)
+    
     def log_error(self, error: str, context: Dict[str, Any] = None):
         """Log error to history"""
         error_entry = {
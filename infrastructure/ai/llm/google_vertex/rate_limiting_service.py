@@ -3,59 +3,77 @@ import time
 from typing import Dict, Any
 from domain.utils.result import Result
 
+# One-second buckets covering the one-minute rate-limit window
+_WINDOW_SECONDS = 60
+
 class RateLimitingService:
-    """Service for managing rate limiting and quotas"""
+    """Service for managing rate limiting and quotas (synchronous: no I/O, called on every request)"""
     
     def __init__(self):
         self._requests_per_minute = 60
         self._tokens_per_minute = 10000
         self._daily_limit = 1000
-        self._request_times = []
-        self._token_usage = []
+        # Ring of per-second (tokens, requests) buckets with running totals over the window
+        self._bucket_tokens = [0] * _WINDOW_SECONDS
+        self._bucket_requests = [0] * _WINDOW_SECONDS
+        self._window_tokens = 0
+        self._window_requests = 0
+        self._current_second = int(time.monotonic())
         self._daily_usage = 0
         self._last_reset = time.time()
     
-    async def get_rate_limit_info(self) -> Result[Dict[str, Any], str]:
+    def _advance(self, second: int):
+        """Move the window to the given second, clearing buckets that fell out of it"""
+        last = self._current_second
+        if second <= last:
+            return
+        if second - last >= _WINDOW_SECONDS:
+            self._bucket_tokens = [0] * _WINDOW_SECONDS
+            self._bucket_requests = [0] * _WINDOW_SECONDS
+            self._window_tokens = 0
+            self._window_requests = 0
+        else:
+            for elapsed in range(last + 1, second + 1):
+                bucket = elapsed % _WINDOW_SECONDS
+                self._window_tokens -= self._bucket_tokens[bucket]
+                self._window_requests -= self._bucket_requests[bucket]
+                self._bucket_tokens[bucket] = 0
+                self._bucket_requests[bucket] = 0
+        self._current_second = second
+    
+    def get_rate_limit_info(self) -> Result[Dict[str, Any], str]:
         """Get rate limit information"""
         try:
-            current_time = time.time()
-            # Clean old request times (older than 1 minute)
-            self._request_times = [t for t in self._request_times if current_time - t < 60]
+            self._advance(int(time.monotonic()))
+            current_requests = self._window_requests
             
             rate_info = {
                 "requests_per_minute": self._requests_per_minute,
                 "tokens_per_minute": self._tokens_per_minute,
-                "current_requests": len(self._request_times),
-                "current_tokens": sum(self._token_usage[-60:]) if len(self._token_usage) > 60 else sum(self._token_usage),
-                "remaining_requests": max(0, self._requests_per_minute - len(self._request_times)),
-                "remaining_tokens": max(0, self._tokens_per_minute - (sum(self._token_usage[-60:]) if len(self._token_usage) > 60 else sum(self._token_usage)))
+                "current_requests": current_requests,
+                "current_tokens": self._window_tokens,
+                "remaining_requests": max(0, self._requests_per_minute - current_requests),
+                "remaining_tokens": max(0, self._tokens_per_minute - self._window_tokens)
             }
             return Result.success(rate_info)
         except Exception as e:
             return Result.error(f"Failed to get rate limit info: {str(e)}")
     
-    async def check_rate_limit(self) -> Result[bool, str]:
+    def check_rate_limit(self) -> Result[bool, str]:
         """Check if rate limit allows request"""
         try:
-            current_time = time.time()
-            
-            # Clean old request times
-            self._request_times = [t for t in self._request_times if current_time - t < 60]
-            
-            # Check requests per minute
-            if len(self._request_times) >= self._requests_per_minute:
-                return Result.success(False)
-            
-            # Check tokens per minute
-            recent_tokens = sum(self._token_usage[-60:]) if len(self._token_usage) > 60 else sum(self._token_usage)
-            if recent_tokens >= self._tokens_per_minute:
-                return Result.success(False)
+            self._advance(int(time.monotonic()))
             
-            return Result.success(True)
+            # Check requests and tokens per minute
+            allowed = (
+                self._window_requests < self._requests_per_minute
+                and self._window_tokens < self._tokens_per_minute
+            )
+            return Result.success(allowed)
         except Exception as e:
             return Result.error(f"Failed to check rate limit: {str(e)}")
     
-    async def get_quota_info(self) -> Result[Dict[str, Any], str]:
+    def get_quota_info(self) -> Result[Dict[str, Any], str]:
         """Get quota information"""
         try:
             current_time = time.time()
@@ -77,11 +95,11 @@ class RateLimitingService:
     
     def record_request(self, tokens: int = 0):
         """Record a request and token usage"""
-        current_time = time.time()
-        self._request_times.append(current_time)
-        self._token_usage.append(tokens)
+        second = int(time.monotonic())
+        self._advance(second)
+        bucket = second % _WINDOW_SECONDS
+        self._bucket_tokens[bucket] += tokens
+        self._bucket_requests[bucket] += 1
+        self._window_tokens += tokens
+        self._window_requests += 1
         self._daily_usage += 1
-        
-        # Clean old data
-        self._request_times = [t for t in self._request_times if current_time - t < 60]
-        self._token_usage = self._token_usage[-60:]  # Keep only last 60 entries
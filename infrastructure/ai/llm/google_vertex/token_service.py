@@ -1,107 +1,125 @@
 # infrastructure/llm/google_vertex/token_service.py
-import httpx
+import hashlib
 import time
-from typing import List, Dict, Any
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import List, Dict, Any, Optional
+import httpx
 from domain.entities.chat_message import ChatMessage
 from domain.utils.result import Result
-from .base_vertex_service import BaseVertexService
+from infrastructure.utils import json_codec
+from .base_vertex_service import BaseVertexService, _encode_contents, _to_vertex_contents
+
+# Maximum number of token counts kept in the in-process LRU cache
+_TOKEN_CACHE_SIZE = 4096
+# Rough cost estimation (this would need actual pricing data)
+_COST_PER_TOKEN = 0.00001
+
+@dataclass(slots=True)
+class UsageStats:
+    """Accumulated API usage"""
+    total_requests: int = 0
+    total_tokens: int = 0
+    total_cost: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # Prompt tokens served from Vertex context caching (billed at a discount)
+    cached_tokens: int = 0
 
 class TokenService(BaseVertexService):
     """Google Vertex AI service for token management operations"""
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
-        super().__init__(api_key, model)
-        self._usage_stats = {
-            "total_requests": 0,
-            "total_tokens": 0,
-            "total_cost": 0.0
-        }
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash", client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, model, client)
+        self._usage_stats = UsageStats()
+        self._token_cache: OrderedDict[bytes, int] = OrderedDict()
     
     async def count_tokens(self, text: str) -> Result[int, str]:
         """Count tokens in text"""
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/models/{self.model}:countTokens",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={"contents": [{"parts": [{"text": text}]}]}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return Result.success(data.get("totalTokens", 0))
-                else:
-                    return Result.error(f"API error: {response.status_code}")
+            return await self._count_tokens_for_body(
+                json_codec.dumps({"contents": [{"parts": [{"text": text}]}]})
+            )
         except Exception as e:
             return Result.error(f"Failed to count tokens: {str(e)}")
     
     async def count_tokens_in_messages(self, messages: List[ChatMessage]) -> Result[int, str]:
         """Count tokens in messages"""
         try:
-            google_messages = []
-            for msg in messages:
-                google_messages.append({
-                    "role": msg.role.value,
-                    "parts": [{"text": msg.content}]
-                })
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.base_url}/models/{self.model}:countTokens",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={"contents": google_messages}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return Result.success(data.get("totalTokens", 0))
-                else:
-                    return Result.error(f"API error: {response.status_code}")
+            # Serialized contents are shared with the completion request for the same messages
+            contents = _encode_contents(_to_vertex_contents(messages))
+            return await self._count_tokens_for_body(b'{"contents":' + contents + b'}')
         except Exception as e:
             return Result.error(f"Failed to count tokens in messages: {str(e)}")
     
-    async def estimate_cost(self, messages: List[ChatMessage]) -> Result[Dict[str, Any], str]:
-        """Estimate API cost for messages"""
+    async def _count_tokens_for_body(self, body: bytes) -> Result[int, str]:
+        """POST a countTokens body, answering repeats for the same model from the local cache"""
+        # Counts are deterministic per model, so the serialized request identifies the answer
+        key = hashlib.blake2b(self.model.encode("utf-8") + b"\0" + body, digest_size=16).digest()
+        cached = self._token_cache.get(key)
+        if cached is not None:
+            self._token_cache.move_to_end(key)
+            return Result.success(cached)
+        
+        response = await self._client.post(self._count_tokens_url, content=body)
+        
+        if response.status_code == 200:
+            data = json_codec.loads(response.content)
+            total_tokens = data.get("totalTokens", 0)
+            self._token_cache[key] = total_tokens
+            while len(self._token_cache) > _TOKEN_CACHE_SIZE:
+                self._token_cache.popitem(last=False)
+            return Result.success(total_tokens)
+        else:
+            return Result.error(f"API error: {response.status_code}")
+    
+    def clear_tokenizer_cache(self) -> Result[None, str]:
+        """Drop all cached token counts"""
         try:
-            token_count_result = await self.count_tokens_in_messages(messages)
-            if token_count_result.is_error:
-                return token_count_result
-            
-            # Rough cost estimation (this would need actual pricing data)
-            estimated_cost = token_count_result.value * 0.00001  # $0.00001 per token
-            
-            cost_info = {
-                "estimated_tokens": token_count_result.value,
-                "estimated_cost_usd": estimated_cost,
-                "model": self.model,
-                "timestamp": time.time()
-            }
-            
-            return Result.success(cost_info)
+            self._token_cache.clear()
+            return Result.success(None)
         except Exception as e:
-            return Result.error(f"Failed to estimate cost: {str(e)}")
+            return Result.error(f"Failed to clear tokenizer cache: {str(e)}")
+    
+    async def estimate_cost(self, messages: List[ChatMessage]) -> Result[Dict[str, Any], str]:
+        """Estimate API cost for messages"""
+        token_count_result = await self.count_tokens_in_messages(messages)
+        return token_count_result.map(self.estimate_cost_from_count)
+    
+    def estimate_cost_from_count(self, tokens: int) -> Dict[str, Any]:
+        """Estimate API cost for an already known token count (e.g. from usageMetadata)"""
+        return {
+            "estimated_tokens": tokens,
+            "estimated_cost_usd": tokens * _COST_PER_TOKEN,
+            "model": self.model,
+            "timestamp": time.time()
+        }
     
     async def get_usage_stats(self) -> Result[Dict[str, Any], str]:
         """Get usage statistics"""
         try:
-            return Result.success(self._usage_stats.copy())
+            return Result.success(asdict(self._usage_stats))
         except Exception as e:
             return Result.error(f"Failed to get usage stats: {str(e)}")
     
     async def reset_usage_stats(self) -> Result[None, str]:
         """Reset usage statistics"""
         try:
-            self._usage_stats = {
-                "total_requests": 0,
-                "total_tokens": 0,
-                "total_cost": 0.0
-            }
+            self._usage_stats = UsageStats()
             return Result.success(None)
         except Exception as e:
             return Result.error(f"Failed to reset usage stats: {str(e)}")
     
-    def update_usage_stats(self, tokens: int, cost: float = 0.0):
-        """Update usage statistics"""
-        self._usage_stats["total_requests"] += 1
-        self._usage_stats["total_tokens"] += tokens
-        self._usage_stats["total_cost"] += cost
+    def update_usage_stats(self, tokens: int, cost: float = 0.0, prompt_tokens: int = 0, completion_tokens: int = 0, cached_tokens: int = 0):
+        """Update usage statistics.
+        
+        Synchronous on purpose: with no await between the increments, concurrent
+        completions on the event loop cannot interleave and lose updates.
+        """
+        stats = self._usage_stats
+        stats.total_requests += 1
+        stats.total_tokens += tokens
+        stats.total_cost += cost
+        stats.prompt_tokens += prompt_tokens
+        stats.completion_tokens += completion_tokens
+        stats.cached_tokens += cached_tokens
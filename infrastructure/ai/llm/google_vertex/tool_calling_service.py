@@ -1,91 +1,133 @@
 # infrastructure/llm/google_vertex/tool_calling_service.py
+import asyncio
+import contextlib
+from typing import List, AsyncIterator, Dict, Any, Optional
 import httpx
-import json
-from typing import List, AsyncIterator, Dict, Any
 from domain.entities.chat_message import ChatMessage
 from domain.utils.result import Result
-from .base_vertex_service import BaseVertexService
+from infrastructure.utils import json_codec
+from .base_vertex_service import BaseVertexService, _DEFAULT_GENERATION_CONFIG, _iter_json_array_objects, _to_vertex_contents
+
+# Queue marker for the end of a buffered stream
+_STREAM_END = object()
+# Ways to handle a full read-ahead buffer when the consumer is slower than the network
+_OVERFLOW_STRATEGIES = ("block", "drop_oldest")
+
+def _is_droppable_text_delta(chunk: Result[Dict[str, Any], str]) -> bool:
+    """Whether a buffered chunk only carries text deltas (tool calls, errors and finish chunks are never dropped)"""
+    if not chunk.is_success:
+        return False
+    candidates = chunk.value.get("candidates") or []
+    if not candidates:
+        return False
+    for candidate in candidates:
+        if candidate.get("finishReason"):
+            return False
+        parts = (candidate.get("content") or {}).get("parts") or []
+        if not parts or any("text" not in part or "functionCall" in part for part in parts):
+            return False
+    return True
+
 
 class ToolCallingService(BaseVertexService):
     """Google Vertex AI service for tool calling operations"""
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
-        super().__init__(api_key, model)
+    def __init__(self, api_key: str, model: str = "gemini-2.0-flash", client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, model, client)
         self._custom_functions = {}
     
     async def get_completion_with_tools(self, messages: List[ChatMessage], tools: List[Dict[str, Any]], config: dict = None) -> Result[Dict[str, Any], str]:
         """Get completion with tool calling support"""
         try:
-            async with httpx.AsyncClient() as client:
-                google_messages = []
-                for msg in messages:
-                    google_messages.append({
-                        "role": msg.role.value,
-                        "parts": [{"text": msg.content}]
-                    })
-                
-                generation_config = config or {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 1000
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/models/{self.model}:generateContent",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={
-                        "contents": google_messages,
-                        "tools": tools,
-                        "generationConfig": generation_config
-                    }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    return Result.success(data)
-                else:
-                    return Result.error(f"API error: {response.status_code}")
+            # Convert messages to Google format (cached per message)
+            google_messages = _to_vertex_contents(messages)
+            
+            response = await self._client.post(
+                self._generate_url,
+                content=self._encode_body(google_messages, config or _DEFAULT_GENERATION_CONFIG, tools)
+            )
+            
+            if response.status_code == 200:
+                data = json_codec.loads(response.content)
+                return Result.success(data)
+            else:
+                return Result.error(f"API error: {response.status_code}")
         except Exception as e:
             return Result.error(f"Failed to get completion with tools: {str(e)}")
     
-    async def stream_completion_with_tools(self, messages: List[ChatMessage], tools: List[Dict[str, Any]], config: dict = None) -> AsyncIterator[Result[Dict[str, Any], str]]:
-        """Stream completion with tool calling support"""
+    async def stream_completion_with_tools(self, messages: List[ChatMessage], tools: List[Dict[str, Any]], config: dict = None,
+                                           buffer_size: int = 16, overflow: str = "block") -> AsyncIterator[Result[Dict[str, Any], str]]:
+        """Stream completion with tool calling support.
+        
+        Up to buffer_size chunks are read ahead of the consumer. When the buffer is full,
+        "block" pauses reading the response (letting TCP backpressure the server) and
+        "drop_oldest" discards the oldest buffered text delta. Tool-call chunks are never
+        dropped; when only those are buffered, reading pauses as with "block".
+        """
+        if overflow not in _OVERFLOW_STRATEGIES:
+            yield Result.error(f"Unsupported overflow strategy: {overflow}")
+            return
+        
+        queue = asyncio.Queue(maxsize=max(1, buffer_size))
+        producer = asyncio.ensure_future(
+            self._fill_stream_buffer(queue, self._stream_tool_chunks(messages, tools, config), overflow)
+        )
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                yield item
+        finally:
+            # Stops reading the response if the consumer leaves early; waiting for the
+            # producer lets it close the chunk stream and release the HTTP connection
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+    
+    async def _fill_stream_buffer(self, queue: asyncio.Queue, chunks: AsyncIterator[Result[Dict[str, Any], str]], overflow: str):
+        """Move stream chunks into the bounded queue according to the overflow strategy"""
         try:
-            async with httpx.AsyncClient() as client:
-                google_messages = []
-                for msg in messages:
-                    google_messages.append({
-                        "role": msg.role.value,
-                        "parts": [{"text": msg.content}]
-                    })
-                
-                generation_config = config or {
-                    "temperature": 0.7,
-                    "maxOutputTokens": 1000
-                }
-                
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/models/{self.model}:streamGenerateContent",
-                    headers={"X-Goog-Api-Key": self.api_key},
-                    json={
-                        "contents": google_messages,
-                        "tools": tools,
-                        "generationConfig": generation_config
-                    }
-                ) as response:
-                    if response.status_code == 200:
-                        async for line in response.aiter_lines():
-                            if line.startswith("data: "):
-                                data = line[6:]
-                                if data.strip() == "[DONE]":
-                                    break
-                                try:
-                                    chunk_data = json.loads(data)
-                                    yield Result.success(chunk_data)
-                                except json.JSONDecodeError:
-                                    continue
-                    else:
-                        yield Result.error(f"API error: {response.status_code}")
+            async with contextlib.aclosing(chunks):
+                async for chunk in chunks:
+                    if overflow == "drop_oldest" and queue.full():
+                        self._drop_oldest_text_delta(queue)
+                    await queue.put(chunk)
+        except Exception as e:
+            await queue.put(Result.error(f"Failed to stream completion with tools: {str(e)}"))
+        await queue.put(_STREAM_END)
+    
+    @staticmethod
+    def _drop_oldest_text_delta(queue: asyncio.Queue) -> None:
+        """Remove the oldest droppable text delta from the queue, keeping the order of the rest"""
+        buffered = [queue.get_nowait() for _ in range(queue.qsize())]
+        for index, chunk in enumerate(buffered):
+            if _is_droppable_text_delta(chunk):
+                del buffered[index]
+                break
+        for chunk in buffered:
+            queue.put_nowait(chunk)
+    
+    async def _stream_tool_chunks(self, messages: List[ChatMessage], tools: List[Dict[str, Any]], config: dict = None) -> AsyncIterator[Result[Dict[str, Any], str]]:
+        """Read streamGenerateContent chunks for a tool-calling request"""
+        try:
+            # Convert messages to Google format (cached per message)
+            google_messages = _to_vertex_contents(messages)
+            
+            async with self._client.stream(
+                "POST",
+                self._stream_url,
+                content=self._encode_body(google_messages, config or _DEFAULT_GENERATION_CONFIG, tools)
+            ) as response:
+                if response.status_code == 200:
+                    # The endpoint streams a JSON array; decode each element from bytes as it completes
+                    async for raw_object in _iter_json_array_objects(response.aiter_bytes()):
+                        try:
+                            chunk_data = json_codec.loads(raw_object)
+                        except ValueError:
+                            continue
+                        yield Result.success(chunk_data)
+                else:
+                    yield Result.error(f"API error: {response.status_code}")
         except Exception as e:
             yield Result.error(f"Failed to stream completion with tools: {str(e)}")
     
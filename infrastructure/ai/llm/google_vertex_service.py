@@ -1,5 +1,8 @@
 # infrastructure/llm/google_vertex_service.py
-from typing import List, AsyncIterator, Dict, Any, Optional
+import asyncio
+from functools import cached_property
+from typing import List, AsyncIterator, Awaitable, Callable, Dict, Any, Optional
+import httpx
 from domain.services.ILLMService import ILLMService
 from domain.entities.chat_message import ChatMessage
 from domain.utils.result import Result
@@ -18,55 +21,127 @@ from .google_vertex.rate_limiting_service import RateLimitingService
 class GoogleVertexService(ILLMService):
     """Google Vertex AI implementation of LLMService using Facade pattern"""
     
-    def __init__(self, api_key: str, model: str = "gemini-2.0-flash"):
+    # Model-bound services kept in sync by set_model
+    _MODEL_SERVICES = ("base_service", "tool_service", "model_service", "token_service", "ai_service", "monitoring_service")
+    
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-2.0-flash",
+        cache_path: Optional[str] = None,
+        caching_service: Optional[CachingService] = None,
+        rate_limiting_service: Optional[RateLimitingService] = None
+    ):
         self.api_key = api_key
         self.model = model
-        
-        # Initialize specialized services
-        self.base_service = BaseVertexService(api_key, model)
-        self.tool_service = ToolCallingService(api_key, model)
-        self.model_service = ModelManagementService(api_key, model)
-        self.config_service = ConfigurationService()
-        self.token_service = TokenService(api_key, model)
-        self.ai_service = AIFeaturesService(api_key, model)
-        self.monitoring_service = MonitoringService(api_key, model)
-        self.caching_service = CachingService()
-        self.rate_limiting_service = RateLimitingService()
+        self._cache_path = cache_path
+        # Injected cache / rate limiter are shared with other instances; otherwise each gets its own
+        if caching_service is not None:
+            self.caching_service = caching_service
+        if rate_limiting_service is not None:
+            self.rate_limiting_service = rate_limiting_service
+        # Specialized services (and the HTTP client they share) are created on first use
+    
+    @cached_property
+    def _client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client shared by every specialized service and by other instances using the same API key"""
+        return BaseVertexService.get_shared_client(self.api_key)
+    
+    @cached_property
+    def base_service(self) -> BaseVertexService:
+        return BaseVertexService(self.api_key, self.model, self._client)
+    
+    @cached_property
+    def tool_service(self) -> ToolCallingService:
+        return ToolCallingService(self.api_key, self.model, self._client)
+    
+    @cached_property
+    def model_service(self) -> ModelManagementService:
+        return ModelManagementService(self.api_key, self.model, self._client)
+    
+    @cached_property
+    def config_service(self) -> ConfigurationService:
+        return ConfigurationService()
+    
+    @cached_property
+    def token_service(self) -> TokenService:
+        return TokenService(self.api_key, self.model, self._client)
+    
+    @cached_property
+    def ai_service(self) -> AIFeaturesService:
+        return AIFeaturesService(self.api_key, self.model, self._client)
+    
+    @cached_property
+    def monitoring_service(self) -> MonitoringService:
+        return MonitoringService(self.api_key, self.model, self._client)
+    
+    @cached_property
+    def caching_service(self) -> CachingService:
+        return CachingService(self._cache_path)
+    
+    @cached_property
+    def rate_limiting_service(self) -> RateLimitingService:
+        return RateLimitingService()
+    
+    async def aclose(self):
+        """No-op: the HTTP client is process-wide and closed by close_shared_clients()"""
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     # Basic Completion Operations
     async def get_completion(self, messages: List[ChatMessage]) -> Result[str, str]:
         """Get LLM completion"""
         try:
             # Check rate limits
-            rate_check = await self.rate_limiting_service.check_rate_limit()
+            rate_check = self.rate_limiting_service.check_rate_limit()
             if rate_check.is_error or not rate_check.value:
                 return Result.error("Rate limit exceeded")
             
-            # Check cache
-            cache_key = self.caching_service.generate_cache_key(
-                [msg.to_dict() for msg in messages], 
-                self.config_service.get_generation_config()
-            )
-            cached_response = self.caching_service.get_cached_response(cache_key)
+            # Check cache (keyed by model, sampling settings and role/content only, so timestamps and ids don't defeat it)
+            generation_config = self.config_service.get_generation_config()
+            cache_config = {"model": self.model, **generation_config}
+            google_messages = [msg.to_google_format() for msg in messages]
+            cache_key = self.caching_service.generate_cache_key(google_messages, cache_config)
+            cached_response = await self.caching_service.get_cached_response(cache_key)
+            if self.caching_service.enabled:
+                self.monitoring_service.record_cache_lookup("exact", bool(cached_response))
             if cached_response:
                 return Result.success(cached_response)
             
+            # Semantic cache: same history, paraphrased last message (only for near-deterministic sampling)
+            query_embedding = None
+            semantic_namespace = None
+            if messages and self.caching_service.semantic_applies(generation_config.get("temperature", 0.0)):
+                semantic_namespace = self.caching_service.generate_cache_key(google_messages[:-1], cache_config)
+                embedding_result = await self.ai_service.get_embedding(messages[-1].content)
+                if embedding_result.is_success:
+                    query_embedding = embedding_result.value
+                    semantic_response = self.caching_service.get_semantic_response(query_embedding, semantic_namespace)
+                    self.monitoring_service.record_cache_lookup("semantic", bool(semantic_response))
+                    if semantic_response:
+                        return Result.success(semantic_response)
+            
             # Get completion
-            result = await self.base_service.get_completion(
+            completion_result = await self.base_service.get_completion_with_usage(
                 messages, 
                 self.config_service.get_generation_config()
             )
+            if completion_result.is_error:
+                return Result.error(completion_result.error)
+            text, usage = completion_result.value
             
             # Cache successful response
-            if result.is_success:
-                self.caching_service.cache_response(cache_key, result.value)
-                # Record usage
-                token_count = await self.token_service.count_tokens_in_messages(messages)
-                if token_count.is_success:
-                    self.rate_limiting_service.record_request(token_count.value)
-                    self.token_service.update_usage_stats(token_count.value)
+            await self.caching_service.cache_response(cache_key, text)
+            if query_embedding is not None:
+                await self.caching_service.cache_semantic_response(query_embedding, semantic_namespace, text)
             
-            return result
+            await self._record_usage(messages, usage)
+            
+            return Result.success(text)
         except Exception as e:
             self.monitoring_service.log_error(str(e))
             return Result.error(f"Failed to get completion: {str(e)}")
@@ -75,28 +150,47 @@ class GoogleVertexService(ILLMService):
         """Stream LLM completion"""
         try:
             # Check rate limits
-            rate_check = await self.rate_limiting_service.check_rate_limit()
+            rate_check = self.rate_limiting_service.check_rate_limit()
             if rate_check.is_error or not rate_check.value:
                 yield Result.error("Rate limit exceeded")
                 return
             
-            async for result in self.base_service.stream_completion(
-                messages, 
-                self.config_service.get_generation_config()
-            ):
-                yield result
-                
-                # Record usage on first successful chunk
-                if result.is_success:
-                    token_count = await self.token_service.count_tokens_in_messages(messages)
-                    if token_count.is_success:
-                        self.rate_limiting_service.record_request(token_count.value)
-                        self.token_service.update_usage_stats(token_count.value)
-                    break
+            # Usage comes from the usageMetadata the stream has delivered so far
+            usage: Dict[str, int] = {}
+            streamed = False
+            try:
+                async for result in self.base_service.stream_completion(
+                    messages,
+                    self.config_service.get_generation_config(),
+                    usage
+                ):
+                    streamed = streamed or result.is_success
+                    yield result
+            finally:
+                # Also runs when the consumer stops early or disconnects, since the tokens were spent anyway
+                if streamed:
+                    try:
+                        await self._record_usage(messages, usage)
+                    except Exception as e:
+                        self.monitoring_service.log_error(f"Failed to record stream usage: {str(e)}")
         except Exception as e:
             self.monitoring_service.log_error(str(e))
             yield Result.error(f"Failed to stream completion: {str(e)}")
     
+    async def _record_usage(self, messages: List[ChatMessage], usage: Dict[str, int]):
+        """Record usage from the response's usageMetadata; count only if the API omitted it"""
+        tokens = usage.get("totalTokenCount") or usage.get("promptTokenCount", 0) + usage.get("candidatesTokenCount", 0)
+        if not tokens:
+            token_count = await self.token_service.count_tokens_in_messages(messages)
+            tokens = token_count.value if token_count.is_success else 0
+        self.rate_limiting_service.record_request(tokens)
+        self.token_service.update_usage_stats(
+            tokens,
+            prompt_tokens=usage.get("promptTokenCount", 0),
+            completion_tokens=usage.get("candidatesTokenCount", 0),
+            cached_tokens=usage.get("cachedContentTokenCount", 0)
+        )
+    
     # Tool Calling Support
     async def get_completion_with_tools(self, messages: List[ChatMessage], tools: List[Dict[str, Any]]) -> Result[Dict[str, Any], str]:
         """Get completion with tool calling support"""
@@ -128,12 +222,12 @@ class GoogleVertexService(ILLMService):
         """Set active model"""
         result = await self.model_service.set_model(model_name)
         if result.is_success:
-            # Update all services with new model
-            self.base_service.model = model_name
-            self.tool_service.model = model_name
-            self.token_service.model = model_name
-            self.ai_service.model = model_name
-            self.monitoring_service.model = model_name
+            # Update already created services; the rest pick up self.model when first used
+            self.model = model_name
+            for name in self._MODEL_SERVICES:
+                service = self.__dict__.get(name)
+                if service is not None:
+                    service.model = model_name
         return result
     
     async def get_current_model(self) -> Result[str, str]:
@@ -174,6 +268,10 @@ class GoogleVertexService(ILLMService):
         """Count tokens in messages"""
         return await self.token_service.count_tokens_in_messages(messages)
     
+    async def clear_tokenizer_cache(self) -> Result[None, str]:
+        """Drop cached token counts"""
+        return self.token_service.clear_tokenizer_cache()
+    
     async def estimate_cost(self, messages: List[ChatMessage]) -> Result[Dict[str, Any], str]:
         """Estimate API cost for messages"""
         return await self.token_service.estimate_cost(messages)
@@ -219,6 +317,10 @@ class GoogleVertexService(ILLMService):
         """Extract named entities from text"""
         return await self.ai_service.extract_entities(text)
     
+    async def analyze_all(self, text: str, categories: List[str], max_length: int = 100, keyword_count: int = 10) -> Dict[str, Result]:
+        """Run all text analysis features concurrently"""
+        return await self.ai_service.analyze_all(text, categories, max_length, keyword_count)
+    
     # Error Handling & Monitoring
     async def health_check(self) -> Result[Dict[str, Any], str]:
         """Check service health"""
@@ -237,9 +339,22 @@ class GoogleVertexService(ILLMService):
         return await self.monitoring_service.get_performance_metrics()
     
     # Caching & Performance
+    async def warmup(self) -> Result[Dict[str, Any], str]:
+        """Pre-open the shared connection, load JIT kernels and pre-load persisted cache entries"""
+        base_result = await self.base_service.warmup()
+        await asyncio.to_thread(self.caching_service.warm_up_similarity_kernels)
+        loaded_result = await self.caching_service.load_persisted_entries()
+        if base_result.is_success and loaded_result.is_success:
+            base_result.value["persisted_cache_entries"] = loaded_result.value
+        return base_result
+    
     async def enable_caching(self, enabled: bool = True) -> Result[None, str]:
         """Enable/disable response caching"""
-        return await self.caching_service.enable_caching(enabled)
+        return self.caching_service.enable_caching(enabled)
+    
+    async def enable_semantic_caching(self, enabled: bool = True, threshold: float = 0.92, max_temperature: float = 0.0) -> Result[None, str]:
+        """Enable/disable embedding-similarity response caching"""
+        return self.caching_service.enable_semantic_caching(enabled, threshold, max_temperature)
     
     async def clear_cache(self) -> Result[None, str]:
         """Clear response cache"""
@@ -247,44 +362,63 @@ class GoogleVertexService(ILLMService):
     
     async def get_cache_stats(self) -> Result[Dict[str, Any], str]:
         """Get cache statistics"""
-        return await self.caching_service.get_cache_stats()
+        return self.caching_service.get_cache_stats()
     
     async def set_cache_ttl(self, ttl_seconds: int) -> Result[None, str]:
         """Set cache time-to-live"""
-        return await self.caching_service.set_cache_ttl(ttl_seconds)
+        return self.caching_service.set_cache_ttl(ttl_seconds)
     
     # Batch Processing
-    async def batch_completion(self, message_batches: List[List[ChatMessage]]) -> Result[List[str], str]:
-        """Process multiple completions in batch"""
+    async def batch_completion(self, message_batches: List[List[ChatMessage]], max_concurrent: int = 8) -> Result[List[str], str]:
+        """Process multiple completions concurrently, stopping at the first error"""
         try:
-            results = []
-            for batch in message_batches:
-                completion_result = await self.get_completion(batch)
-                if completion_result.is_error:
-                    return completion_result
-                results.append(completion_result.value)
-            return Result.success(results)
+            return await self._run_concurrently(
+                [lambda batch=batch: self.get_completion(batch) for batch in message_batches],
+                max_concurrent
+            )
         except Exception as e:
             return Result.error(f"Failed to process batch: {str(e)}")
     
-    async def parallel_completion(self, messages_list: List[List[ChatMessage]]) -> Result[List[str], str]:
+    async def parallel_completion(self, messages_list: List[List[ChatMessage]], max_concurrent: int = 8) -> Result[List[str], str]:
         """Process completions in parallel"""
-        # For now, same as batch processing
-        return await self.batch_completion(messages_list)
+        try:
+            return await self._run_concurrently(
+                [lambda messages=messages: self.get_completion(messages) for messages in messages_list],
+                max_concurrent
+            )
+        except Exception as e:
+            return Result.error(f"Failed to process parallel completions: {str(e)}")
     
-    async def batch_embeddings(self, text_batches: List[List[str]]) -> Result[List[List[List[float]]], str]:
-        """Process multiple embedding batches"""
+    async def batch_embeddings(self, text_batches: List[List[str]], max_concurrent: int = 8) -> Result[List[List[List[float]]], str]:
+        """Process multiple embedding batches concurrently, stopping at the first error"""
         try:
-            results = []
-            for batch in text_batches:
-                embeddings_result = await self.get_embeddings(batch)
-                if embeddings_result.is_error:
-                    return embeddings_result
-                results.append(embeddings_result.value)
-            return Result.success(results)
+            return await self._run_concurrently(
+                [lambda batch=batch: self.get_embeddings(batch) for batch in text_batches],
+                max_concurrent
+            )
         except Exception as e:
             return Result.error(f"Failed to process embedding batches: {str(e)}")
     
+    async def _run_concurrently(self, calls: List[Callable[[], Awaitable[Result]]], max_concurrent: int) -> Result[list, str]:
+        """Run calls under a concurrency limit; on the first error cancel the rest and return it"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        
+        async def run(call):
+            async with semaphore:
+                return await call()
+        
+        tasks = [asyncio.ensure_future(run(call)) for call in calls]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result = await finished
+                if result.is_error:
+                    return result
+            return Result.success([task.result().value for task in tasks])
+        finally:
+            # No-op for finished tasks; stops outstanding requests after an error
+            for task in tasks:
+                task.cancel()
+    
     # Prompt Engineering
     async def optimize_prompt(self, prompt: str, context: Optional[str] = None) -> Result[str, str]:
         """Optimize prompt for better results"""
@@ -387,12 +521,12 @@ class GoogleVertexService(ILLMService):
     # Rate Limiting & Quotas
     async def get_rate_limit_info(self) -> Result[Dict[str, Any], str]:
         """Get rate limit information"""
-        return await self.rate_limiting_service.get_rate_limit_info()
+        return self.rate_limiting_service.get_rate_limit_info()
     
     async def check_rate_limit(self) -> Result[bool, str]:
         """Check if rate limit allows request"""
-        return await self.rate_limiting_service.check_rate_limit()
+        return self.rate_limiting_service.check_rate_limit()
     
     async def get_quota_info(self) -> Result[Dict[str, Any], str]:
         """Get quota information"""
-        return await self.rate_limiting_service.get_quota_info()
\ No newline at end of file
+        return self.rate_limiting_service.get_quota_info()
\ No newline at end of file
@@ -1,8 +1,12 @@
 # infrastructure/ai/llm/llm_factory.py
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
 from domain.services.ILLMService import ILLMService
 from .google_vertex_service import GoogleVertexService
+from .google_vertex.caching_service import CachingService
+from .google_vertex.rate_limiting_service import RateLimitingService
 from .lmstudio_llm_service import LMStudioLLMService
+from infrastructure.utils.http_client import credential_fingerprint
 
 class LLMProvider:
     """LLM provider types"""
@@ -11,42 +15,73 @@ class LLMProvider:
     OLLAMA = "ollama"
     LOCAL = "local"
 
+# Bounds on the per-tenant shared services; keys hold an API key fingerprint, never the key itself
+_SHARED_CACHES_MAX = 64
+_SHARED_RATE_LIMITERS_MAX = 256
+
+@lru_cache(maxsize=_SHARED_CACHES_MAX)
+def _shared_caching_service(model: str, key_fingerprint: Optional[str], cache_path: Optional[str]) -> CachingService:
+    """One response cache per model, API key and cache file, so tenants and models never get each other's responses"""
+    return CachingService(cache_path, key_scope=f"{model}:{key_fingerprint}")
+
+@lru_cache(maxsize=_SHARED_RATE_LIMITERS_MAX)
+def _shared_rate_limiting_service(key_fingerprint: Optional[str]) -> RateLimitingService:
+    """One rate limiter per API key, since quotas are enforced per key"""
+    return RateLimitingService()
+
+def _create_google_service(**kwargs) -> ILLMService:
+    api_key = kwargs.get("api_key", "")
+    model = kwargs.get("model", "gemini-2.0-flash")
+    cache_path = kwargs.get("cache_path")
+    key_fingerprint = credential_fingerprint(api_key)
+    return GoogleVertexService(
+        api_key=api_key,
+        model=model,
+        cache_path=cache_path,
+        caching_service=_shared_caching_service(model, key_fingerprint, cache_path),
+        rate_limiting_service=_shared_rate_limiting_service(key_fingerprint)
+    )
+
+def _create_lmstudio_service(**kwargs) -> ILLMService:
+    return LMStudioLLMService(
+        proxy_url=kwargs.get("proxy_url", "http://127.0.0.1:8123"),
+        model_name=kwargs.get("model_name", "model:1"),
+        embedding_service=kwargs.get("embedding_service")
+    )
+
+def _create_ollama_service(**kwargs) -> ILLMService:
+    # TODO: Implement OllamaLLMService
+    raise NotImplementedError("Ollama LLM service not implemented yet")
+
+def _create_local_service(**kwargs) -> ILLMService:
+    # TODO: Implement LocalLLMService
+    raise NotImplementedError("Local LLM service not implemented yet")
+
 class LLMFactory:
     """Factory for creating LLM services"""
     
+    # Provider name -> service constructor
+    _providers: Dict[str, Callable[..., ILLMService]] = {
+        LLMProvider.GOOGLE: _create_google_service,
+        LLMProvider.LMSTUDIO: _create_lmstudio_service,
+        LLMProvider.OLLAMA: _create_ollama_service,
+        LLMProvider.LOCAL: _create_local_service
+    }
+    
     @staticmethod
     def create_service(provider: str, **kwargs) -> ILLMService:
         """Create LLM service based on provider"""
-        
-        if provider == LLMProvider.GOOGLE:
-            return GoogleVertexService(
-                api_key=kwargs.get("api_key", ""),
-                model=kwargs.get("model", "gemini-2.0-flash")
-            )
-        
-        elif provider == LLMProvider.LMSTUDIO:
-            return LMStudioLLMService(
-                proxy_url=kwargs.get("proxy_url", "http://127.0.0.1:8123"),
-                model_name=kwargs.get("model_name", "model:1")
-            )
-        
-        elif provider == LLMProvider.OLLAMA:
-            # TODO: Implement OllamaLLMService
-            raise NotImplementedError("Ollama LLM service not implemented yet")
-        
-        elif provider == LLMProvider.LOCAL:
-            # TODO: Implement LocalLLMService
-            raise NotImplementedError("Local LLM service not implemented yet")
-        
-        else:
+        create = LLMFactory._providers.get(provider)
+        if create is None:
             raise ValueError(f"Unsupported LLM provider: {provider}")
+        return create(**kwargs)
+    
+    @staticmethod
+    def register_provider(provider: str, create: Callable[..., ILLMService]):
+        """Register (or replace) the constructor used for a provider"""
+        LLMFactory._providers[provider] = create
     
     @staticmethod
     def get_supported_providers() -> list:
         """Get list of supported providers"""
-        return [
-            LLMProvider.GOOGLE,
-            LLMProvider.LMSTUDIO,
-            LLMProvider.OLLAMA,
-            LLMProvider.LOCAL
-        ]
+        return list(LLMFactory._providers)
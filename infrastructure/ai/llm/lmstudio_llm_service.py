@@ -1,26 +1,116 @@
 # infrastructure/ai/llm/lmstudio_llm_service.py
 import asyncio
 import logging
-from typing import List, AsyncIterator, Dict, Any, Optional
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import List, AsyncIterator, Dict, Any, Optional, Tuple
 import httpx
-import json
 from .base_llm_service import BaseLLMService
 from domain.entities.chat_message import ChatMessage, MessageRole
 from domain.utils.result import Result
+from infrastructure.ai.embeddings.IEmbeddingService import IEmbeddingService
+from infrastructure.utils import json_codec
+from infrastructure.utils.http_client import build_async_client, shared_client
+from .google_vertex.caching_service import CachingService
+
+# Per-request timeouts on the shared client
+_COMPLETION_TIMEOUT = 120.0
+_STREAM_TIMEOUT = 300.0  # 5 minut dla długich odpowiedzi
+_MODELS_TIMEOUT = 10.0
+# Seconds a model listing is served from cache
+_MODELS_CACHE_TTL = 30.0
+# Seconds a healthy health check result is reused
+_HEALTH_TTL = 5.0
+# Conversation prefixes kept in encoded form
+_PREFIX_CACHE_SIZE = 64
 
 class LMStudioLLMService(BaseLLMService):
     """LM Studio implementation of LLMService for local LLM models"""
     
-    def __init__(self, proxy_url: str = "http://127.0.0.1:8123", model_name: str = "model:1"):
+    # ChatMessage role -> OpenAI-compatible role name
+    _ROLE_MAPPING = {
+        MessageRole.USER: "user",
+        MessageRole.ASSISTANT: "assistant",
+        MessageRole.SYSTEM: "system",
+        MessageRole.TOOL: "tool"
+    }
+    # Role values LM Studio accepts as-is
+    _LM_ROLES = frozenset(_ROLE_MAPPING.values())
+    
+    # Sampling settings for non-streaming completions
+    _TEMPERATURE = 0.7
+    _MAX_TOKENS = 2048
+    # Tail of the request body for each request kind, encoded once at class creation
+    _PAYLOAD_TEMPLATES = {
+        kind: json_codec.dumps(settings)[1:-1]
+        for kind, settings in {
+            "chat": {"temperature": _TEMPERATURE, "max_tokens": _MAX_TOKENS, "stream": False},
+            "chat_stream": {"temperature": _TEMPERATURE, "max_tokens": 12000, "stream": True},
+            "tools": {"temperature": _TEMPERATURE, "max_tokens": _MAX_TOKENS, "stream": False},
+            "tools_stream": {"temperature": _TEMPERATURE, "max_tokens": _MAX_TOKENS, "stream": True}
+        }.items()
+    }
+    
+    def __init__(
+        self,
+        proxy_url: str = "http://127.0.0.1:8123",
+        model_name: str = "model:1",
+        embedding_service: Optional[IEmbeddingService] = None,
+        caching_service: Optional[CachingService] = None
+    ):
         super().__init__()
         self.proxy_url = proxy_url
         self.model_name = model_name
+        # Response cache (exact match, plus embedding similarity when an embedding service is given)
+        self.caching_service = caching_service or CachingService()
+        self._embedding_service = embedding_service
+        # Encoded request fragments reused across agent turns
+        self._prefix_cache: OrderedDict[tuple, bytes] = OrderedDict()
+        self._tools_json: Optional[Tuple[Any, bytes]] = None
+        # Expiry (monotonic) of the model listing held in _model_info_cache
+        self._models_cache_expiry = 0.0
+        # Last healthy health check result and its expiry (monotonic)
+        self._health_ttl_seconds = _HEALTH_TTL
+        self._health_cache: Optional[Dict[str, Any]] = None
+        self._health_cache_expiry = 0.0
         
         # LM Studio API endpoints
         self.chat_endpoint = f"{proxy_url}/v1/chat/completions"
         self.models_endpoint = f"{proxy_url}/v1/models"
         
-        self.logger.info(f"LM Studio LLM Service initialized: {proxy_url} with model {model_name}")
+        self.logger.info("LM Studio LLM Service initialized: %s with model %s", proxy_url, model_name)
+    
+    @cached_property
+    def _client(self) -> httpx.AsyncClient:
+        """Pooled client shared by every instance talking to this proxy, so keep-alive connections skip the TCP/TLS handshake"""
+        return shared_client(("lmstudio", self.proxy_url), lambda: build_async_client(
+            headers={"Content-Type": "application/json"},
+            timeout=_COMPLETION_TIMEOUT,
+            max_connections=100,
+            max_keepalive_connections=20
+        ))
+    
+    async def warmup(self) -> Result[Dict[str, Any], str]:
+        """Open a pooled connection ahead of the first completion"""
+        try:
+            # Any response leaves a keep-alive connection in the pool; the status is irrelevant
+            response = await self._client.get(self.models_endpoint, timeout=_MODELS_TIMEOUT)
+            return Result.success({
+                "http_version": response.http_version,
+                "status_code": response.status_code
+            })
+        except Exception as e:
+            return Result.error(f"Failed to warm up: {str(e)}")
+    
+    async def aclose(self):
+        """No-op: the HTTP client is process-wide and closed by close_shared_clients()"""
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     # Override core methods for LM Studio implementation
     
@@ -30,24 +120,35 @@ class LMStudioLLMService(BaseLLMService):
             # Convert ChatMessage to LM Studio format
             lm_messages = self._convert_messages_to_lm_format(messages)
             
-            payload = {
-                "model": self.model_name,
-                "messages": lm_messages,
-                "temperature": 0.7,
-                "max_tokens": 2048,
-                "stream": False
-            }
+            # Exact-match cache, keyed by model, sampling settings and role/content of every message
+            cache_config = {"model": self.model_name, "temperature": self._TEMPERATURE, "max_tokens": self._MAX_TOKENS}
+            cache_key = self.caching_service.generate_cache_key(lm_messages, cache_config)
+            cached_response = await self.caching_service.get_cached_response(cache_key)
+            if cached_response:
+                return Result.success(cached_response)
+            
+            # Semantic cache: same history, paraphrased last message
+            query_embedding = None
+            semantic_namespace = None
+            if self._embedding_service is not None and messages and self.caching_service.semantic_applies(self._TEMPERATURE):
+                semantic_namespace = self.caching_service.generate_cache_key(lm_messages[:-1], cache_config)
+                embedding_result = await self._embedding_service.create_embedding(messages[-1].content)
+                if embedding_result.is_success:
+                    query_embedding = embedding_result.value
+                    semantic_response = self.caching_service.get_semantic_response(query_embedding, semantic_namespace)
+                    if semantic_response:
+                        return Result.success(semantic_response)
+            
+            message = await self._post_chat(self._encode_payload(lm_messages, "chat"))
+            content = message["content"]
+            
+            await self.caching_service.cache_response(cache_key, content)
+            if query_embedding is not None:
+                await self.caching_service.cache_semantic_response(query_embedding, semantic_namespace, content)
+            
+            self.logger.info("LM Studio completion successful: %d chars", len(content))
+            return Result.success(content)
             
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(self.chat_endpoint, json=payload)
-                response.raise_for_status()
-                
-                result = response.json()
-                content = result["choices"][0]["message"]["content"]
-                
-                self.logger.info(f"LM Studio completion successful: {len(content)} chars")
-                return Result.success(content)
-                
         except httpx.TimeoutException:
             error_msg = f"LM Studio request timeout for model {self.model_name}"
             self.logger.error(error_msg)
@@ -67,13 +168,7 @@ class LMStudioLLMService(BaseLLMService):
             # Convert ChatMessage to LM Studio format
             lm_messages = self._convert_messages_to_lm_format(messages)
             
-            payload = {
-                "model": self.model_name,
-                "messages": lm_messages,
-                "temperature": 0.7,
-                "max_tokens": 12000,
-                "stream": True
-            }
+            body = self._encode_payload(lm_messages, "chat_stream")
 
 
                     # AREK TESTY: Sprawdź czy content nie jest obcięty w żadnej wiadomości
@@ -97,27 +192,12 @@ class LMStudioLLMService(BaseLLMService):
         #self.logger.info("=" * 80)
         
             
-            async with httpx.AsyncClient(timeout=300.0) as client:  # 5 minut dla długich odpowiedzi
-                async with client.stream("POST", self.chat_endpoint, json=payload) as response:
-                    response.raise_for_status()
-                    
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]  # Remove "data: " prefix
-                            
-                            if data.strip() == "[DONE]":
-                                break
+            async with self._client.stream("POST", self.chat_endpoint, content=body, timeout=_STREAM_TIMEOUT) as response:
+                response.raise_for_status()
+                
+                async for result in self._iter_sse(response):
+                    yield result
                             
-                            try:
-                                chunk = json.loads(data)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    if content:
-                                        yield Result.success(content)
-                            except json.JSONDecodeError:
-                                continue
-                                
         except Exception as e:
             error_msg = f"LM Studio streaming error: {str(e)}"
             self.logger.error(error_msg)
@@ -129,33 +209,18 @@ class LMStudioLLMService(BaseLLMService):
             # Convert ChatMessage to LM Studio format
             lm_messages = self._convert_messages_to_lm_format(messages)
             
-            payload = {
-                "model": self.model_name,
-                "messages": lm_messages,
-                "tools": tools,
-                "tool_choice": "auto",
-                "temperature": 0.7,
-                "max_tokens": 2048,
-                "stream": False
+            message = await self._post_chat(self._encode_payload(lm_messages, "tools", tools))
+            
+            # Return structured response with tool calls if present
+            response_data = {
+                "content": message.get("content", ""),
+                "tool_calls": message.get("tool_calls", []),
+                "role": message.get("role", "assistant")
             }
             
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(self.chat_endpoint, json=payload)
-                response.raise_for_status()
-                
-                result = response.json()
-                message = result["choices"][0]["message"]
-                
-                # Return structured response with tool calls if present
-                response_data = {
-                    "content": message.get("content", ""),
-                    "tool_calls": message.get("tool_calls", []),
-                    "role": message.get("role", "assistant")
-                }
-                
-                self.logger.info(f"LM Studio completion with tools successful: {len(response_data['content'])} chars")
-                return Result.success(response_data)
-                
+            self.logger.info("LM Studio completion with tools successful: %d chars", len(response_data["content"] or ""))
+            return Result.success(response_data)
+            
         except Exception as e:
             error_msg = f"LM Studio completion with tools error: {str(e)}"
             self.logger.error(error_msg)
@@ -167,77 +232,66 @@ class LMStudioLLMService(BaseLLMService):
             # Convert ChatMessage to LM Studio format
             lm_messages = self._convert_messages_to_lm_format(messages)
             
-            payload = {
-                "model": self.model_name,
-                "messages": lm_messages,
-                "tools": tools,
-                "tool_choice": "auto",
-                "temperature": 0.7,
-                "max_tokens": 2048,
-                "stream": True
-            }
+            body = self._encode_payload(lm_messages, "tools_stream", tools)
             
-            async with httpx.AsyncClient(timeout=300.0) as client:  # 5 minut dla długich odpowiedzi
-                async with client.stream("POST", self.chat_endpoint, json=payload) as response:
-                    response.raise_for_status()
+            async with self._client.stream("POST", self.chat_endpoint, content=body, timeout=_STREAM_TIMEOUT) as response:
+                response.raise_for_status()
+                
+                async for delta in self._iter_sse_deltas(response):
+                    content = delta.get("content", "")
+                    tool_calls = delta.get("tool_calls", [])
                     
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]  # Remove "data: " prefix
+                    if content or tool_calls:
+                        response_data = {
+                            "content": content,
+                            "tool_calls": tool_calls,
+                            "role": "assistant"
+                        }
+                        yield Result.success(response_data)
                             
-                            if data.strip() == "[DONE]":
-                                break
-                            
-                            try:
-                                chunk = json.loads(data)
-                                if "choices" in chunk and len(chunk["choices"]) > 0:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    tool_calls = delta.get("tool_calls", [])
-                                    
-                                    if content or tool_calls:
-                                        response_data = {
-                                            "content": content,
-                                            "tool_calls": tool_calls,
-                                            "role": "assistant"
-                                        }
-                                        yield Result.success(response_data)
-                            except json.JSONDecodeError:
-                                continue
-                                
         except Exception as e:
             error_msg = f"LM Studio streaming with tools error: {str(e)}"
             self.logger.error(error_msg)
             yield Result.error(error_msg)
     
     async def list_models(self) -> Result[List[Dict[str, Any]], str]:
-        """List available models from LM Studio"""
+        """List available models from LM Studio (cached for a short TTL)"""
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(self.models_endpoint)
-                response.raise_for_status()
-                
-                result = response.json()
-                models = result.get("data", [])
-                
-                # Format models for consistency
-                formatted_models = []
-                for model in models:
-                    formatted_models.append({
-                        "id": model.get("id"),
-                        "name": model.get("name", model.get("id")),
-                        "provider": "lmstudio",
-                        "capabilities": ["chat", "completion"]
-                    })
-                
-                self.logger.info(f"Found {len(formatted_models)} models in LM Studio")
-                return Result.success(formatted_models)
-                
+            if self._models_cache_fresh():
+                return Result.success(list(self._model_info_cache.values()))
+            
+            response = await self._client.get(self.models_endpoint, timeout=_MODELS_TIMEOUT)
+            response.raise_for_status()
+            
+            result = json_codec.loads(response.content)
+            models = result.get("data", [])
+            
+            # Format models for consistency
+            formatted_models = []
+            for model in models:
+                formatted_models.append({
+                    "id": model.get("id"),
+                    "name": model.get("name", model.get("id")),
+                    "provider": "lmstudio",
+                    "capabilities": ["chat", "completion"]
+                })
+            
+            # Keyed by id so set_model / get_model_info look models up without a scan
+            self._model_info_cache = {model["id"]: model for model in formatted_models}
+            self._models_cache_expiry = time.monotonic() + _MODELS_CACHE_TTL
+            
+            self.logger.info("Found %d models in LM Studio", len(formatted_models))
+            return Result.success(formatted_models)
+            
         except Exception as e:
             error_msg = f"Failed to list LM Studio models: {str(e)}"
             self.logger.error(error_msg)
             return Result.error(error_msg)
     
+    def _models_cache_fresh(self) -> bool:
+        """Whether the cached model listing can still be served"""
+        return bool(self._model_info_cache) and time.monotonic() < self._models_cache_expiry
+    
     async def get_current_model(self) -> Result[str, str]:
         """Get current active model"""
         return Result.success(self.model_name)
@@ -245,17 +299,16 @@ class LMStudioLLMService(BaseLLMService):
     async def set_model(self, model_name: str) -> Result[None, str]:
         """Set active model"""
         try:
-            # Verify model exists
-            models_result = await self.list_models()
-            if models_result.is_error:
-                return models_result
+            # Verify model exists, refetching only if a cached listing doesn't have it
+            if not self._models_cache_fresh() or model_name not in self._model_info_cache:
+                self._models_cache_expiry = 0.0
+                models_result = await self.list_models()
+                if models_result.is_error:
+                    return models_result
             
-            models = models_result.value
-            model_exists = any(model.get("id") == model_name for model in models)
-            
-            if model_exists:
+            if model_name in self._model_info_cache:
                 self.model_name = model_name
-                self.logger.info(f"Switched to model: {model_name}")
+                self.logger.info("Switched to model: %s", model_name)
                 return Result.success(None)
             else:
                 return Result.error(f"Model {model_name} not found")
@@ -284,6 +337,8 @@ class LMStudioLLMService(BaseLLMService):
                 self.proxy_url = config["proxy_url"]
                 self.chat_endpoint = f"{self.proxy_url}/v1/chat/completions"
                 self.models_endpoint = f"{self.proxy_url}/v1/models"
+            self._model_info_cache.clear()
+            self._health_cache = None
             
             self.logger.info("Configuration updated successfully")
             return Result.success(None)
@@ -293,28 +348,55 @@ class LMStudioLLMService(BaseLLMService):
             self.logger.error(error_msg)
             return Result.error(error_msg)
     
+    async def enable_caching(self, enabled: bool = True) -> Result[None, str]:
+        """Enable/disable response caching"""
+        return self.caching_service.enable_caching(enabled)
+    
+    async def enable_semantic_caching(self, enabled: bool = True, threshold: float = 0.92, max_temperature: float = 0.0) -> Result[None, str]:
+        """Enable/disable the embedding-similarity cache layer (needs an embedding service)"""
+        if enabled and self._embedding_service is None:
+            return Result.error("Semantic caching requires an embedding service")
+        return self.caching_service.enable_semantic_caching(enabled, threshold, max_temperature)
+    
+    async def clear_cache(self) -> Result[None, str]:
+        """Clear response cache"""
+        return await self.caching_service.clear_cache()
+    
+    async def get_cache_stats(self) -> Result[Dict[str, Any], str]:
+        """Get cache statistics"""
+        return self.caching_service.get_cache_stats()
+    
+    async def set_cache_ttl(self, ttl_seconds: int) -> Result[None, str]:
+        """Set cache time-to-live"""
+        return self.caching_service.set_cache_ttl(ttl_seconds)
+    
     async def health_check(self) -> Result[Dict[str, Any], str]:
-        """Check service health"""
+        """Check service health with a HEAD request, reusing a recent healthy result"""
         try:
-            # Try to list models as a health check
-            models_result = await self.list_models()
+            if self._health_cache is not None and time.monotonic() < self._health_cache_expiry:
+                return Result.success(dict(self._health_cache))
             
-            if models_result.is_success:
-                return Result.success({
-                    "status": "healthy",
-                    "provider": "lmstudio",
-                    "proxy_url": self.proxy_url,
-                    "model": self.model_name,
-                    "models_available": len(models_result.value)
-                })
-            else:
+            health = {
+                "provider": "lmstudio",
+                "proxy_url": self.proxy_url,
+                "model": self.model_name
+            }
+            try:
+                response = await self._client.head(self.models_endpoint, timeout=_MODELS_TIMEOUT)
+            except httpx.HTTPError as e:
+                return Result.success({"status": "unhealthy", **health, "error": str(e)})
+            
+            # Any answer below 5xx means the proxy is up and serving
+            if response.status_code >= 500:
                 return Result.success({
-                    "status": "unhealthy",
-                    "provider": "lmstudio",
-                    "proxy_url": self.proxy_url,
-                    "model": self.model_name,
-                    "error": models_result.error
+                    "status": "unhealthy", **health,
+                    "error": f"HTTP {response.status_code}"
                 })
+            
+            health = {"status": "healthy", **health, "status_code": response.status_code}
+            self._health_cache = health
+            self._health_cache_expiry = time.monotonic() + self._health_ttl_seconds
+            return Result.success(dict(health))
                 
         except Exception as e:
             error_msg = f"Health check failed: {str(e)}"
@@ -322,33 +404,60 @@ class LMStudioLLMService(BaseLLMService):
             return Result.error(error_msg)
     
     # Helper methods
+    async def _post_chat(self, body: bytes) -> Dict[str, Any]:
+        """Send a non-streaming chat completions request and return the first choice's message"""
+        response = await self._client.post(self.chat_endpoint, content=body)
+        response.raise_for_status()
+        return json_codec.loads(response.content)["choices"][0]["message"]
+    
+    def _encode_payload(self, lm_messages: List[Dict[str, str]], kind: str, tools: Optional[List[Dict[str, Any]]] = None) -> bytes:
+        """Serialize a chat completions body, reusing the encoded conversation prefix and tool schemas.
+        
+        Everything before the latest message is stable across agent turns, so only the
+        newest message is encoded on each call.
+        """
+        parts = [b'{"model":', json_codec.dumps(self.model_name), b',"messages":[']
+        if len(lm_messages) > 1:
+            parts += (self._encode_message_prefix(lm_messages[:-1]), b',')
+        if lm_messages:
+            parts.append(json_codec.dumps(lm_messages[-1]))
+        parts.append(b']')
+        if tools is not None:
+            parts += (b',"tools":', self._encode_tools(tools), b',"tool_choice":"auto"')
+        parts += (b',', self._PAYLOAD_TEMPLATES[kind], b'}')
+        return b"".join(parts)
+    
+    def _encode_message_prefix(self, lm_messages: List[Dict[str, str]]) -> bytes:
+        """Comma-joined JSON of the given messages, cached by role and content"""
+        # Content strings are the same objects turn after turn, so hashing and comparing them is cheap
+        key = tuple((message["role"], message["content"]) for message in lm_messages)
+        encoded = self._prefix_cache.get(key)
+        if encoded is not None:
+            self._prefix_cache.move_to_end(key)
+            return encoded
+        
+        encoded = json_codec.dumps(lm_messages)[1:-1]
+        self._prefix_cache[key] = encoded
+        while len(self._prefix_cache) > _PREFIX_CACHE_SIZE:
+            self._prefix_cache.popitem(last=False)
+        return encoded
+    
+    def _encode_tools(self, tools: List[Dict[str, Any]]) -> bytes:
+        """Serialized tool schemas, reused while the same list is passed again (treated as read-only)"""
+        cached = self._tools_json
+        # Holding a reference keeps the id from being reused by another object
+        if cached is None or cached[0] is not tools:
+            cached = self._tools_json = (tools, json_codec.dumps(tools))
+        return cached[1]
+    
     def _convert_messages_to_lm_format(self, messages: List[ChatMessage]) -> List[Dict[str, str]]:
         """Convert ChatMessage list to LM Studio format"""
-        lm_messages = []
-        
-        for msg in messages:
-            # role_mapping = {
-            #     MessageRole.USER: "user",
-            #     MessageRole.ASSISTANT: "assistant", 
-            #     MessageRole.SYSTEM: "system",
-            #     MessageRole.TOOL: "tool"
-            # }
-
-            if(msg.role == MessageRole.SYSTEM):
-                lm_role = "system"
-            
-            if(msg.role == MessageRole.USER):
-                lm_role = "user"
-            
-            if(msg.role == MessageRole.ASSISTANT):
-                lm_role = "assistant"
-
-            if(msg.role == MessageRole.TOOL):
-                lm_role = "tool"
-            
-            lm_messages.append({
-                "role": lm_role,
+        lm_roles = self._LM_ROLES
+        role_mapping = self._ROLE_MAPPING
+        return [
+            {
+                "role": role if (role := msg.role.value) in lm_roles else role_mapping.get(msg.role, "user"),
                 "content": msg.content
-            })
-        
-        return lm_messages
\ No newline at end of file
+            }
+            for msg in messages
+        ]
@@ -1,49 +1,145 @@
 # infrastructure/ai/vector_db/qdrant/BaseQdrantService.py
+import asyncio
 import httpx
 import logging
-from typing import List, Dict, Any, Optional
+import random
+import time
+from functools import lru_cache
+import numpy as np
+from typing import List, Dict, Any, Awaitable, Callable, Hashable, Optional, Tuple, Union
 from domain.utils.result import Result
+from infrastructure.utils import json_codec
+from infrastructure.utils.http_client import build_async_client, credential_fingerprint, shared_client
+
+# Sekundy, przez które odpowiedzi odczytów (lista kolekcji, istnienie kolekcji) są brane z cache
+_CACHE_TTL = 5.0
+_CACHE_MAX_ENTRIES = 64
+# Sekundy życia bezczynnego połączenia keep-alive (domyślne 5 s httpx zrywa połączenia w przerwach ruchu)
+_KEEPALIVE_EXPIRY = 300.0
+# Odpowiedzi przejściowe, po których żądanie jest ponawiane
+_RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+# Górna granica pojedynczego odczekania (także dla Retry-After)
+_MAX_BACKOFF = 5.0
+
+@lru_cache(maxsize=1024)
+def _is_valid_collection_name(collection_name: str) -> bool:
+    # Nazwy kolekcji Qdrant powinny być alfanumeryczne z podkreśleniami
+    return collection_name.replace('_', '').replace('-', '').isalnum()
 
 class BaseQdrantService:  # Klasa bazowa z wspólną funkcjonalnością
-    """Klasa bazowa dla serwisów Qdrant z wspólną funkcjonalnością"""
+    """Klasa bazowa dla serwisów Qdrant z wspólną funkcjonalnością.
+    
+    Wszystkie żądania idą przez jednego, długo żyjącego klienta HTTP (pula połączeń
+    keep-alive). Nie twórz serwisów ani klientów w gorącej pętli - współdziel klienta
+    przez parametr `client`; get_shared_client daje jednego klienta na proces na adres Qdrant.
+    
+    Przy https (ALPN) i zainstalowanym h2 klient używa HTTP/2, więc równoległe żądania
+    multipleksują się na jednym połączeniu; po http:// zostaje HTTP/1.1 z pulą połączeń.
+    Bezczynne połączenia żyją 300 s, żeby przerwy w ruchu nie wymuszały nowego handshake.
+    Przy wielu małych równoległych żądaniach warto uruchamiać aplikację na uvloop
+    (main_fastapi.py wybiera go automatycznie, gdy jest zainstalowany).
+    """
     
-    def __init__(self, url: str = "http://localhost:6333", api_key: Optional[str] = None):
+    # Stałe endpointy API (względne wobec base_url klienta)
+    _EP_COLLECTIONS = "/collections"
+    _EP_HEALTH = "/health"
+    _EP_CLUSTER = "/cluster"
+    _EP_TELEMETRY = "/telemetry"
+    
+    # Metody HTTP obsługiwane przez _make_request
+    _METHODS = frozenset({"GET", "POST", "PUT", "DELETE"})
+    # Metody idempotentne oraz endpointy POST, które można bezpiecznie powtórzyć
+    # (wyszukiwanie, odczyt, usuwanie i ustawianie payloadu punktów po ID)
+    _IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+    _IDEMPOTENT_POST_SUFFIXES = ("/search", "/search/batch", "/recommend", "/scroll", "/points", "/points/delete", "/points/payload")
+    
+    def __init__(self, url: str = "http://localhost:6333", api_key: Optional[str] = None, client: Optional[httpx.AsyncClient] = None):
         self.url = url.rstrip('/')
         self.api_key = api_key
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._headers = self.build_headers(api_key)
+        # Serwisy złożone w QdrantService współdzielą wstrzyknięty klient (z create_client); samodzielne mają własny
+        self._owns_client = client is None
+        self._client = client if client is not None else self.create_client(self.url, api_key)
+        # Krótkotrwały cache odczytów: klucz -> (wygaśnięcie wg time.monotonic(), wynik)
+        self._cache: Dict[Hashable, Tuple[float, Result]] = {}
+        # Ponawianie przejściowych błędów: liczba prób i bazowe opóźnienie (s) backoffu
+        self._max_attempts = 3
+        self._base_backoff = 0.05
     
-    def _get_headers(self) -> Dict[str, str]:
-        """Zwraca nagłówki HTTP dla żądań do Qdrant"""
+    @staticmethod
+    def build_headers(api_key: Optional[str] = None) -> Dict[str, str]:
+        """Nagłówki HTTP dla żądań do Qdrant"""
         headers = {"Content-Type": "application/json"}
-        if self.api_key:
-            headers["Authorization"] = f"Bearer {self.api_key}"
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
         return headers
     
+    @staticmethod
+    def create_client(url: str, api_key: Optional[str] = None) -> httpx.AsyncClient:
+        """Tworzy klienta HTTP z pulą połączeń dla żądań do Qdrant; adres bazowy i nagłówki są ustawione raz na kliencie"""
+        return build_async_client(
+            base_url=url.rstrip('/'),
+            headers=BaseQdrantService.build_headers(api_key),
+            timeout=30.0,
+            max_connections=100,
+            max_keepalive_connections=32,
+            keepalive_expiry=_KEEPALIVE_EXPIRY
+        )
+    
+    @staticmethod
+    def get_shared_client(url: str, api_key: Optional[str] = None) -> httpx.AsyncClient:
+        """Klient z create_client współdzielony w procesie dla pary (adres, klucz API); zamyka go close_shared_clients()"""
+        url = url.rstrip('/')
+        return shared_client(("qdrant", url, credential_fingerprint(api_key)), lambda: BaseQdrantService.create_client(url, api_key))
+    
+    async def aclose(self):
+        """Zamyka klienta HTTP, jeśli należy do tego serwisu"""
+        if self._owns_client:
+            await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+    
+    def _get_headers(self) -> Dict[str, str]:
+        """Zwraca nagłówki HTTP dla żądań do Qdrant"""
+        return self._headers
+    
     async def _make_request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Result[Dict[str, Any], str]:
         """Wykonuje żądanie HTTP do API Qdrant"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                url = f"{self.url}{endpoint}"
-                headers = self._get_headers()
+            method = method.upper()
+            if method not in self._METHODS:
+                return Result.error(f"Unsupported HTTP method: {method}")
+            
+            # Adres bazowy i nagłówki (Content-Type, Authorization) są ustawione na kliencie
+            body = json_codec.dumps(data) if data is not None else None
+            retryable = method in self._IDEMPOTENT_METHODS or endpoint.endswith(self._IDEMPOTENT_POST_SUFFIXES)
+            last_attempt = self._max_attempts - 1 if retryable else 0
+            
+            for attempt in range(last_attempt + 1):
+                try:
+                    response = await self._client.request(method, endpoint, content=body)
+                except (httpx.TimeoutException, httpx.ConnectError):
+                    if attempt == last_attempt:
+                        raise
+                    await asyncio.sleep(self._backoff_delay(attempt))
+                    continue
                 
-                if method.upper() == "GET":
-                    response = await client.get(url, headers=headers)
-                elif method.upper() == "POST":
-                    response = await client.post(url, headers=headers, json=data)
-                elif method.upper() == "PUT":
-                    response = await client.put(url, headers=headers, json=data)
-                elif method.upper() == "DELETE":
-                    response = await client.delete(url, headers=headers)
-                else:
-                    return Result.error(f"Unsupported HTTP method: {method}")
+                if response.status_code not in _RETRY_STATUS_CODES or attempt == last_attempt:
+                    break
+                await asyncio.sleep(self._backoff_delay(attempt, response.headers.get("Retry-After")))
+            
+            if response.status_code in [200, 201]:
+                return Result.success(json_codec.loads(response.content))
+            else:
+                error_msg = f"HTTP {response.status_code}: {response.text}"
+                self.logger.error("Qdrant API error: %s", error_msg)
+                return Result.error(error_msg)
                 
-                if response.status_code in [200, 201]:
-                    return Result.success(response.json())
-                else:
-                    error_msg = f"HTTP {response.status_code}: {response.text}"
-                    self.logger.error(f"Qdrant API error: {error_msg}")
-                    return Result.error(error_msg)
-                    
         except httpx.TimeoutException:
             error_msg = "Qdrant request timeout"
             self.logger.error(error_msg)
@@ -57,10 +153,83 @@ class BaseQdrantService:  # Klasa bazowa z wspólną funkcjonalnością
             self.logger.error(error_msg)
             return Result.error(error_msg)
     
+    async def _call(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict[str, Any]] = None,
+        ok_log: Optional[Tuple[Any, ...]] = None,
+        err_log: Optional[str] = None,
+        extract: Optional[Callable[[Any], Any]] = None,
+        cache_key: Optional[Hashable] = None
+    ) -> Result:
+        """Wykonuje żądanie i obsługuje wynik przez _handle; z cache_key odpowiedź idzie przez _cached_get"""
+        if cache_key is None:
+            result = await self._make_request(method, endpoint, data)
+        else:
+            result = await self._cached_get(cache_key, lambda: self._make_request(method, endpoint, data))
+        return self._handle(result, ok_log, err_log, extract)
+    
+    def _handle(
+        self,
+        result: Result,
+        ok_log: Optional[Tuple[Any, ...]] = None,
+        err_log: Optional[str] = None,
+        extract: Optional[Callable[[Any], Any]] = None
+    ) -> Result:
+        """Wspólna obsługa wyniku: ok_log to (format, *args) dla logger.info, err_log to prefiks błędu"""
+        if result.is_error:
+            if err_log is not None:
+                self.logger.error("%s: %s", err_log, result.error)
+            return result
+        
+        if ok_log is not None:
+            self.logger.info(*ok_log)
+        return Result.success(extract(result.value)) if extract is not None else result
+    
+    @staticmethod
+    def _result_of(value: Dict[str, Any]) -> Any:
+        """Pole "result" odpowiedzi Qdrant"""
+        return value.get("result", {})
+    
+    @staticmethod
+    def _discard(value: Any) -> None:
+        """Ekstraktor dla operacji, które nie zwracają wartości"""
+        return None
+    
+    def _backoff_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Wykładniczy backoff z jitterem; Retry-After (w sekundach) ma pierwszeństwo"""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), _MAX_BACKOFF)
+            except ValueError:
+                pass
+        return min(self._base_backoff * 2 ** attempt + random.random() * 0.05, _MAX_BACKOFF)
+    
+    async def _cached_get(self, key: Hashable, factory: Callable[[], Awaitable[Result]]) -> Result:
+        """Zwraca wynik z cache (TTL _CACHE_TTL) albo wywołuje factory; cache'owane są tylko sukcesy"""
+        entry = self._cache.get(key)
+        if entry is not None and time.monotonic() < entry[0]:
+            return entry[1]
+        
+        result = await factory()
+        if result.is_success:
+            self._cache.pop(key, None)
+            if len(self._cache) >= _CACHE_MAX_ENTRIES:
+                # Najstarszy wpis jest pierwszy w kolejności wstawiania
+                del self._cache[next(iter(self._cache))]
+            self._cache[key] = (time.monotonic() + _CACHE_TTL, result)
+        return result
+    
+    def _invalidate_cache(self, *keys: Hashable):
+        """Usuwa wpisy z cache odczytów"""
+        for key in keys:
+            self._cache.pop(key, None)
+    
     async def health_check(self) -> Result[dict, str]:
         """Sprawdza stan zdrowia serwisu Qdrant"""
         try:
-            result = await self._make_request("GET", "/health")
+            result = await self._make_request("GET", self._EP_HEALTH)
             if result.is_success:
                 health_data = {
                     'status': 'healthy',
@@ -72,18 +241,32 @@ class BaseQdrantService:  # Klasa bazowa z wspólną funkcjonalnością
             else:
                 return Result.error(f"Health check failed: {result.error}")
         except Exception as e:
-            self.logger.error(f"Health check failed: {e}")
+            self.logger.error("Health check failed: %s", e)
             return Result.error(f"Health check failed: {str(e)}")
     
     def _validate_collection_name(self, collection_name: str) -> bool:
         """Waliduje format nazwy kolekcji"""
         if not collection_name or not isinstance(collection_name, str):
             return False
-        # Nazwy kolekcji Qdrant powinny być alfanumeryczne z podkreśleniami
-        return collection_name.replace('_', '').replace('-', '').isalnum()
+        # Garść nazw kolekcji powtarza się w każdym wywołaniu - wynik z cache
+        return _is_valid_collection_name(collection_name)
     
-    def _validate_vector_dimension(self, vector: List[float]) -> bool:
-        """Waliduje wymiar wektora"""
-        if not vector or not isinstance(vector, list):
-            return False
-        return all(isinstance(x, (int, float)) for x in vector)
+    def _validate_vector_dimension(self, vector: Union[List[float], np.ndarray]) -> bool:
+        """Waliduje wektor: tablice numpy po dtype, listy jedną konwersją w C zamiast isinstance per element"""
+        return self._vector_array(vector) is not None
+    
+    def _vector_array(self, vector: Union[List[float], np.ndarray]) -> Optional[np.ndarray]:
+        """Zwraca wektor jako 1-D tablicę numpy (lista konwertowana raz) albo None, gdy wektor jest nieprawidłowy"""
+        if isinstance(vector, np.ndarray):
+            array, kinds = vector, "fiu"
+        else:
+            if not vector or not isinstance(vector, list):
+                return None
+            try:
+                array, kinds = np.asarray(vector), "fiub"
+            except (ValueError, TypeError):
+                return None
+        # Stringi dają dtype 'U', None i obiekty 'O', zagnieżdżone listy ndim > 1
+        if array.ndim != 1 or array.size == 0 or array.dtype.kind not in kinds:
+            return None
+        return array
@@ -2,13 +2,21 @@
 from .BaseQdrantService import BaseQdrantService
 from .collection_service import CollectionService
 from .embedding_service import EmbeddingService
+from .grpc_embedding_service import GrpcEmbeddingService
 from .search_service import SearchService
+from .grpc_search_service import GrpcSearchService
 from .monitoring_service import MonitoringService
+from .batch_coalescer import BatchCoalescer
+from .query_cache import QueryCache
 
 __all__ = [
     'BaseQdrantService',
     'CollectionService',
     'EmbeddingService',
+    'GrpcEmbeddingService',
     'SearchService',
-    'MonitoringService'
+    'GrpcSearchService',
+    'MonitoringService',
+    'BatchCoalescer',
+    'QueryCache'
 ]
@@ -0,0 +1,68 @@
+# infrastructure/ai/vector_db/qdrant/batch_coalescer.py
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Set, Tuple
+from domain.utils.result import Result
+
+class BatchCoalescer:
+    """Coalesces concurrent single-item requests into one batched call per key.
+    
+    The first item for a key arms a timer; items submitted for the same key before it
+    fires join the batch, which is flushed when the timer fires or the batch is full.
+    The flush callable receives the key and the items and returns one value per item;
+    a value that is itself a Result is handed to its submitter as is, so single items can fail.
+    """
+    
+    def __init__(
+        self,
+        flush: Callable[[Hashable, List[Any]], Awaitable[Result[List[Any], str]]],
+        max_batch_size: int = 100,
+        max_wait_ms: float = 5.0
+    ):
+        self._flush = flush
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000.0
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def submit(self, key: Hashable, item: Any) -> Result[Any, str]:
+        """Queue an item and wait for its share of the batched result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+        
+        if len(pending) >= self._max_batch_size:
+            self._dispatch(key)
+        elif len(pending) == 1:
+            self._timers[key] = loop.call_later(self._max_wait, self._dispatch, key)
+        return await future
+    
+    def _dispatch(self, key: Hashable):
+        """Send the pending batch for a key"""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(key, None)
+        if batch:
+            task = asyncio.ensure_future(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, key: Hashable, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            result = await self._flush(key, [item for item, _ in batch])
+        except Exception as e:
+            result = Result.error(f"Batch request failed: {str(e)}")
+        if result.is_success and len(result.value) != len(batch):
+            result = Result.error("Batch result count does not match request count")
+        
+        for i, (_, future) in enumerate(batch):
+            # Skip submitters that were cancelled while waiting
+            if future.done():
+                continue
+            if result.is_error:
+                future.set_result(result)
+            else:
+                value = result.value[i]
+                future.set_result(value if isinstance(value, Result) else Result.success(value))
@@ -3,12 +3,22 @@ from typing import List, Dict, Any, Optional
 from domain.utils.result import Result
 from .BaseQdrantService import BaseQdrantService
 
+# Server-side vector quantization configs accepted by create_collection
+_QUANTIZATION_CONFIGS = {
+    "scalar": {"scalar": {"type": "int8", "always_ram": True}},
+    "binary": {"binary": {"always_ram": True}}
+}
+
 class CollectionService(BaseQdrantService):
     """Service for managing Qdrant collections"""
     
-    async def create_collection(self, collection_name: str, vector_size: int = 384, distance: str = "Cosine") -> Result[None, str]:
-        """Create a new collection if it doesn't exist"""
-        self.logger.info(f"Creating collection: {collection_name}")
+    async def create_collection(self, collection_name: str, vector_size: int = 384, distance: str = "Cosine", quantization: str = "none") -> Result[None, str]:
+        """Create a new collection if it doesn't exist.
+        
+        quantization="scalar" (int8) or "binary" makes Qdrant keep a compact quantized copy
+        of the vectors in RAM for search; the originals are still stored.
+        """
+        self.logger.info("Creating collection: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
@@ -16,7 +26,7 @@ class CollectionService(BaseQdrantService):
         # Check if collection already exists
         exists_result = await self.collection_exists(collection_name)
         if exists_result.is_success and exists_result.value:
-            self.logger.info(f"Collection already exists: {collection_name}")
+            self.logger.info("Collection already exists: %s", collection_name)
             return Result.success(None)
         
         # Ensure vector_size is an integer
@@ -28,96 +38,88 @@ class CollectionService(BaseQdrantService):
         if vector_size <= 0:
             return Result.error(f"Invalid vector size: {vector_size}")
         
+        if quantization != "none" and quantization not in _QUANTIZATION_CONFIGS:
+            return Result.error(f"Invalid quantization: {quantization}")
+        
         data = {
             "vectors": {
                 "size": vector_size,
                 "distance": distance
             }
         }
-        
-        result = await self._make_request("PUT", f"/collections/{collection_name}", data)
-        
-        if result.is_success:
-            self.logger.info(f"Collection created successfully: {collection_name}")
-            return Result.success(None)
-        else:
-            self.logger.error(f"Failed to create collection: {result.error}")
-            return result
+        if quantization != "none":
+            data["quantization_config"] = _QUANTIZATION_CONFIGS[quantization]
+        
+        result = await self._call(
+            "PUT", f"/collections/{collection_name}", data,
+            ok_log=("Collection created successfully: %s", collection_name),
+            err_log="Failed to create collection",
+            extract=self._discard
+        )
+        self._invalidate_cache("collections", ("exists", collection_name))
+        return result
     
     async def delete_collection(self, collection_name: str) -> Result[None, str]:
         """Delete a collection"""
-        self.logger.info(f"Deleting collection: {collection_name}")
+        self.logger.info("Deleting collection: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
         
-        result = await self._make_request("DELETE", f"/collections/{collection_name}")
-        
-        if result.is_success:
-            self.logger.info(f"Collection deleted successfully: {collection_name}")
-            return Result.success(None)
-        else:
-            self.logger.error(f"Failed to delete collection: {result.error}")
-            return result
+        result = await self._call(
+            "DELETE", f"/collections/{collection_name}",
+            ok_log=("Collection deleted successfully: %s", collection_name),
+            err_log="Failed to delete collection",
+            extract=self._discard
+        )
+        self._invalidate_cache("collections", ("exists", collection_name))
+        return result
     
     async def get_collection_info(self, collection_name: str) -> Result[Dict[str, Any], str]:
         """Get collection information"""
-        self.logger.info(f"Getting collection info: {collection_name}")
+        self.logger.info("Getting collection info: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
         
-        result = await self._make_request("GET", f"/collections/{collection_name}")
-        
-        if result.is_success:
-            self.logger.info(f"Collection info retrieved: {collection_name}")
-            return result
-        else:
-            self.logger.error(f"Failed to get collection info: {result.error}")
-            return result
-    
-    async def collection_exists(self, collection_name: str) -> Result[bool, str]:
-        """Check if collection exists"""
-        self.logger.info(f"Checking if collection exists: {collection_name}")
-        
-        if not self._validate_collection_name(collection_name):
-            return Result.error(f"Invalid collection name: {collection_name}")
-        
-        result = await self._make_request("GET", f"/collections/{collection_name}")
-        
-        if result.is_success:
-            self.logger.info(f"Collection exists: {collection_name}")
-            return Result.success(True)
-        else:
-            # If collection doesn't exist, Qdrant returns 404
-            if "404" in str(result.error) or "Not found" in str(result.error):
-                self.logger.info(f"Collection does not exist: {collection_name}")
-                return Result.success(False)
-            else:
-                self.logger.error(f"Error checking collection existence: {result.error}")
-                return result
+        return await self._call(
+            "GET", f"/collections/{collection_name}",
+            ok_log=("Collection info retrieved: %s", collection_name),
+            err_log="Failed to get collection info"
+        )
     
     async def list_collections(self) -> Result[List[str], str]:
         """List all collections"""
         self.logger.info("Listing collections")
         
-        result = await self._make_request("GET", "/collections")
-        
+        result = await self._call(
+            "GET", self._EP_COLLECTIONS,
+            err_log="Failed to list collections",
+            extract=lambda value: [col["name"] for col in value.get("result", {}).get("collections", [])],
+            cache_key="collections"
+        )
         if result.is_success:
-            collections = [col["name"] for col in result.value.get("result", {}).get("collections", [])]
-            self.logger.info(f"Found {len(collections)} collections")
-            return Result.success(collections)
-        else:
-            self.logger.error(f"Failed to list collections: {result.error}")
-            return result
+            self.logger.info("Found %d collections", len(result.value))
+        return result
     
     async def collection_exists(self, collection_name: str) -> Result[bool, str]:
         """Check if collection exists"""
-        self.logger.info(f"Checking if collection exists: {collection_name}")
+        self.logger.info("Checking if collection exists: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
         
+        return await self._cached_get(("exists", collection_name), lambda: self._check_collection_exists(collection_name))
+    
+    async def _check_collection_exists(self, collection_name: str) -> Result[bool, str]:
+        # /exists answers with a bare flag instead of the full collection schema
+        result = await self._make_request("GET", f"/collections/{collection_name}/exists")
+        if result.is_success:
+            return Result.success(bool(result.value.get("result", {}).get("exists")))
+        if not result.error.startswith("HTTP 404"):
+            return result
+        
+        # Qdrant before 1.8 has no /exists route: fall back to the collection info
         result = await self.get_collection_info(collection_name)
         
         if result.is_success:
@@ -129,17 +131,14 @@ class CollectionService(BaseQdrantService):
     
     async def get_collection_stats(self, collection_name: str) -> Result[Dict[str, Any], str]:
         """Get collection statistics"""
-        self.logger.info(f"Getting collection stats: {collection_name}")
+        self.logger.info("Getting collection stats: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
         
-        result = await self._make_request("GET", f"/collections/{collection_name}/stats")
-        
-        if result.is_success:
-            stats = result.value.get("result", {})
-            self.logger.info(f"Collection stats retrieved: {collection_name}")
-            return Result.success(stats)
-        else:
-            self.logger.error(f"Failed to get collection stats: {result.error}")
-            return result
+        return await self._call(
+            "GET", f"/collections/{collection_name}/stats",
+            ok_log=("Collection stats retrieved: %s", collection_name),
+            err_log="Failed to get collection stats",
+            extract=self._result_of
+        )
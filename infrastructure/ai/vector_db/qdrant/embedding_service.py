@@ -1,14 +1,31 @@
 # infrastructure/ai/vector_db/qdrant/embedding_service.py
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, AsyncIterator, Hashable, Optional, Union
+import httpx
 from domain.utils.result import Result
 from .BaseQdrantService import BaseQdrantService
+from .batch_coalescer import BatchCoalescer
+
+# Searches per /points/search/batch request; larger batches are split and sent concurrently
+_SEARCH_BATCH_SIZE = 100
 
 class EmbeddingService(BaseQdrantService):
     """Service for managing embeddings in Qdrant"""
     
-    async def upsert_points(self, collection_name: str, points: List[Dict[str, Any]]) -> Result[None, str]:
-        """Upsert points (vectors with payload) to collection"""
-        self.logger.info(f"Upserting {len(points)} points to collection: {collection_name}")
+    def __init__(self, url: str = "http://localhost:6333", api_key: Optional[str] = None, client: Optional[httpx.AsyncClient] = None, max_wait_ms: float = 5.0):
+        super().__init__(url, api_key, client)
+        # Concurrent single searches/upserts on one collection are sent as one request
+        self._search_coalescer = BatchCoalescer(self._flush_searches, _SEARCH_BATCH_SIZE, max_wait_ms)
+        self._upsert_coalescer = BatchCoalescer(self._flush_upserts, _SEARCH_BATCH_SIZE, max_wait_ms)
+    
+    async def upsert_points(self, collection_name: str, points: List[Dict[str, Any]], trust_input: bool = False) -> Result[None, str]:
+        """Upsert points (vectors with payload) to collection.
+        
+        The points list is sent as is; internal loaders that build well-formed points
+        can pass trust_input=True to skip per-point validation. Vectors may be numpy
+        arrays, including float16/int8 ones, which are encoded without a list round-trip.
+        """
+        self.logger.info("Upserting %d points to collection: %s", len(points), collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
@@ -16,36 +33,37 @@ class EmbeddingService(BaseQdrantService):
         if not points:
             return Result.error("No points provided")
         
-        # Validate points structure
+        if not trust_input:
+            error = self._points_error(points)
+            if error is not None:
+                return Result.error(error)
+        
+        return self._handle(
+            await self._send_upsert(collection_name, points),
+            ok_log=("Successfully upserted %d points to %s", len(points), collection_name),
+            err_log="Failed to upsert points",
+            extract=self._discard
+        )
+    
+    def _points_error(self, points: List[Dict[str, Any]]) -> Optional[str]:
+        """Validate points structure in a single pass; the first problem found, or None"""
+        validate_vector = self._validate_vector_dimension
         for i, point in enumerate(points):
-            if not isinstance(point, dict):
-                return Result.error(f"Point {i} is not a dictionary")
+            try:
+                point["id"]
+                vector = point["vector"]
+            except KeyError as e:
+                return f"Point {i} missing '{e.args[0]}' field"
+            except (TypeError, IndexError):
+                return f"Point {i} is not a dictionary"
             
-            if "id" not in point:
-                return Result.error(f"Point {i} missing 'id' field")
-            
-            if "vector" not in point:
-                return Result.error(f"Point {i} missing 'vector' field")
-            
-            if not self._validate_vector_dimension(point["vector"]):
-                return Result.error(f"Point {i} has invalid vector")
-        
-        data = {
-            "points": points
-        }
-        
-        result = await self._make_request("PUT", f"/collections/{collection_name}/points", data)
-        
-        if result.is_success:
-            self.logger.info(f"Successfully upserted {len(points)} points to {collection_name}")
-            return Result.success(None)
-        else:
-            self.logger.error(f"Failed to upsert points: {result.error}")
-            return result
+            if not validate_vector(vector):
+                return f"Point {i} has invalid vector"
+        return None
     
     async def delete_points(self, collection_name: str, point_ids: List[str]) -> Result[None, str]:
         """Delete points by IDs"""
-        self.logger.info(f"Deleting {len(point_ids)} points from collection: {collection_name}")
+        self.logger.info("Deleting %d points from collection: %s", len(point_ids), collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
@@ -53,22 +71,16 @@ class EmbeddingService(BaseQdrantService):
         if not point_ids:
             return Result.error("No point IDs provided")
         
-        data = {
-            "points": point_ids
-        }
-        
-        result = await self._make_request("POST", f"/collections/{collection_name}/points/delete", data)
-        
-        if result.is_success:
-            self.logger.info(f"Successfully deleted {len(point_ids)} points from {collection_name}")
-            return Result.success(None)
-        else:
-            self.logger.error(f"Failed to delete points: {result.error}")
-            return result
+        return self._handle(
+            await self._send_delete(collection_name, point_ids),
+            ok_log=("Successfully deleted %d points from %s", len(point_ids), collection_name),
+            err_log="Failed to delete points",
+            extract=self._discard
+        )
     
     async def get_points(self, collection_name: str, point_ids: List[str]) -> Result[List[Dict[str, Any]], str]:
         """Get points by IDs"""
-        self.logger.info(f"Getting {len(point_ids)} points from collection: {collection_name}")
+        self.logger.info("Getting %d points from collection: %s", len(point_ids), collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
@@ -82,19 +94,18 @@ class EmbeddingService(BaseQdrantService):
             "with_vector": True
         }
         
-        result = await self._make_request("POST", f"/collections/{collection_name}/points", data)
-        
+        result = await self._call(
+            "POST", f"/collections/{collection_name}/points", data,
+            err_log="Failed to get points",
+            extract=lambda value: value.get("result", [])
+        )
         if result.is_success:
-            points = result.value.get("result", [])
-            self.logger.info(f"Retrieved {len(points)} points from {collection_name}")
-            return Result.success(points)
-        else:
-            self.logger.error(f"Failed to get points: {result.error}")
-            return result
+            self.logger.info("Retrieved %d points from %s", len(result.value), collection_name)
+        return result
     
     async def update_points(self, collection_name: str, points: List[Dict[str, Any]]) -> Result[None, str]:
         """Update points payload"""
-        self.logger.info(f"Updating {len(points)} points in collection: {collection_name}")
+        self.logger.info("Updating %d points in collection: %s", len(points), collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
@@ -117,18 +128,16 @@ class EmbeddingService(BaseQdrantService):
             "points": points
         }
         
-        result = await self._make_request("POST", f"/collections/{collection_name}/points/payload", data)
-        
-        if result.is_success:
-            self.logger.info(f"Successfully updated {len(points)} points in {collection_name}")
-            return Result.success(None)
-        else:
-            self.logger.error(f"Failed to update points: {result.error}")
-            return result
+        return await self._call(
+            "POST", f"/collections/{collection_name}/points/payload", data,
+            ok_log=("Successfully updated %d points in %s", len(points), collection_name),
+            err_log="Failed to update points",
+            extract=self._discard
+        )
     
     async def scroll_points(self, collection_name: str, limit: int = 10, offset: Optional[str] = None) -> Result[Dict[str, Any], str]:
         """Scroll through points in collection"""
-        self.logger.info(f"Scrolling points in collection: {collection_name}, limit: {limit}")
+        self.logger.info("Scrolling points in collection: %s, limit: %s", collection_name, limit)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
@@ -142,13 +151,104 @@ class EmbeddingService(BaseQdrantService):
         if offset:
             data["offset"] = offset
         
-        result = await self._make_request("POST", f"/collections/{collection_name}/points/scroll", data)
-        
+        result = await self._call(
+            "POST", f"/collections/{collection_name}/points/scroll", data,
+            err_log="Failed to scroll points",
+            extract=self._result_of
+        )
         if result.is_success:
-            scroll_result = result.value.get("result", {})
-            points_count = len(scroll_result.get("points", []))
-            self.logger.info(f"Scrolled {points_count} points from {collection_name}")
-            return Result.success(scroll_result)
-        else:
-            self.logger.error(f"Failed to scroll points: {result.error}")
-            return result
+            self.logger.info("Scrolled %s points from %s", len(result.value.get("points", [])), collection_name)
+        return result
+    
+    async def scroll_points_iter(self, collection_name: str, batch_size: int = 256, with_vector: bool = False) -> AsyncIterator[Result[Dict[str, Any], str]]:
+        """Yield every point in a collection, fetching the next page while the current one is consumed"""
+        self.logger.info("Iterating points in collection: %s, batch size: %s", collection_name, batch_size)
+        
+        if not self._validate_collection_name(collection_name):
+            yield Result.error(f"Invalid collection name: {collection_name}")
+            return
+        
+        task = asyncio.ensure_future(self._scroll_page(collection_name, batch_size, None, with_vector))
+        try:
+            while task is not None:
+                result = await task
+                if result.is_error:
+                    self.logger.error("Failed to scroll points: %s", result.error)
+                    yield result
+                    return
+                
+                page = result.value.get("result", {})
+                next_offset = page.get("next_page_offset")
+                # Request page N+1 before handing out page N
+                task = None
+                if next_offset is not None:
+                    task = asyncio.ensure_future(self._scroll_page(collection_name, batch_size, next_offset, with_vector))
+                
+                for point in page.get("points", []):
+                    yield Result.success(point)
+        finally:
+            # Consumer stopped early: drop the prefetched page
+            if task is not None and not task.done():
+                task.cancel()
+    
+    async def _scroll_page(self, collection_name: str, limit: int, offset: Optional[Union[str, int]], with_vector: bool) -> Result[Dict[str, Any], str]:
+        data = {
+            "limit": limit,
+            "with_payload": True,
+            "with_vector": with_vector
+        }
+        if offset is not None:
+            data["offset"] = offset
+        return await self._make_request("POST", f"/collections/{collection_name}/points/scroll", data)
+    
+    async def search_batch(self, collection_name: str, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        """Run several searches in one /points/search/batch call (split into concurrent sub-batches when large)"""
+        self.logger.info("Batch searching %d queries in collection: %s", len(queries), collection_name)
+        
+        if not self._validate_collection_name(collection_name):
+            return Result.error(f"Invalid collection name: {collection_name}")
+        
+        if not queries:
+            return Result.error("No queries provided")
+        
+        sub_batches = [queries[i:i + _SEARCH_BATCH_SIZE] for i in range(0, len(queries), _SEARCH_BATCH_SIZE)]
+        results = await asyncio.gather(*(self._send_search_batch(collection_name, batch) for batch in sub_batches))
+        
+        batch_results = []
+        for result in results:
+            if result.is_error:
+                self.logger.error("Batch search failed: %s", result.error)
+                return result
+            batch_results.extend(result.value)
+        
+        self.logger.info("Batch search completed: %d result sets", len(batch_results))
+        return Result.success(batch_results)
+    
+    async def search(self, collection_name: str, query: Dict[str, Any]) -> Result[List[Dict[str, Any]], str]:
+        """Single search, sent in one batch with other searches on the same collection issued concurrently"""
+        return await self._search_coalescer.submit(collection_name, query)
+    
+    async def upsert_points_coalesced(self, collection_name: str, points: List[Dict[str, Any]]) -> Result[None, str]:
+        """Upsert points, merged into one request with other upserts to the same collection issued concurrently"""
+        return await self._upsert_coalescer.submit(collection_name, points)
+    
+    # Transport primitives (overridden by GrpcEmbeddingService)
+    async def _send_upsert(self, collection_name: str, points: List[Dict[str, Any]]) -> Result[Any, str]:
+        return await self._make_request("PUT", f"/collections/{collection_name}/points", {"points": points})
+    
+    async def _send_delete(self, collection_name: str, point_ids: List[str]) -> Result[Any, str]:
+        return await self._make_request("POST", f"/collections/{collection_name}/points/delete", {"points": point_ids})
+    
+    async def _send_search_batch(self, collection_name: str, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        result = await self._make_request("POST", f"/collections/{collection_name}/points/search/batch", {"searches": queries})
+        return result.map(lambda value: value.get("result", []))
+    
+    async def _flush_searches(self, collection_name: Hashable, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        return await self.search_batch(collection_name, queries)
+    
+    async def _flush_upserts(self, collection_name: Hashable, point_groups: List[List[Dict[str, Any]]]) -> Result[List[Result[None, str]], str]:
+        # Each caller's group is validated on its own, so a bad point fails only the caller that sent it
+        errors = [self._points_error(points) if points else "No points provided" for points in point_groups]
+        valid_points = [point for points, error in zip(point_groups, errors) if error is None for point in points]
+        sent = await self.upsert_points(collection_name, valid_points, trust_input=True) if valid_points else None
+        return Result.success([Result.error(error) if error is not None else sent for error in errors])
\ No newline at end of file
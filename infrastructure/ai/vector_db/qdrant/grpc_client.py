@@ -0,0 +1,69 @@
+# infrastructure/ai/vector_db/qdrant/grpc_client.py
+from typing import Any, Dict, List, Optional
+import numpy as np
+from infrastructure.utils.http_client import credential_fingerprint, shared_client
+
+try:
+    from qdrant_client import AsyncQdrantClient, models
+except ImportError:
+    AsyncQdrantClient = None
+    models = None
+
+# Concurrent HTTP/2 streams allowed on the gRPC channel (one per in-flight call)
+_GRPC_POOL_SIZE = 100
+# Keepalive pings stop idle channels from being dropped by proxies and load balancers
+_GRPC_KEEPALIVE_MS = 30000
+
+
+def create_grpc_client(url: str, api_key: Optional[str] = None, grpc_port: int = 6334, pool_size: int = _GRPC_POOL_SIZE) -> "AsyncQdrantClient":
+    """Create a qdrant-client AsyncQdrantClient talking gRPC over one long-lived multiplexed channel"""
+    if AsyncQdrantClient is None:
+        raise ImportError("qdrant-client is not installed. Please install it with: pip install qdrant-client")
+
+    return AsyncQdrantClient(
+        url=url,
+        api_key=api_key,
+        grpc_port=grpc_port,
+        prefer_grpc=True,
+        grpc_options={
+            "grpc.max_concurrent_streams": pool_size,
+            "grpc.keepalive_time_ms": _GRPC_KEEPALIVE_MS
+        }
+    )
+
+
+
+def get_shared_grpc_client(url: str, api_key: Optional[str] = None, grpc_port: int = 6334) -> "AsyncQdrantClient":
+    """gRPC client shared by the whole process per (url, port, API key); closed by close_shared_clients()"""
+    key = ("qdrant-grpc", url.rstrip('/'), grpc_port, credential_fingerprint(api_key))
+    return shared_client(key, lambda: create_grpc_client(url, api_key, grpc_port))
+
+def to_float_list(vector: Any) -> List[float]:
+    """Plain float list for protobuf conversion (accepts numpy arrays and int components)"""
+    return np.asarray(vector, dtype=np.float32).tolist()
+
+
+def to_query_request(query: Dict[str, Any]) -> "models.QueryRequest":
+    """Map a REST search body onto a query request with its vector as the query"""
+    return models.QueryRequest(query=to_float_list(query["vector"]), **{key: value for key, value in query.items() if key != "vector"})
+
+
+def to_query_requests(queries: List[Dict[str, Any]]) -> List["models.QueryRequest"]:
+    """Map REST search bodies onto query requests; a filter dict shared by several bodies is parsed once"""
+    parsed_filters: Dict[int, "models.Filter"] = {}
+    requests = []
+    for query in queries:
+        query_filter = query.get("filter")
+        if isinstance(query_filter, dict):
+            parsed = parsed_filters.get(id(query_filter))
+            if parsed is None:
+                parsed = parsed_filters[id(query_filter)] = models.Filter.model_validate(query_filter)
+            query = {**query, "filter": parsed}
+        requests.append(to_query_request(query))
+    return requests
+
+
+async def query_batch(grpc_client: "AsyncQdrantClient", collection_name: str, requests: List["models.QueryRequest"]) -> List[List[Dict[str, Any]]]:
+    """Run query requests in one gRPC call; result sets have the same shape as the HTTP API's"""
+    responses = await grpc_client.query_batch_points(collection_name, requests=requests)
+    return [[point.model_dump() for point in response.points] for response in responses]
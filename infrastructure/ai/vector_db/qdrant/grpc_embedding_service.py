@@ -0,0 +1,52 @@
+# infrastructure/ai/vector_db/qdrant/grpc_embedding_service.py
+from typing import List, Dict, Any, Optional
+import httpx
+from domain.utils.result import Result
+from .embedding_service import EmbeddingService
+from .grpc_client import AsyncQdrantClient, models, create_grpc_client, query_batch, to_float_list, to_query_requests
+
+class GrpcEmbeddingService(EmbeddingService):
+    """EmbeddingService sending upserts, deletes and batch searches over gRPC.
+    
+    Protobuf messages are smaller and cheaper to encode than JSON, and gRPC multiplexes
+    calls over one HTTP/2 connection. Validation, sub-batching and request coalescing are
+    inherited unchanged; every other operation still goes over the HTTP API.
+    """
+    
+    def __init__(self, url: str = "http://localhost:6333", api_key: Optional[str] = None, client: Optional[httpx.AsyncClient] = None, max_wait_ms: float = 5.0, grpc_port: int = 6334, grpc_client: Optional["AsyncQdrantClient"] = None):
+        super().__init__(url, api_key, client, max_wait_ms)
+        # Like the HTTP client, an injected gRPC client is shared and closed by its owner
+        self._owns_grpc_client = grpc_client is None
+        self._grpc_client = grpc_client if grpc_client is not None else create_grpc_client(self.url, api_key, grpc_port)
+    
+    async def aclose(self):
+        """Close the gRPC channel and the HTTP client if this service owns them"""
+        if self._owns_grpc_client:
+            await self._grpc_client.close()
+        await super().aclose()
+    
+    async def _send_upsert(self, collection_name: str, points: List[Dict[str, Any]]) -> Result[Any, str]:
+        try:
+            await self._grpc_client.upsert(
+                collection_name,
+                points=[
+                    models.PointStruct(id=point["id"], vector=to_float_list(point["vector"]), payload=point.get("payload"))
+                    for point in points
+                ]
+            )
+            return Result.success(None)
+        except Exception as e:
+            return Result.error(f"gRPC upsert failed: {str(e)}")
+    
+    async def _send_delete(self, collection_name: str, point_ids: List[str]) -> Result[Any, str]:
+        try:
+            await self._grpc_client.delete(collection_name, points_selector=models.PointIdsList(points=point_ids))
+            return Result.success(None)
+        except Exception as e:
+            return Result.error(f"gRPC delete failed: {str(e)}")
+    
+    async def _send_search_batch(self, collection_name: str, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        try:
+            return Result.success(await query_batch(self._grpc_client, collection_name, to_query_requests(queries)))
+        except Exception as e:
+            return Result.error(f"gRPC batch search failed: {str(e)}")
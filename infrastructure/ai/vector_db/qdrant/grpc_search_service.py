@@ -0,0 +1,51 @@
+# infrastructure/ai/vector_db/qdrant/grpc_search_service.py
+from typing import List, Dict, Any, Optional
+import httpx
+from domain.utils.result import Result
+from domain.services.ITextCleanerService import ITextCleanerService
+from .search_service import SearchService
+from .grpc_client import AsyncQdrantClient, models, create_grpc_client, query_batch, to_query_request, to_query_requests
+
+class GrpcSearchService(SearchService):
+    """SearchService sending searches, batch searches and recommendations over gRPC.
+    
+    Concurrent searches are multiplexed as streams on one long-lived HTTP/2 channel and
+    neither side parses JSON. Validation and result conversion are inherited unchanged.
+    """
+    
+    def __init__(self, url: str, api_key: Optional[str] = None, text_cleaner_service: Optional[ITextCleanerService] = None, client: Optional[httpx.AsyncClient] = None, coalesce_window_ms: float = 2.0, query_cache_size: int = 1000, query_cache_ttl: float = 60.0, grpc_port: int = 6334, grpc_client: Optional["AsyncQdrantClient"] = None):
+        super().__init__(url, api_key, text_cleaner_service, client, coalesce_window_ms, query_cache_size, query_cache_ttl)
+        # Like the HTTP client, an injected gRPC client is shared and closed by its owner
+        self._owns_grpc_client = grpc_client is None
+        self._grpc_client = grpc_client if grpc_client is not None else create_grpc_client(self.url, api_key, grpc_port)
+    
+    async def aclose(self):
+        """Close the gRPC channel and the HTTP client if this service owns them"""
+        if self._owns_grpc_client:
+            await self._grpc_client.close()
+        await super().aclose()
+    
+    async def _send_search(self, collection_name: str, query: Dict[str, Any]) -> Result[List[Dict[str, Any]], str]:
+        try:
+            result_sets = await query_batch(self._grpc_client, collection_name, [to_query_request(query)])
+            return Result.success(result_sets[0])
+        except Exception as e:
+            return Result.error(f"gRPC search failed: {str(e)}")
+    
+    async def _send_search_batch(self, collection_name: str, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        try:
+            return Result.success(await query_batch(self._grpc_client, collection_name, to_query_requests(queries)))
+        except Exception as e:
+            return Result.error(f"gRPC batch search failed: {str(e)}")
+    
+    async def _send_recommend(self, collection_name: str, query: Dict[str, Any]) -> Result[List[Dict[str, Any]], str]:
+        try:
+            recommend = models.RecommendInput(positive=query["positive"], negative=query.get("negative"))
+            request = models.QueryRequest(
+                query=models.RecommendQuery(recommend=recommend),
+                **{key: value for key, value in query.items() if key not in ("positive", "negative")}
+            )
+            result_sets = await query_batch(self._grpc_client, collection_name, [request])
+            return Result.success(result_sets[0])
+        except Exception as e:
+            return Result.error(f"gRPC recommendation failed: {str(e)}")
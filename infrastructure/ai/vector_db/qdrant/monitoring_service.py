@@ -1,4 +1,7 @@
 # infrastructure/ai/vector_db/qdrant/monitoring_service.py
+import asyncio
+import time
+import numpy as np
 from typing import Dict, Any, List
 from domain.utils.result import Result
 from .BaseQdrantService import BaseQdrantService
@@ -10,44 +13,38 @@ class MonitoringService(BaseQdrantService):
         """Get cluster information"""
         self.logger.info("Getting cluster information")
         
-        result = await self._make_request("GET", "/cluster")
-        
-        if result.is_success:
-            cluster_info = result.value.get("result", {})
-            self.logger.info("Cluster information retrieved")
-            return Result.success(cluster_info)
-        else:
-            self.logger.error(f"Failed to get cluster info: {result.error}")
-            return result
+        return await self._call(
+            "GET", self._EP_CLUSTER,
+            ok_log=("Cluster information retrieved",),
+            err_log="Failed to get cluster info",
+            extract=self._result_of
+        )
     
     async def get_telemetry(self) -> Result[Dict[str, Any], str]:
         """Get telemetry data"""
         self.logger.info("Getting telemetry data")
         
-        result = await self._make_request("GET", "/telemetry")
-        
-        if result.is_success:
-            telemetry = result.value.get("result", {})
-            self.logger.info("Telemetry data retrieved")
-            return Result.success(telemetry)
-        else:
-            self.logger.error(f"Failed to get telemetry: {result.error}")
-            return result
+        return await self._call(
+            "GET", self._EP_TELEMETRY,
+            ok_log=("Telemetry data retrieved",),
+            err_log="Failed to get telemetry",
+            extract=self._result_of
+        )
     
     async def get_collection_metrics(self, collection_name: str) -> Result[Dict[str, Any], str]:
         """Get collection metrics"""
-        self.logger.info(f"Getting metrics for collection: {collection_name}")
+        self.logger.info("Getting metrics for collection: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
         
-        # Get collection stats
-        stats_result = await self._make_request("GET", f"/collections/{collection_name}/stats")
+        # Get collection stats and info concurrently
+        stats_result, info_result = await asyncio.gather(
+            self._make_request("GET", f"/collections/{collection_name}/stats"),
+            self._make_request("GET", f"/collections/{collection_name}")
+        )
         if stats_result.is_error:
             return stats_result
-        
-        # Get collection info
-        info_result = await self._make_request("GET", f"/collections/{collection_name}")
         if info_result.is_error:
             return info_result
         
@@ -58,25 +55,24 @@ class MonitoringService(BaseQdrantService):
             "timestamp": self._get_timestamp()
         }
         
-        self.logger.info(f"Metrics retrieved for collection: {collection_name}")
+        self.logger.info("Metrics retrieved for collection: %s", collection_name)
         return Result.success(metrics)
     
     async def get_system_metrics(self) -> Result[Dict[str, Any], str]:
         """Get system-wide metrics"""
         self.logger.info("Getting system metrics")
         
-        # Get cluster info
-        cluster_result = await self.get_cluster_info()
+        # Cluster info, telemetry and the collections list (for the count) are independent
+        cluster_result, telemetry_result, collections_result = await asyncio.gather(
+            self.get_cluster_info(),
+            self.get_telemetry(),
+            self._cached_get("collections", lambda: self._make_request("GET", self._EP_COLLECTIONS))
+        )
         if cluster_result.is_error:
             return cluster_result
-        
-        # Get telemetry
-        telemetry_result = await self.get_telemetry()
         if telemetry_result.is_error:
             return telemetry_result
         
-        # List collections to get count
-        collections_result = await self._make_request("GET", "/collections")
         collections_count = 0
         if collections_result.is_success:
             collections_count = len(collections_result.value.get("result", {}).get("collections", []))
@@ -93,17 +89,15 @@ class MonitoringService(BaseQdrantService):
     
     async def check_performance(self, collection_name: str, test_queries: int = 5) -> Result[Dict[str, Any], str]:
         """Check collection performance with test queries"""
-        self.logger.info(f"Checking performance for collection: {collection_name}")
+        self.logger.info("Checking performance for collection: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Invalid collection name: {collection_name}")
         
-        import time
-        
-        # Generate test vectors
-        test_vectors = [[0.1] * 384 for _ in range(test_queries)]
+        # Generate test vectors as one contiguous array; rows are encoded directly by json_codec
+        test_vectors = np.full((test_queries, 384), 0.1, dtype=np.float32)
         
-        start_time = time.time()
+        start = time.perf_counter_ns()
         
         # Perform batch search
         search_result = await self._make_request("POST", f"/collections/{collection_name}/points/search/batch", {
@@ -118,21 +112,23 @@ class MonitoringService(BaseQdrantService):
             ]
         })
         
-        end_time = time.time()
+        end = time.perf_counter_ns()
         
         if search_result.is_error:
             return search_result
         
+        # Monotonic, nanosecond clock: immune to wall-clock jumps and precise for sub-ms calls
+        total_ms = (end - start) / 1e6
         performance_metrics = {
             "collection_name": collection_name,
             "test_queries": test_queries,
-            "total_time_ms": (end_time - start_time) * 1000,
-            "avg_time_per_query_ms": ((end_time - start_time) * 1000) / test_queries,
-            "queries_per_second": test_queries / (end_time - start_time),
+            "total_time_ms": total_ms,
+            "avg_time_per_query_ms": total_ms / test_queries,
+            "queries_per_second": test_queries / (total_ms / 1000) if total_ms else 0.0,
             "timestamp": self._get_timestamp()
         }
         
-        self.logger.info(f"Performance check completed for {collection_name}: {performance_metrics['avg_time_per_query_ms']:.2f}ms per query")
+        self.logger.info("Performance check completed for %s: %.2fms per query", collection_name, performance_metrics["avg_time_per_query_ms"])
         return Result.success(performance_metrics)
     
     async def get_health_summary(self) -> Result[Dict[str, Any], str]:
@@ -140,18 +136,17 @@ class MonitoringService(BaseQdrantService):
         self.logger.info("Getting health summary")
         
         try:
-            # Basic health check
-            health_result = await self.health_check()
+            # Health check, system metrics and collections list run concurrently
+            health_result, system_result, collections_result = await asyncio.gather(
+                self.health_check(),
+                self.get_system_metrics(),
+                self._cached_get("collections", lambda: self._make_request("GET", self._EP_COLLECTIONS))
+            )
             if health_result.is_error:
                 return health_result
-            
-            # Get system metrics
-            system_result = await self.get_system_metrics()
             if system_result.is_error:
                 return system_result
             
-            # Get collections list
-            collections_result = await self._make_request("GET", "/collections")
             collections = []
             if collections_result.is_success:
                 collections = [col["name"] for col in collections_result.value.get("result", {}).get("collections", [])]
@@ -165,11 +160,11 @@ class MonitoringService(BaseQdrantService):
                 "timestamp": self._get_timestamp()
             }
             
-            self.logger.info(f"Health summary generated: {len(collections)} collections")
+            self.logger.info("Health summary generated: %d collections", len(collections))
             return Result.success(health_summary)
             
         except Exception as e:
-            self.logger.error(f"Failed to get health summary: {e}")
+            self.logger.error("Failed to get health summary: %s", e)
             return Result.error(f"Failed to get health summary: {str(e)}")
     
     def _get_timestamp(self) -> str:
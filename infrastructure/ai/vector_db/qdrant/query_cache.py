@@ -0,0 +1,69 @@
+# infrastructure/ai/vector_db/qdrant/query_cache.py
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import numpy as np
+from infrastructure.utils import json_codec
+
+class QueryCache:
+    """LRU cache of search results with a TTL bounding how stale a hit can be.
+    
+    Keys hash the float32 bytes of the query vector, so numerically identical queries
+    hit regardless of whether they arrived as a list or an array.
+    """
+    
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 60.0):
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+        # key -> (expiry by time.monotonic(), value); most recently used last
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(collection_name: str, query_vector: np.ndarray, limit: int, score_threshold: Optional[float] = None,
+                 filter_conditions: Optional[Dict[str, Any]] = None, offset: int = 0) -> Hashable:
+        """Cache key for a search; the filter is canonicalized with sorted keys"""
+        digest = hashlib.blake2b(np.ascontiguousarray(query_vector, dtype=np.float32).tobytes(), digest_size=16).digest()
+        filter_key = json_codec.dumps(filter_conditions, sort_keys=True) if filter_conditions else None
+        return (collection_name, digest, limit, offset, score_threshold, filter_key)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None on a miss or an expired entry"""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+    
+    def invalidate(self, collection_name: Optional[str] = None):
+        """Drop the entries of one collection, or all entries"""
+        if collection_name is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == collection_name]:
+            del self._entries[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "max_entries": self._max_entries
+        }
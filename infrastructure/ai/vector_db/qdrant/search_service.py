@@ -1,35 +1,97 @@
 # infrastructure/ai/vector_db/qdrant/search_service.py
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional, AsyncIterator
+import httpx
+import numpy as np
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable, Hashable, Tuple, Union
 from domain.entities.rag_chunk import RAGChunk
 from domain.utils.result import Result
 from .BaseQdrantService import BaseQdrantService
+from .batch_coalescer import BatchCoalescer
+from .query_cache import QueryCache
+from infrastructure.utils import json_codec
 from infrastructure.ai.embeddings.IEmbeddingService import IEmbeddingService
 from domain.services.ITextCleanerService import ITextCleanerService
 
+# Searches per coalesced /points/search/batch request
+_COALESCE_BATCH_SIZE = 100
+# Results fetched by stream_search before the consumer asks for more
+_STREAM_FIRST_PAGE = 5
+# Queries per concurrently sent sub-batch in stream_batch_search
+_STREAM_CHUNK_SIZE = 10
+# One filter for every query of a batch, or one (or None) per query
+_BatchFilters = Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]
+# Concurrent text_cleaner_service.clean_text calls per search
+_CLEAN_CONCURRENCY = 16
+# Fallback query vectors by size, built once and shared (read-only)
+_DUMMY_VECTORS: Dict[int, np.ndarray] = {}
+
+def _akcja_field(field: str) -> Callable[[Dict[str, Any]], Any]:
+    """Extractor for the Polish payload structure: payload.Akcja.<field>"""
+    def extract(payload: Dict[str, Any]) -> Any:
+        akcja = payload.get("Akcja")
+        return akcja.get(field) if isinstance(akcja, dict) else None
+    return extract
+
+# Where payloads keep their text, in priority order
+_TEXT_EXTRACTORS: Tuple[Callable[[Dict[str, Any]], Any], ...] = (
+    lambda payload: payload.get("text"),
+    _akcja_field("Payload"),
+    _akcja_field("Temat"),
+)
+
 class SearchService(BaseQdrantService):
     """Service for searching vectors in Qdrant"""
     
-    def __init__(self, url: str, api_key: Optional[str] = None, text_cleaner_service: Optional[ITextCleanerService] = None):
-        super().__init__(url, api_key)
+    def __init__(self, url: str, api_key: Optional[str] = None, text_cleaner_service: Optional[ITextCleanerService] = None, client: Optional[httpx.AsyncClient] = None, coalesce_window_ms: float = 2.0,
+                 query_cache_size: int = 1000, query_cache_ttl: float = 60.0):
+        super().__init__(url, api_key, client)
         self.text_cleaner_service = text_cleaner_service
+        # Concurrent search_vectors calls on one collection within the window go out as one batch search;
+        # coalesce_window_ms=0 sends every search on its own
+        self._search_coalescer = BatchCoalescer(self._flush_searches, _COALESCE_BATCH_SIZE, coalesce_window_ms) if coalesce_window_ms > 0 else None
+        # Results of repeated identical searches; query_cache_size=0 disables the cache
+        self._query_cache = QueryCache(query_cache_size, query_cache_ttl) if query_cache_size > 0 else None
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Query cache hit/miss statistics"""
+        return self._query_cache.stats() if self._query_cache is not None else {"enabled": False}
     
-    async def search_vectors(self, collection_name: str, query_vector: List[float], limit: int = 5, 
-                           score_threshold: Optional[float] = None, filter_conditions: Optional[Dict[str, Any]] = None) -> Result[List[Dict[str, Any]], str]:
-        """Search for similar vectors"""
-        self.logger.info(f"Searching vectors in collection: {collection_name}, limit: {limit}")
+    def clear_query_cache(self, collection_name: Optional[str] = None):
+        """Drop cached search results (of one collection, or all), e.g. after its points changed"""
+        if self._query_cache is not None:
+            self._query_cache.invalidate(collection_name)
+    
+    async def search_vectors(self, collection_name: str, query_vector: Union[np.ndarray, List[float]], limit: int = 5, 
+                           score_threshold: Optional[float] = None, filter_conditions: Optional[Dict[str, Any]] = None, offset: int = 0) -> Result[List[Dict[str, Any]], str]:
+        """Search for similar vectors (a float32 ndarray is sent as is; a list is converted to one once); offset skips the best matches"""
+        self.logger.info("Searching vectors in collection: %s, limit: %s", collection_name, limit)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Nieprawidłowa nazwa kolekcji: {collection_name}")
         
-        if not self._validate_vector_dimension(query_vector):
+        query_array = self._vector_array(query_vector)
+        if query_array is None:
             return Result.error("Nieprawidłowy wektor zapytania")
         
         if limit <= 0:
             return Result.error(f"Nieprawidłowy limit: {limit}")
         
+        if offset < 0:
+            return Result.error(f"Nieprawidłowy offset: {offset}")
+        
+        query_array = query_array.astype(np.float32, copy=False)
+        cache_key = None
+        if self._query_cache is not None:
+            cache_key = QueryCache.make_key(collection_name, query_array, limit, score_threshold, filter_conditions, offset)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self.logger.info("Found %d results in %s (cached)", len(cached), collection_name)
+                return Result.success(list(cached))
+        
+        # orjson encodes the contiguous float32 buffer directly instead of one Python float at a time
         data = {
-            "vector": query_vector,
+            "vector": query_array,
             "limit": limit,
             "with_payload": True,
             "with_vector": False
@@ -41,146 +103,103 @@ class SearchService(BaseQdrantService):
         if filter_conditions:
             data["filter"] = filter_conditions
         
-        result = await self._make_request("POST", f"/collections/{collection_name}/points/search", data)
+        if offset:
+            data["offset"] = offset
         
-        if result.is_success:
-            search_results = result.value.get("result", [])
-            self.logger.info(f"Found {len(search_results)} results in {collection_name}")
-            return Result.success(search_results)
+        if self._search_coalescer is not None:
+            result = await self._search_coalescer.submit(collection_name, data)
         else:
-            self.logger.error(f"Search failed: {result.error}")
-            return result
+            result = await self._send_search(collection_name, data)
+        
+        result = self._handle(result, err_log="Search failed")
+        if result.is_success:
+            self.logger.info("Found %d results in %s", len(result.value), collection_name)
+            if cache_key is not None:
+                self._query_cache.put(cache_key, list(result.value))
+        return result
     
     async def search_by_text(self, collection_name: str, query_text: str, limit: int = 5, 
                            score_threshold: Optional[float] = None, vector_size: int = 1024, embedding_service=None) -> Result[List[RAGChunk], str]:
         """Search by text using embedding service"""
         self.logger.info("=" * 80)
-        self.logger.info(f"🔍 SEARCH SERVICE: search_by_text")
-        self.logger.info(f"   Collection: {collection_name}")
-        self.logger.info(f"   Query: '{query_text[:100]}...'")
-        self.logger.info(f"   Limit: {limit}")
-        self.logger.info(f"   Score threshold: {score_threshold}")
-        self.logger.info(f"   Embedding service: {type(embedding_service).__name__ if embedding_service else 'None'}")
+        self.logger.info("🔍 SEARCH SERVICE: search_by_text")
+        self.logger.info("   Collection: %s", collection_name)
+        self.logger.info("   Query: '%.100s...'", query_text)
+        self.logger.info("   Limit: %s", limit)
+        self.logger.info("   Score threshold: %s", score_threshold)
+        self.logger.info("   Embedding service: %s", type(embedding_service).__name__ if embedding_service else "None")
         self.logger.info("=" * 80)
         
         # Try to get real embedding if embedding service is available
         if embedding_service:
-            self.logger.info(f"✅ Embedding service dostępny: {type(embedding_service).__name__}")
+            self.logger.info("✅ Embedding service dostępny: %s", type(embedding_service).__name__)
             
             try:
-                self.logger.info(f"📤 Tworzę embedding dla zapytania: '{query_text[:100]}...'")
+                self.logger.info("📤 Tworzę embedding dla zapytania: '%.100s...'", query_text)
                 embedding_result = await embedding_service.create_embedding(query_text)
                 
                 if embedding_result.is_success:
                     query_vector = embedding_result.value
-                    self.logger.info(f"✅ Utworzono embedding: {len(query_vector)} wymiarów")
-                    self.logger.info(f"   Przykładowe wartości: {query_vector[:5]}...")
+                    self.logger.info("✅ Utworzono embedding: %d wymiarów", len(query_vector))
+                    self.logger.info("   Przykładowe wartości: %s...", query_vector[:5])
                 else:
-                    self.logger.warning(f"⚠️ Nie udało się utworzyć embedding: {embedding_result.error}")
-                    self.logger.warning(f"   Używam dummy vector!")
-                    query_vector = [0.1] * vector_size
+                    self.logger.warning("⚠️ Nie udało się utworzyć embedding: %s", embedding_result.error)
+                    self.logger.warning("   Używam dummy vector!")
+                    query_vector = _dummy_vector(vector_size)
             except Exception as e:
-                self.logger.error(f"❌ Błąd embedding service: {str(e)}")
+                self.logger.error("❌ Błąd embedding service: %s", e)
                 import traceback
-                self.logger.error(f"❌ Traceback: {traceback.format_exc()}")
-                self.logger.warning(f"   Używam dummy vector!")
-                query_vector = [0.1] * vector_size
+                self.logger.error("❌ Traceback: %s", traceback.format_exc())
+                self.logger.warning("   Używam dummy vector!")
+                query_vector = _dummy_vector(vector_size)
         else:
             self.logger.warning("=" * 80)
             self.logger.warning("⚠️ BRAK EMBEDDING SERVICE - Używam dummy vector!")
             self.logger.warning("   To oznacza, że wyszukiwanie może nie działać poprawnie!")
             self.logger.warning("=" * 80)
-            query_vector = [0.1] * vector_size
+            query_vector = _dummy_vector(vector_size)
         
-        self.logger.info(f"🔎 Rozpoczynam wyszukiwanie wektorowe z {len(query_vector)} wymiarami")
+        self.logger.info("🔎 Rozpoczynam wyszukiwanie wektorowe z %d wymiarami", len(query_vector))
         
         search_result = await self.search_vectors(collection_name, query_vector, limit, score_threshold)
         
         if search_result.is_error:
             self.logger.error("=" * 80)
-            self.logger.error(f"❌ BŁĄD WYSZUKIWANIA WEKTOROWEGO: {search_result.error}")
+            self.logger.error("❌ BŁĄD WYSZUKIWANIA WEKTOROWEGO: %s", search_result.error)
             self.logger.error("=" * 80)
             return search_result
         
         self.logger.info("=" * 80)
-        self.logger.info(f"📥 Wyszukiwanie zwróciło {len(search_result.value)} surowych wyników")
+        self.logger.info("📥 Wyszukiwanie zwróciło %d surowych wyników", len(search_result.value))
         self.logger.info("=" * 80)
         
         if search_result.value:
-            for i, result in enumerate(search_result.value[:3], 1):
-                score = result.get('score', 0.0)
-                result_id = result.get('id', 'N/A')
-                self.logger.info(f"   Wynik {i}: ID={result_id}, Score={score:.4f}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for i, result in enumerate(search_result.value[:3], 1):
+                    self.logger.debug("   Wynik %s: ID=%s, Score=%.4f", i, result.get('id', 'N/A'), result.get('score', 0.0))
         else:
             self.logger.warning("⚠️ Brak wyników z wyszukiwania wektorowego!")
         
         # Convert search results to RAGChunk objects
         self.logger.info("=" * 80)
-        self.logger.info(f"🔄 Konwertuję {len(search_result.value)} surowych wyników na RAGChunk")
+        self.logger.info("🔄 Konwertuję %d surowych wyników na RAGChunk", len(search_result.value))
         self.logger.info("=" * 80)
         
+        debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+        results = search_result.value
+        # Extract every text first, so they can be cleaned concurrently
+        texts = await self._clean_texts([_extract_raw_text(result.get("payload") or {}) for result in results])
+        
         chunks = []
-        for i, result in enumerate(search_result.value):
-            payload = result.get("payload", {})
-            
-            # Extract text from different payload structures with encoding safety
-            text_content = ""
-            try:
-                if "text" in payload:
-                    raw_text = payload.get("text", "")
-                    # Clean the text before processing
-                    if self.text_cleaner_service:
-                        clean_result = await self.text_cleaner_service.clean_text(str(raw_text))
-                        if clean_result.is_success:
-                            text_content = clean_result.value
-                        else:
-                            self.logger.warning(f"Nie udało się wyczyścić tekstu z payload: {clean_result.error}")
-                            text_content = str(raw_text).encode('utf-8', errors='ignore').decode('utf-8')
-                    else:
-                        text_content = str(raw_text).encode('utf-8', errors='ignore').decode('utf-8')
-                elif "Akcja" in payload and isinstance(payload["Akcja"], dict):
-                    # Handle Polish structure: payload.Akcja.Payload
-                    akcja = payload["Akcja"]
-                    if "Payload" in akcja:
-                        raw_text = akcja["Payload"]
-                        # Clean the text before processing
-                        if self.text_cleaner_service:
-                            clean_result = await self.text_cleaner_service.clean_text(str(raw_text))
-                            if clean_result.is_success:
-                                text_content = clean_result.value
-                            else:
-                                self.logger.warning(f"Nie udało się wyczyścić tekstu Payload: {clean_result.error}")
-                                text_content = str(raw_text).encode('utf-8', errors='ignore').decode('utf-8')
-                        else:
-                            text_content = str(raw_text).encode('utf-8', errors='ignore').decode('utf-8')
-                    elif "Temat" in akcja:
-                        raw_text = akcja["Temat"]
-                        # Clean the text before processing
-                        if self.text_cleaner_service:
-                            clean_result = await self.text_cleaner_service.clean_text(str(raw_text))
-                            if clean_result.is_success:
-                                text_content = clean_result.value
-                            else:
-                                self.logger.warning(f"Nie udało się wyczyścić tekstu Temat: {clean_result.error}")
-                                text_content = str(raw_text).encode('utf-8', errors='ignore').decode('utf-8')
-                        else:
-                            text_content = str(raw_text).encode('utf-8', errors='ignore').decode('utf-8')
-            except Exception as e:
-                safe_exception_str = str(e).encode('utf-8', errors='ignore').decode('utf-8')
-                self.logger.warning(f"Nie udało się wyodrębnić tekstu z payload: {safe_exception_str}")
-                text_content = f"Fragment {result.get('id', 'nieznany')}"
+        for i, (result, text_content) in enumerate(zip(results, texts)):
+            payload = result.get("payload") or {}
             
-            # If still no text, use a fallback
+            # If no text was found, use a fallback
             if not text_content:
                 text_content = f"Fragment {result.get('id', 'nieznany')}"
             
-            # Clean text to avoid encoding issues
-            clean_text = text_content.encode('utf-8', errors='ignore').decode('utf-8')
-            self.logger.info(f"SearchService - Processing result {i+1}: {clean_text[:50]}...")
-            
-            # Clean all fields to avoid encoding issues
-            safe_chunk_id = str(result.get("id", "")).encode('utf-8', errors='ignore').decode('utf-8')
-            safe_score = result.get("score", 0.0)
+            if debug_enabled:
+                self.logger.debug("SearchService - Processing result %d: %.50s...", i + 1, text_content)
             
             # Extract metadata from payload
             metadata = {}
@@ -192,84 +211,173 @@ class SearchService(BaseQdrantService):
                 metadata = payload["Meta"]
             
             chunk = RAGChunk(
-                text_chunk=clean_text,  # Use cleaned text
+                text_chunk=text_content,
                 chat_messages=None,  # Would be populated from payload
-                chunk_id=safe_chunk_id,
+                chunk_id=str(result.get("id", "")),
                 metadata=metadata,  # Include metadata from payload
-                score=safe_score
+                score=result.get("score", 0.0)
             )
             chunks.append(chunk)
         
         self.logger.info("=" * 80)
-        self.logger.info(f"✅ Skonwertowano {len(chunks)} wyników na RAGChunk")
-        if chunks:
+        self.logger.info("✅ Skonwertowano %d wyników na RAGChunk", len(chunks))
+        if debug_enabled:
             for i, chunk in enumerate(chunks[:3], 1):
-                self.logger.info(f"   Chunk {i}: ID={chunk.chunk_id}, Score={chunk.score:.4f}, Text='{chunk.text_chunk[:80]}...'")
+                self.logger.debug("   Chunk %d: ID=%s, Score=%.4f, Text='%.80s...'", i, chunk.chunk_id, chunk.score, chunk.text_chunk)
         self.logger.info("=" * 80)
         
         return Result.success(chunks)
     
+    async def _clean_texts(self, raw_texts: List[Optional[str]]) -> List[Optional[str]]:
+        """Clean the extracted texts concurrently; a text whose cleaning fails is kept raw"""
+        if not self.text_cleaner_service:
+            return raw_texts
+        
+        # Bounds in-flight calls for cleaners backed by a rate-limited service
+        semaphore = asyncio.Semaphore(_CLEAN_CONCURRENCY)
+        
+        async def clean(raw_text: Optional[str]) -> Optional[str]:
+            if raw_text is None:
+                return None
+            try:
+                async with semaphore:
+                    clean_result = await self.text_cleaner_service.clean_text(raw_text)
+            except Exception as e:
+                # One failing text must not fail the whole search
+                self.logger.warning("Nie udało się wyczyścić tekstu z payload: %s", e)
+                return raw_text
+            if clean_result.is_error:
+                self.logger.warning("Nie udało się wyczyścić tekstu z payload: %s", clean_result.error)
+                return raw_text
+            return clean_result.value
+        
+        return list(await asyncio.gather(*(clean(raw_text) for raw_text in raw_texts)))
+    
     async def stream_search(self, collection_name: str, query_vector: List[float], limit: int = 5) -> AsyncIterator[Result[RAGChunk, str]]:
-        """Stream search results"""
-        self.logger.info(f"Streaming search results from collection: {collection_name}")
+        """Stream search results, fetching the best few first and the rest only if the consumer keeps reading"""
+        self.logger.info("Streaming search results from collection: %s", collection_name)
+        
+        first_page = min(limit, _STREAM_FIRST_PAGE)
+        seen_ids = set()
+        for offset, page_limit in ((0, first_page), (first_page, limit - first_page)):
+            if page_limit <= 0:
+                return
+            
+            search_result = await self.search_vectors(collection_name, query_vector, page_limit, offset=offset)
+            if search_result.is_error:
+                yield search_result
+                return
+            
+            # Yield results one by one; points that moved between the two pages are skipped
+            for result in search_result.value:
+                if result.get("id") in seen_ids:
+                    continue
+                seen_ids.add(result.get("id"))
+                chunk = RAGChunk(
+                    text_chunk=result.get("payload", {}).get("text", ""),
+                    chat_messages=None,
+                    chunk_id=str(result.get("id", "")),
+                    score=result.get("score", 0.0)
+                )
+                yield Result.success(chunk)
+            
+            # A short page means there is nothing more to fetch
+            if len(search_result.value) < page_limit:
+                return
+    
+    async def batch_search(self, collection_name: str, query_vectors: Union[np.ndarray, List[List[float]]], limit: int = 5,
+                           vector_size: Optional[int] = None, filter_conditions: Optional[_BatchFilters] = None) -> Result[List[List[Dict[str, Any]]], str]:
+        """Batch search multiple queries (a (B, D) ndarray or a list of vectors); vector_size, if given, must equal D.
         
-        search_result = await self.search_vectors(collection_name, query_vector, limit)
+        filter_conditions is one filter for all queries or a list with one (or None) per query.
+        """
+        self.logger.info("Batch searching %d queries in collection: %s", len(query_vectors), collection_name)
         
-        if search_result.is_error:
-            yield search_result
-            return
+        searches = self._build_batch_searches(collection_name, query_vectors, limit, vector_size, filter_conditions)
+        if searches.is_error:
+            return searches
         
-        # Yield results one by one
-        for result in search_result.value:
-            chunk = RAGChunk(
-                text_chunk=result.get("payload", {}).get("text", ""),
-                chat_messages=None,
-                chunk_id=str(result.get("id", "")),
-                score=result.get("score", 0.0)
-            )
-            yield Result.success(chunk)
+        result = self._handle(await self._send_search_batch(collection_name, searches.value), err_log="Batch search failed")
+        if result.is_success:
+            self.logger.info("Batch search completed: %d result sets", len(result.value))
+        return result
     
-    async def batch_search(self, collection_name: str, query_vectors: List[List[float]], limit: int = 5) -> Result[List[List[Dict[str, Any]]], str]:
-        """Batch search multiple queries"""
-        self.logger.info(f"Batch searching {len(query_vectors)} queries in collection: {collection_name}")
-        
+    async def stream_batch_search(self, collection_name: str, query_vectors: Union[np.ndarray, List[List[float]]], limit: int = 5,
+                                  chunk_size: int = _STREAM_CHUNK_SIZE, vector_size: Optional[int] = None,
+                                  filter_conditions: Optional[_BatchFilters] = None) -> AsyncIterator[Result[Tuple[int, List[Dict[str, Any]]], str]]:
+        """Batch search yielding (query index, results) as each sub-batch of chunk_size queries completes.
+        
+        Sub-batches run concurrently and are yielded in completion order, so one slow query
+        doesn't hold back the others; closing the iterator early cancels the pending ones.
+        """
+        self.logger.info("Streaming batch search of %d queries in collection: %s", len(query_vectors), collection_name)
+        
+        searches = self._build_batch_searches(collection_name, query_vectors, limit, vector_size, filter_conditions)
+        if searches.is_error:
+            yield searches
+            return
+        searches = searches.value
+        
+        async def run(start: int) -> Tuple[int, Result[List[List[Dict[str, Any]]], str]]:
+            return start, await self._send_search_batch(collection_name, searches[start:start + chunk_size])
+        
+        tasks = [asyncio.ensure_future(run(start)) for start in range(0, len(searches), chunk_size)]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                start, result = await completed
+                if result.is_error:
+                    self.logger.error("Batch search failed: %s", result.error)
+                    yield result
+                    return
+                for offset, results in enumerate(result.value):
+                    yield Result.success((start + offset, results))
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    def _build_batch_searches(self, collection_name: str, query_vectors: Union[np.ndarray, List[List[float]]], limit: int,
+                              vector_size: Optional[int] = None, filter_conditions: Optional[_BatchFilters] = None) -> Result[List[Dict[str, Any]], str]:
+        """Validate a batch of query vectors with one (B, D) shape check and build one search body per vector"""
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Nieprawidłowa nazwa kolekcji: {collection_name}")
         
-        if not query_vectors:
+        if len(query_vectors) == 0:
             return Result.error("Nie podano wektorów zapytania")
         
-        # Validate all vectors
-        for i, vector in enumerate(query_vectors):
-            if not self._validate_vector_dimension(vector):
-                return Result.error(f"Nieprawidłowy wektor na indeksie {i}")
-        
-        data = {
-            "searches": [
-                {
-                    "vector": vector,
-                    "limit": limit,
-                    "with_payload": True,
-                    "with_vector": False
-                }
-                for vector in query_vectors
-            ]
-        }
-        
-        result = await self._make_request("POST", f"/collections/{collection_name}/points/search/batch", data)
-        
-        if result.is_success:
-            batch_results = result.value.get("result", [])
-            self.logger.info(f"Batch search completed: {len(batch_results)} result sets")
-            return Result.success(batch_results)
-        else:
-            self.logger.error(f"Batch search failed: {result.error}")
-            return result
+        # One conversion into a (B, D) float32 matrix; its rows are contiguous views orjson encodes directly
+        matrix = _stack_query_vectors(query_vectors)
+        if matrix is None:
+            # Only on failure are the vectors checked one by one, to report the bad index
+            for i, vector in enumerate(query_vectors):
+                if self._vector_array(vector) is None:
+                    return Result.error(f"Nieprawidłowy wektor na indeksie {i}")
+            return Result.error("Wektory zapytania mają różne wymiary")
+        
+        if vector_size is not None and matrix.shape[1] != vector_size:
+            return Result.error(f"Nieprawidłowy wymiar wektorów: {matrix.shape[1]} (oczekiwano {vector_size})")
+        
+        filters = _batch_filters(filter_conditions, len(matrix))
+        if filters is None:
+            return Result.error("Liczba filtrów nie odpowiada liczbie wektorów zapytania")
+        
+        searches = [
+            {
+                "vector": vector,
+                "limit": limit,
+                "with_payload": True,
+                "with_vector": False
+            }
+            for vector in matrix
+        ]
+        for search, query_filter in zip(searches, filters):
+            if query_filter:
+                search["filter"] = query_filter
+        return Result.success(searches)
     
     async def recommend_points(self, collection_name: str, positive_ids: List[str], negative_ids: Optional[List[str]] = None, 
                               limit: int = 5) -> Result[List[Dict[str, Any]], str]:
         """Recommend points based on positive and negative examples"""
-        self.logger.info(f"Recommending points in collection: {collection_name}")
+        self.logger.info("Recommending points in collection: %s", collection_name)
         
         if not self._validate_collection_name(collection_name):
             return Result.error(f"Nieprawidłowa nazwa kolekcji: {collection_name}")
@@ -287,12 +395,79 @@ class SearchService(BaseQdrantService):
         if negative_ids:
             data["negative"] = negative_ids
         
-        result = await self._make_request("POST", f"/collections/{collection_name}/points/recommend", data)
-        
+        result = self._handle(await self._send_recommend(collection_name, data), err_log="Recommendation failed")
         if result.is_success:
-            recommendations = result.value.get("result", [])
-            self.logger.info(f"Generated {len(recommendations)} recommendations")
-            return Result.success(recommendations)
-        else:
-            self.logger.error(f"Recommendation failed: {result.error}")
-            return result
+            self.logger.info("Generated %d recommendations", len(result.value))
+        return result
+    
+    # Transport primitives (overridden by GrpcSearchService)
+    async def _send_search(self, collection_name: str, query: Dict[str, Any]) -> Result[List[Dict[str, Any]], str]:
+        result = await self._make_request("POST", f"/collections/{collection_name}/points/search", query)
+        return result.map(lambda value: value.get("result", []))
+    
+    async def _send_search_batch(self, collection_name: str, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        result = await self._make_request("POST", f"/collections/{collection_name}/points/search/batch", {"searches": queries})
+        return result.map(lambda value: value.get("result", []))
+    
+    async def _flush_searches(self, collection_name: Hashable, queries: List[Dict[str, Any]]) -> Result[List[List[Dict[str, Any]]], str]:
+        # Every query keeps its own limit, threshold and filter inside the batch
+        return await self._send_search_batch(collection_name, queries)
+    
+    async def _send_recommend(self, collection_name: str, query: Dict[str, Any]) -> Result[List[Dict[str, Any]], str]:
+        result = await self._make_request("POST", f"/collections/{collection_name}/points/recommend", query)
+        return result.map(lambda value: value.get("result", []))
+
+def _stack_query_vectors(query_vectors: Union[np.ndarray, List[List[float]]]) -> Optional[np.ndarray]:
+    """Query vectors as one (B, D) float32 matrix, or None if they don't form a numeric matrix"""
+    try:
+        matrix = np.asarray(query_vectors)
+    except (ValueError, TypeError):
+        return None
+    if matrix.ndim != 2 or matrix.size == 0 or matrix.dtype.kind not in "fiub":
+        return None
+    return matrix.astype(np.float32, copy=False)
+
+def _dummy_vector(vector_size: int) -> np.ndarray:
+    """Constant fallback query vector used when no embedding is available"""
+    vector = _DUMMY_VECTORS.get(vector_size)
+    if vector is None:
+        vector = np.full(vector_size, 0.1, dtype=np.float32)
+        vector.flags.writeable = False
+        vector = _DUMMY_VECTORS.setdefault(vector_size, vector)
+    return vector
+
+def _extract_raw_text(payload: Dict[str, Any]) -> Optional[str]:
+    """Text of the first payload location that has one; None for payloads of an unexpected shape"""
+    try:
+        for extract in _TEXT_EXTRACTORS:
+            raw_text = extract(payload)
+            if raw_text is not None:
+                return str(raw_text)
+    except Exception:
+        pass
+    return None
+
+def _batch_filters(filter_conditions: Optional[_BatchFilters], count: int) -> Optional[List[Optional[Dict[str, Any]]]]:
+    """One filter per query, or None if a per-query list has the wrong length.
+    
+    Equal filters are collapsed onto one shared dict object, so a filter common to the whole
+    batch (a tenant filter, say) is held once instead of once per query.
+    """
+    if filter_conditions is None or isinstance(filter_conditions, dict):
+        return [filter_conditions] * count
+    if len(filter_conditions) != count:
+        return None
+    
+    by_id: Dict[int, Dict[str, Any]] = {}
+    by_content: Dict[bytes, Dict[str, Any]] = {}
+    filters = []
+    for query_filter in filter_conditions:
+        if query_filter:
+            # The same object repeated is recognized without serializing it again
+            shared = by_id.get(id(query_filter))
+            if shared is None:
+                shared = by_content.setdefault(json_codec.dumps(query_filter, sort_keys=True), query_filter)
+                by_id[id(query_filter)] = shared
+            query_filter = shared
+        filters.append(query_filter)
+    return filters
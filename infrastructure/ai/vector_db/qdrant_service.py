@@ -4,9 +4,13 @@ from typing import List, Optional, AsyncIterator
 from domain.services.IVectorDbService import IVectorDbService
 from domain.entities.rag_chunk import RAGChunk
 from domain.utils.result import Result
+from .qdrant.BaseQdrantService import BaseQdrantService
 from .qdrant.collection_service import CollectionService
 from .qdrant.embedding_service import EmbeddingService
+from .qdrant.grpc_embedding_service import GrpcEmbeddingService
 from .qdrant.search_service import SearchService
+from .qdrant.grpc_search_service import GrpcSearchService
+from .qdrant.grpc_client import get_shared_grpc_client
 from .qdrant.monitoring_service import MonitoringService
 from ..embeddings.IEmbeddingService import IEmbeddingService
 from domain.services.ITextCleanerService import ITextCleanerService
@@ -14,33 +18,53 @@ from domain.services.ITextCleanerService import ITextCleanerService
 class QdrantService(IVectorDbService):
     """Qdrant implementation of VectorDbService using microservices architecture"""
     
-    def __init__(self, url: str = "http://localhost:6333", collection_name: str = "chat_collection", api_key: Optional[str] = None, embedding_service: Optional[IEmbeddingService] = None, text_cleaner_service: Optional[ITextCleanerService] = None):
+    def __init__(self, url: str = "http://localhost:6333", collection_name: str = "chat_collection", api_key: Optional[str] = None, embedding_service: Optional[IEmbeddingService] = None, text_cleaner_service: Optional[ITextCleanerService] = None, transport: str = "http"):
         self.url = url
         self.collection_name = collection_name
         self.vector_size = 1024  # Match C# VectorSize
         self.logger = logging.getLogger(__name__)
         
-        # Initialize microservices
-        self.collection_service = CollectionService(url, api_key)
-        self.embedding_service = EmbeddingService(url, api_key)
-        self.search_service = SearchService(url, api_key, text_cleaner_service)
-        self.monitoring_service = MonitoringService(url, api_key)
+        # Initialize microservices over the process-wide pooled HTTP client for this Qdrant address and API key,
+        # so services built per container (or per request) don't each open and leak a connection pool
+        self._client = BaseQdrantService.get_shared_client(url, api_key)
+        self.collection_service = CollectionService(url, api_key, self._client)
+        # transport="grpc" sends searches, recommendations, upserts and deletes over one shared gRPC channel (needs qdrant-client)
+        if transport == "grpc":
+            self._grpc_client = get_shared_grpc_client(url, api_key)
+            self.embedding_service = GrpcEmbeddingService(url, api_key, self._client, grpc_client=self._grpc_client)
+            self.search_service = GrpcSearchService(url, api_key, text_cleaner_service, self._client, grpc_client=self._grpc_client)
+        else:
+            self._grpc_client = None
+            self.embedding_service = EmbeddingService(url, api_key, self._client)
+            self.search_service = SearchService(url, api_key, text_cleaner_service, self._client)
+        self.monitoring_service = MonitoringService(url, api_key, self._client)
         
         # Store embedding service for real embeddings
         self.embedding_service_provider = embedding_service
         
-        self.logger.info(f"QdrantService initialized with microservices architecture (vector_size: {self.vector_size})")
+        self.logger.info("QdrantService initialized with microservices architecture (vector_size: %d)", self.vector_size)
+    
+    async def aclose(self):
+        """No-op: the HTTP client and gRPC channel are process-wide and closed by close_shared_clients()"""
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     # Collection Management - delegated to CollectionService
-    async def create_collection(self, vector_size: int = None, distance: str = "Cosine") -> Result[None, str]:
+    async def create_collection(self, vector_size: int = None, distance: str = "Cosine", quantization: str = "none") -> Result[None, str]:
         """Create collection"""
         if vector_size is None:
             vector_size = self.vector_size
-        return await self.collection_service.create_collection(self.collection_name, vector_size, distance)
+        return await self.collection_service.create_collection(self.collection_name, vector_size, distance, quantization)
     
     async def delete_collection(self) -> Result[None, str]:
         """Delete collection"""
-        return await self.collection_service.delete_collection(self.collection_name)
+        result = await self.collection_service.delete_collection(self.collection_name)
+        self.search_service.clear_query_cache(self.collection_name)
+        return result
     
     async def collection_exists(self) -> Result[bool, str]:
         """Check if collection exists"""
@@ -53,7 +77,7 @@ class QdrantService(IVectorDbService):
     # Embedding Operations - delegated to EmbeddingService
     async def upsert_chunks(self, chunks: List[RAGChunk]) -> Result[None, str]:
         """Upsert RAG chunks as vectors"""
-        self.logger.info(f"Upserting {len(chunks)} chunks to collection: {self.collection_name}")
+        self.logger.info("Upserting %d chunks to collection: %s", len(chunks), self.collection_name)
         
         import uuid
         
@@ -77,7 +101,7 @@ class QdrantService(IVectorDbService):
                     if self.embedding_service_provider.is_success:
                         actual_service = self.embedding_service_provider.value
                     else:
-                        self.logger.warning(f"Embedding service not available: {self.embedding_service_provider.error}")
+                        self.logger.warning("Embedding service not available: %s", self.embedding_service_provider.error)
                         vector = [0.1] * self.vector_size
                         continue
                 else:
@@ -86,9 +110,9 @@ class QdrantService(IVectorDbService):
                 embedding_result = await actual_service.create_embedding(chunk.text_chunk)
                 if embedding_result.is_success:
                     vector = embedding_result.value
-                    self.logger.debug(f"Using real embedding for chunk: {len(vector)} dimensions")
+                    self.logger.debug("Using real embedding for chunk: %d dimensions", len(vector))
                 else:
-                    self.logger.warning(f"Failed to create embedding, using dummy vector: {embedding_result.error}")
+                    self.logger.warning("Failed to create embedding, using dummy vector: %s", embedding_result.error)
                     vector = [0.1] * self.vector_size
             else:
                 self.logger.warning("No embedding service available, using dummy vector")
@@ -105,11 +129,16 @@ class QdrantService(IVectorDbService):
             }
             points.append(point)
         
-        return await self.embedding_service.upsert_points(self.collection_name, points)
+        result = await self.embedding_service.upsert_points(self.collection_name, points)
+        # Cached search results no longer reflect the collection
+        self.search_service.clear_query_cache(self.collection_name)
+        return result
     
     async def delete_chunks(self, chunk_ids: List[str]) -> Result[None, str]:
         """Delete chunks by IDs"""
-        return await self.embedding_service.delete_points(self.collection_name, chunk_ids)
+        result = await self.embedding_service.delete_points(self.collection_name, chunk_ids)
+        self.search_service.clear_query_cache(self.collection_name)
+        return result
     
     async def get_chunks(self, chunk_ids: List[str]) -> Result[List[RAGChunk], str]:
         """Get chunks by IDs"""
@@ -133,14 +162,14 @@ class QdrantService(IVectorDbService):
     # Search Operations - delegated to SearchService
     async def search(self, query: str, limit: int = 5) -> Result[List[RAGChunk], str]:
         """Search vector database"""
-        self.logger.info(f"QdrantService - Starting search for: '{query}' with limit: {limit}")
+        self.logger.info("QdrantService - Starting search for: '%s' with limit: %s", query, limit)
         
         result = await self.search_service.search_by_text(self.collection_name, query, limit, vector_size=self.vector_size, embedding_service=self.embedding_service_provider)
         
         if result.is_success:
-            self.logger.info(f"QdrantService - Search successful, found {len(result.value)} chunks")
+            self.logger.info("QdrantService - Search successful, found %d chunks", len(result.value))
         else:
-            self.logger.error(f"QdrantService - Search failed: {result.error}")
+            self.logger.error("QdrantService - Search failed: %s", result.error)
         
         return result
     
@@ -153,7 +182,7 @@ class QdrantService(IVectorDbService):
                 if self.embedding_service_provider.is_success:
                     actual_service = self.embedding_service_provider.value
                 else:
-                    self.logger.warning(f"Embedding service not available: {self.embedding_service_provider.error}")
+                    self.logger.warning("Embedding service not available: %s", self.embedding_service_provider.error)
                     search_vector = [0.1] * self.vector_size
             else:
                 actual_service = self.embedding_service_provider
@@ -161,9 +190,9 @@ class QdrantService(IVectorDbService):
             embedding_result = await actual_service.create_embedding(query)
             if embedding_result.is_success:
                 search_vector = embedding_result.value
-                self.logger.debug(f"Using real embedding for search: {len(search_vector)} dimensions")
+                self.logger.debug("Using real embedding for search: %d dimensions", len(search_vector))
             else:
-                self.logger.warning(f"Failed to create search embedding, using dummy vector: {embedding_result.error}")
+                self.logger.warning("Failed to create search embedding, using dummy vector: %s", embedding_result.error)
                 search_vector = [0.1] * self.vector_size
         else:
             self.logger.warning("No embedding service available for search, using dummy vector")
@@ -236,7 +265,7 @@ class QdrantService(IVectorDbService):
             
             return Result.success(health_data)
         except Exception as e:
-            self.logger.error(f"Health check failed: {e}")
+            self.logger.error("Health check failed: %s", e)
             return Result.error(f"Health check failed: {str(e)}")
     
     # Additional utility methods
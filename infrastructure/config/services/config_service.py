@@ -33,7 +33,8 @@ class ConfigService(IConfigService):
             result.update({
                 "api_key": config.api_keys.get("google_api_key"),
                 "model": os.getenv("GOOGLE_MODEL", "textembedding-gecko@001"),
-                "project_id": os.getenv("GOOGLE_PROJECT_ID")
+                "project_id": os.getenv("GOOGLE_PROJECT_ID"),
+                "cache_path": os.getenv("GOOGLE_LLM_CACHE_PATH")
             })
         elif provider == "openai":
             result.update({
@@ -1,3 +1,4 @@
 from .text_cleaner import TextCleaner
+from . import json_codec
 
-__all__ = ['TextCleaner']
+__all__ = ['TextCleaner', 'json_codec']
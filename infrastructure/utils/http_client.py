@@ -0,0 +1,72 @@
+# infrastructure/utils/http_client.py
+import hashlib
+import importlib.util
+from typing import Any, Callable, Dict, Hashable, Optional
+import httpx
+
+
+def _installed(module_name: str) -> bool:
+    return importlib.util.find_spec(module_name) is not None
+
+
+# Optional transport features: httpx only enables them when the extra packages are present
+HTTP2_AVAILABLE = _installed("h2")
+_ENCODINGS = []
+if _installed("brotli") or _installed("brotlicffi"):
+    _ENCODINGS.append("br")
+if _installed("zstandard"):
+    _ENCODINGS.append("zstd")
+ACCEPT_ENCODING = ", ".join(_ENCODINGS + ["gzip", "deflate"])
+
+# Process-wide clients (httpx or gRPC), one per key; closed together by close_shared_clients()
+_shared_clients: Dict[Hashable, Any] = {}
+
+
+def build_async_client(
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 30.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 50,
+    http2: bool = True,
+    keepalive_expiry: Optional[float] = 5.0,
+    **kwargs
+) -> httpx.AsyncClient:
+    """Create a pooled AsyncClient with HTTP/2 and br/zstd decoding when available"""
+    client_headers = {"Accept-Encoding": ACCEPT_ENCODING}
+    client_headers.update(headers or {})
+    return httpx.AsyncClient(
+        headers=client_headers,
+        http2=http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        timeout=httpx.Timeout(timeout),
+        **kwargs
+    )
+
+
+def credential_fingerprint(secret: Optional[str]) -> Optional[str]:
+    """Digest of an API key for use in cache keys, so the raw key isn't kept as one"""
+    if not secret:
+        return None
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()
+
+
+def shared_client(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Process-wide client for key (e.g. base URL and credential fingerprint), created by factory on first use"""
+    client = _shared_clients.get(key)
+    if client is None:
+        client = _shared_clients[key] = factory()
+    return client
+
+
+async def close_shared_clients():
+    """Close every process-wide client; call once on application shutdown"""
+    clients = list(_shared_clients.values())
+    _shared_clients.clear()
+    for client in clients:
+        # httpx clients have aclose(), qdrant-client's AsyncQdrantClient has an async close()
+        close = getattr(client, "aclose", None) or client.close
+        await close()
@@ -0,0 +1,42 @@
+# infrastructure/utils/json_codec.py
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY if orjson is not None else 0
+
+
+def _default(obj: Any) -> Any:
+    """Encode numpy values orjson/json can't handle natively (scalars, non-contiguous or float16 arrays)"""
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """Decode JSON using orjson when available, stdlib json otherwise"""
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data)
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Encode JSON to UTF-8 bytes using orjson when available; numpy arrays are encoded directly"""
+    if orjson is not None:
+        options = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=_default, option=options)
+    return json.dumps(obj, sort_keys=sort_keys, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
@@ -0,0 +1,86 @@
+# infrastructure/utils/sse.py
+from typing import Any, AsyncIterator, List, Union
+from infrastructure.utils import json_codec
+
+_DATA_FIELD = b"data:"
+# A payload ending in one of these may close a JSON document that was split across data lines
+_JSON_CLOSERS = (b"}", b"]", "}", "]")
+# Give up on reassembling a split payload past this size
+_MAX_PENDING_CHARS = 16 * 1024 * 1024
+
+
+async def iter_sse_data(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Yield the payload of each server-sent-events `data:` line from a raw byte stream.
+
+    Lines are split and prefix-checked on the bytes buffer in place, so nothing is
+    decoded to str and only the payload itself is copied out.
+    """
+    buffer = bytearray()
+    async for chunk in chunks:
+        buffer += chunk
+        start = 0
+        while True:
+            end = buffer.find(b"\n", start)
+            if end == -1:
+                break
+            if buffer.startswith(_DATA_FIELD, start):
+                yield _payload(buffer, start, end)
+            start = end + 1
+        if start:
+            del buffer[:start]
+
+    # Final line without a trailing newline
+    if buffer.startswith(_DATA_FIELD):
+        yield _payload(buffer, 0, len(buffer))
+
+
+def _payload(buffer: bytearray, start: int, end: int) -> bytes:
+    payload_start = start + len(_DATA_FIELD)
+    # One optional space after the colon belongs to the field syntax
+    if payload_start < end and buffer[payload_start] == 0x20:
+        payload_start += 1
+    if end > payload_start and buffer[end - 1] == 0x0D:
+        end -= 1
+    return bytes(buffer[payload_start:end])
+
+
+class SseJsonAssembler:
+    """Decode the JSON payload of each SSE data line, reassembling documents split across lines.
+    
+    Fragments are collected in a list and joined once when a payload looks like the end of
+    a document, so a large split payload (tool-call arguments, base64) is copied linearly.
+    """
+    
+    __slots__ = ("_fragments", "_pending_chars")
+    
+    def __init__(self):
+        self._fragments: List[Union[bytes, str]] = []
+        self._pending_chars = 0
+    
+    def feed(self, data: Union[bytes, str]) -> Any:
+        """Return the decoded document completed by this payload, or None if there is none yet"""
+        if not self._fragments:
+            try:
+                return json_codec.loads(data)
+            except ValueError:
+                pass
+        
+        self._fragments.append(data)
+        self._pending_chars += len(data)
+        if self._pending_chars > _MAX_PENDING_CHARS:
+            self.reset()
+            return None
+        if data.rstrip()[-1:] not in _JSON_CLOSERS:
+            return None
+        
+        try:
+            document = json_codec.loads(data[:0].join(self._fragments))
+        except ValueError:
+            return None
+        self.reset()
+        return document
+    
+    def reset(self):
+        """Drop any partially received payload"""
+        self._fragments.clear()
+        self._pending_chars = 0
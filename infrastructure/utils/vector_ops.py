@@ -0,0 +1,106 @@
+# infrastructure/utils/vector_ops.py
+from itertools import chain
+from typing import List, Tuple
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+def to_float32_matrix(vectors: List[List[float]]) -> np.ndarray:
+    """Pack equal-length vectors into one contiguous (N, D) float32 array; raises ValueError on ragged input"""
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    rows, dim = len(vectors), len(vectors[0])
+    if any(len(vector) != dim for vector in vectors):
+        raise ValueError("Vectors have different dimensions")
+    flat = np.fromiter(chain.from_iterable(vectors), dtype=np.float32, count=rows * dim)
+    return flat.reshape(rows, dim)
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize matrix rows in place; all-zero rows are left as is"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Symmetric per-vector int8 quantization; returns (codes, scale) with vector ~= codes * scale"""
+    max_abs = float(np.max(np.abs(vector))) if vector.size else 0.0
+    scale = max_abs / 127.0 if max_abs > 0 else 1.0
+    codes = np.round(vector / scale).astype(np.int8)
+    return codes, scale
+
+
+def cosine_topk(query: np.ndarray, matrix: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (row indices, scores) of the k rows most similar to query, best first.
+
+    The matrix rows must already be L2-normalized; the query is normalized here.
+    """
+    unit_query = _unit_query(query)
+    if unit_query is None or matrix.shape[0] == 0:
+        return _empty_topk()
+    return _select_topk(matrix @ unit_query, k)
+
+
+def cosine_topk_int8(query: np.ndarray, codes: np.ndarray, scales: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """cosine_topk over rows stored as int8 codes with per-row scales (see quantize_int8)"""
+    unit_query = _unit_query(query)
+    if unit_query is None or codes.shape[0] == 0:
+        return _empty_topk()
+    if _scores_int8_jit is not None:
+        scores = _scores_int8_jit(
+            np.ascontiguousarray(codes),
+            np.ascontiguousarray(unit_query, dtype=np.float32),
+            np.ascontiguousarray(scales, dtype=np.float32)
+        )
+    else:
+        scores = (codes @ unit_query) * scales
+    return _select_topk(scores, k)
+
+
+def warm_up_kernels():
+    """Run the int8 scoring kernel once so numba's compiled code is loaded before the first real call"""
+    cosine_topk_int8(np.ones(8, dtype=np.float32), np.ones((2, 8), dtype=np.int8), np.ones(2, dtype=np.float32), 1)
+
+
+if njit is not None:
+    # Explicit signature compiles at import (and is cached on disk), so no first-call JIT stall
+    @njit("float32[::1](int8[:, ::1], float32[::1], float32[::1])", cache=True, fastmath=True, parallel=True)
+    def _scores_int8_jit(codes, query, scales):
+        rows, dim = codes.shape
+        scores = np.empty(rows, dtype=np.float32)
+        for row in prange(rows):
+            acc = np.float32(0.0)
+            for col in range(dim):
+                acc += np.float32(codes[row, col]) * query[col]
+            scores[row] = acc * scales[row]
+        return scores
+else:
+    _scores_int8_jit = None
+
+
+def _unit_query(query: np.ndarray):
+    query = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(query)
+    if norm == 0:
+        return None
+    return query / norm
+
+
+def _select_topk(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return _empty_topk()
+    top = np.argpartition(scores, -k)[-k:]
+    top = top[np.argsort(scores[top])[::-1]]
+    return top, scores[top]
+
+
+def _empty_topk() -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
@@ -44,7 +44,8 @@ def create_app() -> FastAPI:
             title="Voice AI Assistant - Clean FastAPI",
             description="Clean FastAPI backend for Voice AI Assistant - No Google ADK",
             version="1.0.0",
-            allow_origins=["http://localhost", "http://localhost:8080", "*"]
+            allow_origins=["http://localhost", "http://localhost:8080", "*"],
+            container=container
         )
         
         # Create FastAPI app
@@ -67,6 +68,9 @@ def main():
     logger.info("🌐 Starting Clean FastAPI web server on http://0.0.0.0:8080")
     logger.info("✨ Clean startup - no Google ADK warnings!")
     
+    # Pętla zdarzeń: "auto" wybiera uvloop, gdy jest zainstalowany (Linux/macOS), inaczej asyncio
+    event_loop = os.environ.get("EVENT_LOOP", "auto")
+    
     # Sprawdź czy reload jest włączony
     reload_enabled = os.environ.get("RELOAD", "false").lower() == "true" or "--reload" in sys.argv
     
@@ -74,12 +78,12 @@ def main():
         logger.info("🔄 Auto-reload ENABLED - zmiany będą wykrywane automatycznie!")
         logger.info("📝 Monitorowane pliki: *.py w całym projekcie")
         # Używamy string modułu dla reload - to jest KLUCZOWE!
-        uvicorn.run("main_fastapi:app", host="0.0.0.0", port=8080, reload=True, reload_includes=["*.py"])
+        uvicorn.run("main_fastapi:app", host="0.0.0.0", port=8080, reload=True, reload_includes=["*.py"], loop=event_loop)
     else:
         logger.info("💡 Dla auto-reload uruchom:")
         logger.info("   PowerShell: $env:RELOAD='true'; python main_fastapi.py")
         logger.info("   LUB bezpośrednio: uvicorn main_fastapi:app --reload --host 0.0.0.0 --port 8080")
-        uvicorn.run(app, host="0.0.0.0", port=8080, reload=False)
+        uvicorn.run(app, host="0.0.0.0", port=8080, reload=False, loop=event_loop)
 
 if __name__ == "__main__":
     main()
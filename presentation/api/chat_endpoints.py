@@ -1,7 +1,7 @@
 """
 Chat API Endpoints - FastAPI routes for chat operations
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from datetime import datetime
@@ -39,9 +39,19 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 # Dependency injection
-def get_container() -> Container:
-    """Get Container instance"""
-    return Container()
+_default_container: Optional[Container] = None
+
+def get_container(request: Request) -> Container:
+    """Get the app's Container, so every request shares its Singletons (pooled clients included)"""
+    container = getattr(request.app.state, "container", None)
+    if container is not None:
+        return container
+    
+    # Apps created without a container (e.g. the ADK server) share one per process
+    global _default_container
+    if _default_container is None:
+        _default_container = Container()
+    return _default_container
 
 def get_conversation_service(container: Container = Depends(get_container)) -> ConversationService:
     """Get conversation service instance"""
@@ -489,22 +499,13 @@ async def _get_idioms_context(chat_agent_service: ChatAgentService, collection_n
     knowledge_service = chat_agent_service.orchestration_service.knowledge_service
     
     if knowledge_service and knowledge_service.vector_db_service:
-        # Użyj search_by_text z konkretną nazwą kolekcji
-        from infrastructure.ai.vector_db.qdrant.search_service import SearchService
-        from domain.services.ITextCleanerService import ITextCleanerService
-        
-        # Pobierz URL z vector_db_service (zamiast hardcoded localhost)
-        qdrant_url = knowledge_service.vector_db_service.url
-        
-        # Stwórz tymczasowy serwis wyszukiwania dla konkretnej kolekcji
-        search_service = SearchService(
-            url=qdrant_url,
-            text_cleaner_service=knowledge_service.text_cleaner_service
-        )
+        # Użyj search_by_text z konkretną nazwą kolekcji - serwisy QdrantService współdzielą
+        # pulę połączeń, więc nie tworzymy nowych klientów HTTP przy każdym zapytaniu
+        vector_db_service = knowledge_service.vector_db_service
+        search_service = vector_db_service.search_service
         
         # Sprawdź czy kolekcja istnieje przed wyszukiwaniem
-        from infrastructure.ai.vector_db.qdrant.collection_service import CollectionService
-        collection_service = CollectionService(qdrant_url)
+        collection_service = vector_db_service.collection_service
         collection_exists_result = await collection_service.collection_exists(collection_name)
         
         if not collection_exists_result.is_success or not collection_exists_result.value:
@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pytest
+
+from domain.utils.result import Result
+from infrastructure.ai.llm.google_vertex import ai_features_service
+from infrastructure.ai.llm.google_vertex.ai_features_service import AIFeaturesService
+
+
+def make_service(requested: list) -> AIFeaturesService:
+    service = AIFeaturesService("test-key", client=httpx.AsyncClient())
+
+    async def fake_request_embeddings(texts):
+        requested.append(list(texts))
+        # Yield to the loop like a real request, so concurrent calls interleave
+        await asyncio.sleep(0)
+        return Result.success([[float(len(text)), 1.0] for text in texts])
+
+    service._request_embeddings = fake_request_embeddings
+    return service
+
+
+class TestGetEmbeddings:
+    @pytest.mark.asyncio
+    async def test_repeated_texts_are_requested_once(self):
+        requested = []
+        service = make_service(requested)
+
+        result = await service.get_embeddings(["a", "bb", "a"])
+
+        assert result.value == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+        assert requested == [["a", "bb"]]
+
+    @pytest.mark.asyncio
+    async def test_cached_texts_are_not_requested_again(self):
+        requested = []
+        service = make_service(requested)
+
+        await service.get_embeddings(["a"])
+        result = await service.get_embeddings(["a", "bb"])
+
+        assert result.value == [[1.0, 1.0], [2.0, 1.0]]
+        assert requested == [["a"], ["bb"]]
+
+    @pytest.mark.asyncio
+    async def test_hit_evicted_by_own_inserts_is_still_returned(self, monkeypatch):
+        monkeypatch.setattr(ai_features_service, "_EMBEDDING_CACHE_SIZE", 2)
+        service = make_service([])
+
+        await service.get_embeddings(["a"])
+        await service.get_embeddings(["bb"])
+        result = await service.get_embeddings(["a", "ccc", "dddd"])
+
+        assert result.is_success
+        assert result.value == [[1.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+
+    @pytest.mark.asyncio
+    async def test_hit_evicted_by_concurrent_call_is_still_returned(self, monkeypatch):
+        monkeypatch.setattr(ai_features_service, "_EMBEDDING_CACHE_SIZE", 1)
+        service = make_service([])
+        await service.get_embeddings(["a"])
+
+        first, second = await asyncio.gather(
+            service.get_embeddings(["a", "bb"]),
+            service.get_embeddings(["ccc"])
+        )
+
+        assert first.value == [[1.0, 1.0], [2.0, 1.0]]
+        assert second.value == [[3.0, 1.0]]
+
+
+class TestGetEmbeddingsNp:
+    @pytest.mark.asyncio
+    async def test_equal_dimensions_give_a_normalized_matrix(self):
+        service = make_service([])
+
+        result = await service.get_embeddings_np(["a", "bb"])
+
+        assert result.is_success
+        assert result.value.shape == (2, 2)
+        assert np.allclose(np.linalg.norm(result.value, axis=1), 1.0)
+
+    @pytest.mark.asyncio
+    async def test_mixed_dimensions_are_an_error_result(self):
+        service = AIFeaturesService("test-key", client=httpx.AsyncClient())
+
+        async def ragged_request_embeddings(texts):
+            return Result.success([[1.0] * (2 + index) for index, _ in enumerate(texts)])
+
+        service._request_embeddings = ragged_request_embeddings
+
+        result = await service.get_embeddings_np(["a", "bb"])
+
+        assert result.is_error
+        assert "dimensions" in result.error
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from domain.utils.result import Result
+from infrastructure.ai.vector_db.qdrant.batch_coalescer import BatchCoalescer
+from infrastructure.ai.vector_db.qdrant.embedding_service import EmbeddingService
+
+
+def make_echo_flush(flushed: list):
+    async def echo_flush(key, items):
+        flushed.append((key, list(items)))
+        return Result.success([item * 10 for item in items])
+    return echo_flush
+
+
+class TestBatchCoalescer:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_items_share_one_flush(self):
+        flushed = []
+        coalescer = BatchCoalescer(make_echo_flush(flushed), max_batch_size=100, max_wait_ms=5.0)
+
+        results = await asyncio.gather(*(coalescer.submit("a", i) for i in range(5)))
+
+        assert [r.value for r in results] == [0, 10, 20, 30, 40]
+        assert flushed == [("a", [0, 1, 2, 3, 4])]
+
+    @pytest.mark.asyncio
+    async def test_keys_are_flushed_separately(self):
+        flushed = []
+        coalescer = BatchCoalescer(make_echo_flush(flushed), max_batch_size=100, max_wait_ms=5.0)
+
+        await asyncio.gather(coalescer.submit("a", 1), coalescer.submit("b", 2), coalescer.submit("a", 3))
+
+        assert sorted(flushed) == [("a", [1, 3]), ("b", [2])]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_flushed_without_waiting_for_timer(self):
+        coalescer = BatchCoalescer(make_echo_flush([]), max_batch_size=2, max_wait_ms=10000.0)
+
+        results = await asyncio.wait_for(asyncio.gather(coalescer.submit("a", 1), coalescer.submit("a", 2)), timeout=1.0)
+
+        assert [r.value for r in results] == [10, 20]
+
+    @pytest.mark.asyncio
+    async def test_flush_error_is_given_to_every_submitter(self):
+        async def failing_flush(key, items):
+            return Result.error("boom")
+
+        coalescer = BatchCoalescer(failing_flush)
+        results = await asyncio.gather(coalescer.submit("a", 1), coalescer.submit("a", 2))
+
+        assert all(r.is_error and r.error == "boom" for r in results)
+
+    @pytest.mark.asyncio
+    async def test_flush_exception_becomes_error_result(self):
+        async def raising_flush(key, items):
+            raise RuntimeError("down")
+
+        coalescer = BatchCoalescer(raising_flush)
+        result = await coalescer.submit("a", 1)
+
+        assert result.is_error
+        assert "down" in result.error
+
+    @pytest.mark.asyncio
+    async def test_result_count_mismatch_is_an_error(self):
+        async def short_flush(key, items):
+            return Result.success(items[:1])
+
+        coalescer = BatchCoalescer(short_flush)
+        results = await asyncio.gather(coalescer.submit("a", 1), coalescer.submit("a", 2))
+
+        assert all(r.is_error for r in results)
+
+    @pytest.mark.asyncio
+    async def test_per_item_results_are_passed_through(self):
+        async def mixed_flush(key, items):
+            return Result.success([Result.error("bad") if item < 0 else item for item in items])
+
+        coalescer = BatchCoalescer(mixed_flush)
+        good, bad = await asyncio.gather(coalescer.submit("a", 1), coalescer.submit("a", -1))
+
+        assert good.is_success and good.value == 1
+        assert bad.is_error and bad.error == "bad"
+
+
+def make_embedding_service(sent_points: list) -> EmbeddingService:
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent_points.append(json.loads(request.content)["points"])
+        return httpx.Response(200, json={"status": "ok", "result": {"status": "completed"}})
+
+    client = httpx.AsyncClient(base_url="http://qdrant:6333", transport=httpx.MockTransport(handler))
+    return EmbeddingService("http://qdrant:6333", client=client)
+
+
+class TestCoalescedUpserts:
+    @pytest.mark.asyncio
+    async def test_bad_point_fails_only_its_caller(self):
+        sent_points = []
+        service = make_embedding_service(sent_points)
+        good = [{"id": 1, "vector": [0.1, 0.2]}]
+        bad = [{"id": 2}]
+        other = [{"id": 3, "vector": [0.3, 0.4]}]
+
+        good_result, bad_result, other_result = await asyncio.gather(
+            service.upsert_points_coalesced("docs", good),
+            service.upsert_points_coalesced("docs", bad),
+            service.upsert_points_coalesced("docs", other)
+        )
+
+        assert good_result.is_success
+        assert other_result.is_success
+        assert bad_result.is_error
+        assert "missing 'vector'" in bad_result.error
+        assert [[point["id"] for point in points] for points in sent_points] == [[1, 3]]
+
+    @pytest.mark.asyncio
+    async def test_nothing_is_sent_when_every_group_is_invalid(self):
+        sent_points = []
+        service = make_embedding_service(sent_points)
+        results = await asyncio.gather(
+            service.upsert_points_coalesced("docs", [{"vector": [0.1]}]),
+            service.upsert_points_coalesced("docs", [])
+        )
+
+        assert all(r.is_error for r in results)
+        assert sent_points == []
@@ -0,0 +1,147 @@
+import os
+import sqlite3
+
+import numpy as np
+
+from infrastructure.ai.llm.google_vertex.cache_store import SqliteCacheStore
+
+
+class TestSqliteCacheStore:
+    def setup_method(self):
+        self.stores = []
+
+    def teardown_method(self):
+        for store in self.stores:
+            store.close()
+
+    def open_store(self, path, scope: str = "") -> SqliteCacheStore:
+        store = SqliteCacheStore(str(path), scope)
+        self.stores.append(store)
+        return store
+
+    def test_missing_parent_directory_is_created(self, tmp_path):
+        path = tmp_path / "nested" / "dir" / "cache.db"
+        self.open_store(path)
+        assert os.path.exists(path)
+
+    def test_response_round_trip(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        assert store.get_response("missing") is None
+
+        store.put_response("key", {"text": "Cześć", "usage": [1, 2]}, 100.0)
+
+        assert store.get_response("key") == ({"text": "Cześć", "usage": [1, 2]}, 100.0)
+
+    def test_put_replaces_existing_response(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        store.put_response("key", "old", 100.0)
+        store.put_response("key", "new", 200.0)
+        assert store.get_response("key") == ("new", 200.0)
+
+    def test_delete_response(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        store.put_response("key", "value", 100.0)
+        store.delete_response("key")
+        assert store.get_response("key") is None
+
+    def test_entries_are_shared_by_stores_on_the_same_file(self, tmp_path):
+        writer = self.open_store(tmp_path / "cache.db")
+        reader = self.open_store(tmp_path / "cache.db")
+
+        writer.put_response("key", "value", 100.0)
+
+        assert reader.get_response("key") == ("value", 100.0)
+
+    def test_semantic_entries_round_trip_oldest_first(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        codes = np.array([1, -2, 127], dtype=np.int8)
+        store.put_semantic_entry("ns-a", codes, 0.5, "second", 200.0)
+        store.put_semantic_entry("ns-b", codes, 0.25, "first", 100.0)
+
+        entries = store.load_semantic_entries(limit=10, min_timestamp=0.0)
+
+        assert [(namespace, response, timestamp) for namespace, _, _, response, timestamp in entries] == [
+            ("ns-b", "first", 100.0),
+            ("ns-a", "second", 200.0)
+        ]
+        namespace, loaded_codes, scale, _, _ = entries[1]
+        assert loaded_codes.dtype == np.int8
+        assert np.array_equal(loaded_codes, codes)
+        assert scale == 0.5
+
+    def test_semantic_load_keeps_newest_within_limit_and_age(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        codes = np.zeros(2, dtype=np.int8)
+        for timestamp in (100.0, 200.0, 300.0, 400.0):
+            store.put_semantic_entry("ns", codes, 1.0, timestamp, timestamp)
+
+        assert [entry[4] for entry in store.load_semantic_entries(limit=2, min_timestamp=0.0)] == [300.0, 400.0]
+        assert [entry[4] for entry in store.load_semantic_entries(limit=10, min_timestamp=250.0)] == [300.0, 400.0]
+
+    def test_prune_drops_expired_rows_and_excess_semantic_entries(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        codes = np.zeros(2, dtype=np.int8)
+        store.put_response("old", "value", 100.0)
+        store.put_response("new", "value", 300.0)
+        for timestamp in (100.0, 300.0, 400.0, 500.0):
+            store.put_semantic_entry("ns", codes, 1.0, timestamp, timestamp)
+
+        store.prune(min_timestamp=200.0, max_semantic_entries=2)
+
+        assert store.get_response("old") is None
+        assert store.get_response("new") == ("value", 300.0)
+        assert [entry[4] for entry in store.load_semantic_entries(limit=10, min_timestamp=0.0)] == [400.0, 500.0]
+
+    def test_clear(self, tmp_path):
+        store = self.open_store(tmp_path / "cache.db")
+        store.put_response("key", "value", 100.0)
+        store.put_semantic_entry("ns", np.zeros(2, dtype=np.int8), 1.0, "value", 100.0)
+
+        store.clear()
+
+        assert store.get_response("key") is None
+        assert store.load_semantic_entries(limit=10, min_timestamp=0.0) == []
+
+    def test_scopes_sharing_a_file_are_isolated(self, tmp_path):
+        flash = self.open_store(tmp_path / "cache.db", "flash")
+        pro = self.open_store(tmp_path / "cache.db", "pro")
+        codes = np.zeros(2, dtype=np.int8)
+        flash.put_response("key", "flash answer", 100.0)
+        pro.put_response("other", "pro answer", 100.0)
+        flash.put_semantic_entry("ns", codes, 1.0, "flash", 100.0)
+        pro.put_semantic_entry("ns", codes, 1.0, "pro", 100.0)
+
+        assert pro.get_response("key") is None
+        assert [entry[3] for entry in pro.load_semantic_entries(limit=10, min_timestamp=0.0)] == ["pro"]
+
+        flash.clear()
+
+        assert flash.get_response("key") is None
+        assert pro.get_response("other") == ("pro answer", 100.0)
+        assert [entry[3] for entry in pro.load_semantic_entries(limit=10, min_timestamp=0.0)] == ["pro"]
+
+    def test_prune_caps_semantic_entries_per_scope(self, tmp_path):
+        flash = self.open_store(tmp_path / "cache.db", "flash")
+        pro = self.open_store(tmp_path / "cache.db", "pro")
+        codes = np.zeros(2, dtype=np.int8)
+        for timestamp in (100.0, 200.0):
+            pro.put_semantic_entry("ns", codes, 1.0, timestamp, timestamp)
+        for timestamp in (300.0, 400.0, 500.0):
+            flash.put_semantic_entry("ns", codes, 1.0, timestamp, timestamp)
+
+        flash.prune(min_timestamp=0.0, max_semantic_entries=1)
+
+        assert [entry[4] for entry in flash.load_semantic_entries(limit=10, min_timestamp=0.0)] == [500.0]
+        assert [entry[4] for entry in pro.load_semantic_entries(limit=10, min_timestamp=0.0)] == [100.0, 200.0]
+
+    def test_unscoped_file_is_migrated(self, tmp_path):
+        path = tmp_path / "cache.db"
+        conn = sqlite3.connect(str(path))
+        conn.execute("CREATE TABLE responses (cache_key TEXT PRIMARY KEY, response BLOB NOT NULL, timestamp REAL NOT NULL)")
+        conn.execute("INSERT INTO responses VALUES ('key', '\"old\"', 100.0)")
+        conn.commit()
+        conn.close()
+
+        store = self.open_store(path)
+
+        assert store.get_response("key") == ("old", 100.0)
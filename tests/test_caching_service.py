@@ -0,0 +1,30 @@
+import pytest
+
+from infrastructure.ai.llm.google_vertex.caching_service import CachingService
+
+
+def make_service() -> CachingService:
+    service = CachingService()
+    service.enable_caching(True)
+    service.enable_semantic_caching(True, threshold=0.9)
+    return service
+
+
+class TestSemanticCache:
+    @pytest.mark.asyncio
+    async def test_similar_embedding_hits_in_the_same_namespace(self):
+        service = make_service()
+        await service.cache_semantic_response([1.0, 0.0, 0.0], "ns", "answer")
+
+        assert service.get_semantic_response([0.99, 0.05, 0.0], "ns") == "answer"
+        assert service.get_semantic_response([0.99, 0.05, 0.0], "other") is None
+
+    @pytest.mark.asyncio
+    async def test_entries_of_another_dimension_are_skipped(self):
+        service = make_service()
+        await service.cache_semantic_response([1.0, 0.0, 0.0], "ns", "three")
+        await service.cache_semantic_response([1.0, 0.0], "ns", "two")
+
+        assert service.get_semantic_response([1.0, 0.0], "ns") == "two"
+        assert service.get_semantic_response([1.0, 0.0, 0.0], "ns") == "three"
+        assert service.get_semantic_response([1.0, 0.0, 0.0, 0.0], "ns") is None
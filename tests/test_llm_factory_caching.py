@@ -0,0 +1,46 @@
+import pytest
+
+from infrastructure.ai.llm.llm_factory import LLMFactory, LLMProvider
+
+MESSAGES = [{"role": "user", "parts": [{"text": "Cześć"}]}]
+CONFIG = {"temperature": 0.0, "maxOutputTokens": 100}
+
+
+def create(tmp_path, model: str, api_key: str = "key-a"):
+    service = LLMFactory.create_service(LLMProvider.GOOGLE, api_key=api_key, model=model, cache_path=str(tmp_path / "cache.db"))
+    service.caching_service.enable_caching(True)
+    return service
+
+
+class TestSharedCachingService:
+    def test_same_model_and_key_share_one_cache(self, tmp_path):
+        assert create(tmp_path, "m-shared").caching_service is create(tmp_path, "m-shared").caching_service
+
+    @pytest.mark.asyncio
+    async def test_models_sharing_a_cache_file_do_not_hit_each_other(self, tmp_path):
+        flash = create(tmp_path, "gemini-2.0-flash-scope-test")
+        pro = create(tmp_path, "gemini-1.5-pro-scope-test")
+        await flash.caching_service.cache_response(flash.caching_service.generate_cache_key(MESSAGES, CONFIG), "flash answer")
+
+        assert await pro.caching_service.get_cached_response(pro.caching_service.generate_cache_key(MESSAGES, CONFIG)) is None
+
+    @pytest.mark.asyncio
+    async def test_api_keys_sharing_a_cache_file_do_not_hit_each_other(self, tmp_path):
+        tenant_a = create(tmp_path, "m-tenants", api_key="key-a")
+        tenant_b = create(tmp_path, "m-tenants", api_key="key-b")
+        await tenant_a.caching_service.cache_response(tenant_a.caching_service.generate_cache_key(MESSAGES, CONFIG), "a's answer")
+
+        assert tenant_a.caching_service is not tenant_b.caching_service
+        assert await tenant_b.caching_service.get_cached_response(tenant_b.caching_service.generate_cache_key(MESSAGES, CONFIG)) is None
+
+    @pytest.mark.asyncio
+    async def test_clearing_one_cache_keeps_other_scopes_in_the_shared_file(self, tmp_path):
+        flash = create(tmp_path, "gemini-2.0-flash-clear-test")
+        pro = create(tmp_path, "gemini-1.5-pro-clear-test")
+        pro_key = pro.caching_service.generate_cache_key(MESSAGES, CONFIG)
+        await pro.caching_service.cache_response(pro_key, "pro answer")
+
+        await flash.caching_service.clear_cache()
+        pro.caching_service._cache.clear()  # force the lookup to go to the file
+
+        assert await pro.caching_service.get_cached_response(pro_key) == "pro answer"
@@ -0,0 +1,86 @@
+import numpy as np
+
+from infrastructure.ai.vector_db.qdrant.query_cache import QueryCache
+
+
+class TestQueryCache:
+    def setup_method(self):
+        self.cache = QueryCache(max_entries=2, ttl_seconds=60.0)
+
+    def test_list_and_array_vectors_share_a_key(self):
+        as_list = QueryCache.make_key("docs", [0.1, 0.2, 0.3], 5)
+        as_array = QueryCache.make_key("docs", np.array([0.1, 0.2, 0.3], dtype=np.float64), 5)
+        assert as_list == as_array
+
+    def test_filter_key_order_does_not_matter(self):
+        first = QueryCache.make_key("docs", [0.1], 5, filter_conditions={"a": 1, "b": {"c": 2, "d": 3}})
+        second = QueryCache.make_key("docs", [0.1], 5, filter_conditions={"b": {"d": 3, "c": 2}, "a": 1})
+        assert first == second
+
+    def test_search_parameters_are_part_of_the_key(self):
+        base = QueryCache.make_key("docs", [0.1], 5)
+        assert base != QueryCache.make_key("other", [0.1], 5)
+        assert base != QueryCache.make_key("docs", [0.2], 5)
+        assert base != QueryCache.make_key("docs", [0.1], 6)
+        assert base != QueryCache.make_key("docs", [0.1], 5, score_threshold=0.5)
+        assert base != QueryCache.make_key("docs", [0.1], 5, offset=5)
+        assert base != QueryCache.make_key("docs", [0.1], 5, filter_conditions={"a": 1})
+
+    def test_put_then_get(self):
+        key = QueryCache.make_key("docs", [0.1], 5)
+        assert self.cache.get(key) is None
+        self.cache.put(key, ["hit"])
+        assert self.cache.get(key) == ["hit"]
+
+    def test_expired_entry_is_a_miss_and_is_dropped(self):
+        cache = QueryCache(ttl_seconds=0.0)
+        key = QueryCache.make_key("docs", [0.1], 5)
+        cache.put(key, ["stale"])
+
+        assert cache.get(key) is None
+        assert cache.stats()["size"] == 0
+
+    def test_least_recently_used_entry_is_evicted(self):
+        first, second, third = (QueryCache.make_key("docs", [float(i)], 5) for i in range(3))
+        self.cache.put(first, 1)
+        self.cache.put(second, 2)
+        self.cache.get(first)
+        self.cache.put(third, 3)
+
+        assert self.cache.get(first) == 1
+        assert self.cache.get(second) is None
+        assert self.cache.get(third) == 3
+
+    def test_invalidate_one_collection(self):
+        docs = QueryCache.make_key("docs", [0.1], 5)
+        other = QueryCache.make_key("other", [0.1], 5)
+        self.cache.put(docs, 1)
+        self.cache.put(other, 2)
+
+        self.cache.invalidate("docs")
+
+        assert self.cache.get(docs) is None
+        assert self.cache.get(other) == 2
+
+    def test_invalidate_all(self):
+        self.cache.put(QueryCache.make_key("docs", [0.1], 5), 1)
+        self.cache.put(QueryCache.make_key("other", [0.1], 5), 2)
+
+        self.cache.invalidate()
+
+        assert self.cache.stats()["size"] == 0
+
+    def test_stats(self):
+        key = QueryCache.make_key("docs", [0.1], 5)
+        assert self.cache.stats()["hit_rate"] == 0.0
+
+        self.cache.get(key)
+        self.cache.put(key, 1)
+        self.cache.get(key)
+
+        stats = self.cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["size"] == 1
+        assert stats["max_entries"] == 2
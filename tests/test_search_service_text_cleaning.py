@@ -0,0 +1,61 @@
+import json
+
+import httpx
+import pytest
+
+from domain.utils.result import Result
+from infrastructure.ai.vector_db.qdrant.search_service import SearchService
+
+
+class FlakyTextCleaner:
+    """Cleaner that raises for texts containing "boom" and errors for texts containing "bad" """
+
+    async def clean_text(self, text: str) -> Result[str, str]:
+        if "boom" in text:
+            raise RuntimeError("cleaner crashed")
+        if "bad" in text:
+            return Result.error("cannot clean")
+        return Result.success(text.upper())
+
+
+class FakeEmbeddingService:
+    async def create_embedding(self, text: str) -> Result[list, str]:
+        return Result.success([0.1, 0.2, 0.3])
+
+
+def make_service(points: list) -> SearchService:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/search/batch"):
+            searches = json.loads(request.content)["searches"]
+            return httpx.Response(200, json={"status": "ok", "result": [points for _ in searches]})
+        return httpx.Response(200, json={"status": "ok", "result": points})
+
+    client = httpx.AsyncClient(base_url="http://qdrant:6333", transport=httpx.MockTransport(handler))
+    return SearchService("http://qdrant:6333", text_cleaner_service=FlakyTextCleaner(), client=client)
+
+
+class TestSearchByTextCleaning:
+    @pytest.mark.asyncio
+    async def test_cleaner_exception_keeps_raw_text_of_that_result_only(self):
+        service = make_service([
+            {"id": 1, "score": 0.9, "payload": {"text": "first"}},
+            {"id": 2, "score": 0.8, "payload": {"text": "boom here"}},
+            {"id": 3, "score": 0.7, "payload": {"text": "bad text"}},
+        ])
+
+        result = await service.search_by_text("docs", "query", vector_size=3, embedding_service=FakeEmbeddingService())
+
+        assert result.is_success
+        assert [chunk.text_chunk for chunk in result.value] == ["FIRST", "boom here", "bad text"]
+
+    @pytest.mark.asyncio
+    async def test_payload_of_unexpected_shape_falls_back_to_fragment_id(self):
+        service = make_service([
+            {"id": 7, "score": 0.9, "payload": {"Akcja": "not a dict"}},
+            {"id": 8, "score": 0.8, "payload": {"text": "ok"}},
+        ])
+
+        result = await service.search_by_text("docs", "query", vector_size=3, embedding_service=FakeEmbeddingService())
+
+        assert result.is_success
+        assert [chunk.text_chunk for chunk in result.value] == ["Fragment 7", "OK"]
@@ -0,0 +1,76 @@
+import pytest
+
+from infrastructure.utils.sse import SseJsonAssembler, iter_sse_data
+
+
+async def chunks_of(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def collect(*chunks: bytes) -> list:
+    return [payload async for payload in iter_sse_data(chunks_of(*chunks))]
+
+
+class TestIterSseData:
+    @pytest.mark.asyncio
+    async def test_lf_lines(self):
+        assert await collect(b"data: a\n\ndata: b\n\n") == [b"a", b"b"]
+
+    @pytest.mark.asyncio
+    async def test_crlf_lines(self):
+        assert await collect(b"data: a\r\n\r\ndata: {\"b\": 1}\r\n\r\n") == [b"a", b'{"b": 1}']
+
+    @pytest.mark.asyncio
+    async def test_data_line_split_across_chunks(self):
+        # The prefix, a multi-byte UTF-8 character and the CRLF are all split between chunks
+        payloads = await collect(b"da", b"ta: {\"text\": \"Cze\xc5", b"\x9b\"}\r", b"\n\r\n")
+        assert payloads == ['{"text": "Cześ"}'.encode("utf-8")]
+
+    @pytest.mark.asyncio
+    async def test_final_line_without_newline(self):
+        assert await collect(b"data: first\n\n", b"data: last") == [b"first", b"last"]
+
+    @pytest.mark.asyncio
+    async def test_final_crlf_line_without_newline(self):
+        assert await collect(b"data: last\r") == [b"last"]
+
+    @pytest.mark.asyncio
+    async def test_other_fields_and_comments_are_skipped(self):
+        stream = b": keep-alive\nevent: message\nid: 7\ndata: x\nretry: 100\n\n"
+        assert await collect(stream) == [b"x"]
+
+    @pytest.mark.asyncio
+    async def test_only_one_space_after_colon_is_stripped(self):
+        assert await collect(b"data:x\ndata:  y\ndata:\n") == [b"x", b" y", b""]
+
+
+class TestSseJsonAssembler:
+    def setup_method(self):
+        self.assembler = SseJsonAssembler()
+
+    def test_complete_document_is_decoded_at_once(self):
+        assert self.assembler.feed(b'{"a": 1}') == {"a": 1}
+
+    def test_document_split_across_data_lines(self):
+        assert self.assembler.feed(b'{"candidates": [{"content": ') is None
+        assert self.assembler.feed(b'{"parts": [{"text": "hi"}]}') is None
+        assert self.assembler.feed(b'}]}') == {"candidates": [{"content": {"parts": [{"text": "hi"}]}}]}
+
+    def test_str_payloads_are_supported(self):
+        assert self.assembler.feed('{"a": ') is None
+        assert self.assembler.feed('[1, 2]}') == {"a": [1, 2]}
+
+    def test_closing_brace_inside_string_does_not_end_document(self):
+        assert self.assembler.feed(b'{"text": "a}') is None
+        assert self.assembler.feed(b'"}') == {"text": "a}"}
+
+    def test_assembler_is_reusable_after_a_document(self):
+        self.assembler.feed(b'{"a": ')
+        self.assembler.feed(b'1}')
+        assert self.assembler.feed(b'{"b": 2}') == {"b": 2}
+
+    def test_reset_drops_partial_payload(self):
+        assert self.assembler.feed(b'{"a": ') is None
+        self.assembler.reset()
+        assert self.assembler.feed(b'{"b": 2}') == {"b": 2}
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+
+from domain.utils.result import Result
+from infrastructure.ai.llm.google_vertex.tool_calling_service import ToolCallingService
+
+
+def text_chunk(text: str) -> Result:
+    return Result.success({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+
+def call_chunk(name: str) -> Result:
+    return Result.success({"candidates": [{"content": {"parts": [{"functionCall": {"name": name, "args": {}}}]}}]})
+
+
+def chunk_label(chunk: Result) -> str:
+    part = chunk.value["candidates"][0]["content"]["parts"][0]
+    return part.get("text") or part["functionCall"]["name"]
+
+
+def make_service(chunks: list, events: dict) -> ToolCallingService:
+    service = ToolCallingService("test-key", client=httpx.AsyncClient())
+
+    async def fake_stream(messages, tools, config=None):
+        try:
+            for chunk in chunks:
+                yield chunk
+            events["exhausted"].set()
+            # Holds the stream open like a slow server until the consumer reads everything
+            await events["release"].wait()
+        finally:
+            events["closed"].set()
+
+    service._stream_tool_chunks = fake_stream
+    return service
+
+
+def make_events() -> dict:
+    return {"exhausted": asyncio.Event(), "release": asyncio.Event(), "closed": asyncio.Event()}
+
+
+class TestStreamCompletionWithTools:
+    @pytest.mark.asyncio
+    async def test_early_exit_closes_the_chunk_stream(self):
+        events = make_events()
+        service = make_service([text_chunk("a"), text_chunk("b")], events)
+        stream = service.stream_completion_with_tools([], [])
+
+        first = await stream.__anext__()
+        await stream.aclose()
+
+        assert chunk_label(first) == "a"
+        assert events["closed"].is_set()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_never_drops_tool_calls(self):
+        events = make_events()
+        chunks = [text_chunk("a"), call_chunk("lookup"), text_chunk("b"), text_chunk("c"), call_chunk("save")]
+        service = make_service(chunks, events)
+        stream = service.stream_completion_with_tools([], [], buffer_size=3, overflow="drop_oldest")
+
+        # Start the producer, then let it fill the buffer before reading
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.wait_for(events["exhausted"].wait(), timeout=1.0)
+        received = [await pending]
+        events["release"].set()
+        received.extend([chunk async for chunk in stream])
+
+        assert [chunk_label(chunk) for chunk in received] == ["lookup", "c", "save"]
+
+    @pytest.mark.asyncio
+    async def test_buffer_full_of_tool_calls_blocks_instead_of_dropping(self):
+        events = make_events()
+        chunks = [call_chunk("one"), call_chunk("two"), call_chunk("three")]
+        service = make_service(chunks, events)
+        events["release"].set()
+
+        received = [chunk async for chunk in service.stream_completion_with_tools([], [], buffer_size=1, overflow="drop_oldest")]
+
+        assert [chunk_label(chunk) for chunk in received] == ["one", "two", "three"]
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from infrastructure.ai.llm.google_vertex.base_vertex_service import BaseVertexService
+
+
+SAMPLES_DIR = Path(__file__).parent / "fixtures" / "vertex_responses"
+SAMPLES = sorted(SAMPLES_DIR.glob("*.json"))
+
+
+def parse(body: bytes, fast: bool):
+    service = BaseVertexService.__new__(BaseVertexService)
+    service.fast_text_extraction = fast
+    try:
+        return service._parse_completion(body)
+    except Exception as e:
+        return type(e)
+
+
+def load_sample(name: str) -> bytes:
+    return (SAMPLES_DIR / name).read_bytes()
+
+
+class TestVertexResponseParsing:
+    def test_fast_path_is_opt_in(self):
+        assert BaseVertexService.fast_text_extraction is False
+
+    @pytest.mark.parametrize("sample", SAMPLES, ids=lambda path: path.stem)
+    def test_fast_path_matches_full_decode(self, sample: Path):
+        body = sample.read_bytes()
+        assert parse(body, fast=True) == parse(body, fast=False)
+
+    @pytest.mark.parametrize("sample", SAMPLES, ids=lambda path: path.stem)
+    def test_fast_path_matches_full_decode_on_compact_json(self, sample: Path):
+        # Same documents without whitespace, as the API sends them without pretty-printing
+        body = json.dumps(json.loads(sample.read_bytes()), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        assert parse(body, fast=True) == parse(body, fast=False)
+
+    def test_function_call_argument_is_not_returned_as_text(self):
+        body = load_sample("function_call_text_arg.json")
+        result = parse(body, fast=True)
+        assert result != ("injected", {"promptTokenCount": 60, "candidatesTokenCount": 7, "totalTokenCount": 67})
+        assert result == parse(body, fast=False)
+
+    def test_thought_part_is_not_returned_as_text(self):
+        text, _ = parse(load_sample("thought_then_text.json"), fast=True)
+        assert text == "**Analyzing the request**\n\nThe user wants a short answer."
+        assert text == parse(load_sample("thought_then_text.json"), fast=False)[0]
+
+    def test_text_is_first_part_of_first_candidate(self):
+        text, usage = parse(load_sample("text_basic.json"), fast=True)
+        assert text == "Cześć! W czym mogę pomóc?\n"
+        assert usage == {"promptTokenCount": 12, "candidatesTokenCount": 9, "totalTokenCount": 21}
+
+    def test_escaped_json_inside_text_is_decoded_not_matched(self):
+        text, usage = parse(load_sample("text_escapes.json"), fast=True)
+        assert text.startswith("Oto przykład:")
+        assert '{"parts": [{"text": "nie to"}]}' in text
+        assert usage["cachedContentTokenCount"] == 32